@@ -1,11 +1,13 @@
 import dataclasses
-import json
+from typing import Iterable, List, Tuple
 
 
 @dataclasses.dataclass(order=True, frozen=True)
 class Item:
     weight: float
     name: str = dataclasses.field(default='')
+    # gęsty numer przedmiotu w instancji, nie bierze udziału w porównaniach
+    index: int = dataclasses.field(default=-1, compare=False, repr=False)
 
     def __sub__(self, other):
         return self.weight - other
@@ -17,13 +19,20 @@ class Item:
         return f'{self.name}: {self.weight}'
 
     @staticmethod
-    def from_json(path: str):
-        """Wczytuje plik jako JSON i tworzy z niego listę przedmiotów"""
-        with open(path) as fin:
-            ret = json.load(fin)
-        return (
-            [Item(**kwargs) for kwargs in ret['items']],
-            ret['truck_load'], ret['car_load'],
-            ret['truck_cost'], ret['car_cost']
-        )
+    def indexed(items: Iterable['Item']) -> List['Item']:
+        """Nadaje przedmiotom kolejne numery 0..n-1"""
+        return [dataclasses.replace(item, index=i) for i, item in enumerate(items)]
+
+    @staticmethod
+    def ids(items: Iterable['Item']) -> Tuple[int, ...]:
+        """Posortowane numery przedmiotów"""
+        ret = tuple(sorted(item.index for item in items))
+        if ret and ret[0] < 0:
+            raise ValueError('Items have no index, use Item.indexed or Item.from_json')
+        return ret
 
+    @staticmethod
+    def from_json(path: str):
+        """Wczytuje plik JSON (strumieniowo, zob. instance.Instance) i tworzy z niego listę ponumerowanych przedmiotów"""
+        from instance import Instance  # instance importuje Item
+        return Instance.from_json(path).as_tuple()
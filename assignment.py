@@ -0,0 +1,271 @@
+from typing import Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from Item import Item
+
+# numer kursu oznaczający nowy, jeszcze nieistniejący kurs
+NEW_TRIP = -1
+# (masa, liczba przedmiotów, czy ciężarówka)
+Trip = Tuple[float, int, bool]
+# Assignment.encode: (trip_of, trip_truck, order)
+Code = Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]
+
+
+def trip_cost(load, size, truck, args):
+    """Koszt kursu; pusty kurs nic nie kosztuje"""
+    if size == 0:
+        return 0
+    return args[2] if truck else args[3]
+
+
+def move_delta(weight, source: Trip, target: Optional[Trip], args, vehicle_by_load=True):
+    """Zmiana kosztu po przeniesieniu przedmiotu o masie `weight` z kursu `source`
+    do kursu `target` (None - nowy kurs), w czasie O(1)
+
+    Jeśli vehicle_by_load, rodzaj pojazdu wynika z masy kursu po zmianie (jak w Gene),
+    w przeciwnym razie kurs zachowuje swój pojazd (jak w bees.Solution).
+    Nowy kurs jedzie samochodem, o ile przedmiot się w nim mieści.
+    """
+    car_load = args[1]
+
+    def change(trip: Trip, d_load, d_size):
+        load, size, truck = trip
+        new_load = load + d_load
+        new_truck = new_load > car_load if vehicle_by_load else truck
+        return trip_cost(new_load, size + d_size, new_truck, args) - trip_cost(load, size, truck, args)
+
+    delta = change(source, -weight, -1)
+    if target is None:
+        return delta + trip_cost(weight, 1, weight > car_load, args)
+    return delta + change(target, weight, 1)
+
+
+def item_table(partition: Iterable[Iterable[Item]]) -> List[Item]:
+    """Buduje listę przedmiotów indeksowaną numerem przedmiotu (Item.index)"""
+    items = [item for trip in partition for item in trip]
+    table: List[Optional[Item]] = [None] * len(items)
+    for item in items:
+        if not 0 <= item.index < len(table) or table[item.index] is not None:
+            raise ValueError(
+                f'Item {item!r} has no unique index, use Item.indexed or Item.from_json')
+        table[item.index] = item
+    return table
+
+
+def item_weights(items: Sequence[Item]) -> np.ndarray:
+    return np.fromiter((item.weight for item in items), dtype=np.float64, count=len(items))
+
+
+class Assignment:
+    """Zwarta, tablicowa reprezentacja rozwiązania
+
+    # Interfejs
+    ## Atrybuty
+    * items -> lista przedmiotów, items[i].index == i (współdzielona między kopiami)
+    * weights -> tablica mas przedmiotów (współdzielona między kopiami)
+    * trip_of -> tablica przedmiot -> numer kursu
+    * trip_load, trip_size -> masa i liczba przedmiotów w każdym kursie
+    * trip_truck -> czy kurs odbywa się ciężarówką
+    * trip_cost -> koszt każdego kursu (0 dla pustego kursu)
+    * n_trips -> liczba kursów
+    * order -> numery przedmiotów w kolejności, którą zachowuje trips() (None - według numerów)
+    * vehicle_by_load -> prawda, jeśli rodzaj pojazdu wynika z masy kursu (jak w Gene),
+      fałsz, jeśli jest stałą cechą kursu (jak w bees.Solution)
+    * args -> truck_load, car_load, truck_cost, car_cost
+    ## Metody
+    * encode, decode -> zwarta postać do przesyłania między procesami i zapisu stanu
+      (GeneticAlgorithm, IslandModel, BeeAlgorithm)
+    * move, move_delta -> przeniesienie przedmiotu i jego koszt bez wykonywania ruchu
+    """
+
+    def __init__(self, items: Sequence[Item], trip_of, trip_truck, args,
+                 vehicle_by_load: bool = True, weights: np.ndarray = None, order: np.ndarray = None):
+        self.items = items
+        self.weights = item_weights(items) if weights is None else weights
+        self.trip_of = np.asarray(trip_of, dtype=np.int32)
+        self.order = order
+        self.args = tuple(args)
+        self.vehicle_by_load = vehicle_by_load
+        self.n_trips = len(trip_truck)
+        # tablice kursów mają zapas miejsca (zob. add_trip), atrybuty trip_* są ich widokami
+        self._trip_load = np.bincount(self.trip_of, weights=self.weights, minlength=self.n_trips)
+        self._trip_size = np.bincount(self.trip_of, minlength=self.n_trips)
+        if vehicle_by_load:
+            self._trip_truck = self._trip_load > self.car_load
+        else:
+            self._trip_truck = np.array(trip_truck, dtype=bool)
+        self._trip_cost = np.where(
+            self._trip_size == 0, 0,
+            np.where(self._trip_truck, self.truck_cost, self.car_cost))
+
+    @staticmethod
+    def from_partition(partition: Sequence[Iterable[Item]], args,
+                       truck: Sequence[bool] = None, items: Sequence[Item] = None,
+                       keep_order: bool = False):
+        """Tworzy przypisanie z listy kursów; bez `truck` pojazd wynika z masy kursu
+
+        keep_order - trips() zwróci przedmioty kursów w kolejności z `partition`,
+        a nie według numerów
+        """
+        partition = [list(trip) for trip in partition]
+        if items is None:
+            items = item_table(partition)
+        lengths = [len(trip) for trip in partition]
+        if sum(lengths) != len(items):
+            raise ValueError('Partition does not cover every item exactly once')
+        indices = np.fromiter((item.index for trip in partition for item in trip),
+                              dtype=np.int64, count=len(items))
+        trip_of = np.empty(len(items), dtype=np.int32)
+        trip_of[indices] = np.repeat(np.arange(len(partition), dtype=np.int32), lengths)
+        order = indices.astype(np.int32) if keep_order else None
+        if truck is None:
+            return Assignment(items, trip_of, [False] * len(partition), args, order=order)
+        return Assignment(items, trip_of, truck, args, vehicle_by_load=False, order=order)
+
+    def encode(self) -> Code:
+        """Numer kursu każdego przedmiotu, pojazdy kursów i kolejność przedmiotów
+        (tablice numpy, bez samych przedmiotów)"""
+        return self.trip_of, self.trip_truck, self.order
+
+    @staticmethod
+    def decode(code: Code, items: Sequence[Item], args, vehicle_by_load: bool = True):
+        """Odwrotność encode; items[i] musi być przedmiotem o numerze i"""
+        trip_of, trip_truck, order = code
+        return Assignment(items, trip_of, trip_truck, args, vehicle_by_load, order=order)
+
+    @property
+    def trip_load(self) -> np.ndarray:
+        return self._trip_load[:self.n_trips]
+
+    @property
+    def trip_size(self) -> np.ndarray:
+        return self._trip_size[:self.n_trips]
+
+    @property
+    def trip_truck(self) -> np.ndarray:
+        return self._trip_truck[:self.n_trips]
+
+    @property
+    def trip_cost(self) -> np.ndarray:
+        return self._trip_cost[:self.n_trips]
+
+    @property
+    def cost(self):
+        return self.trip_cost.sum().item()
+
+    @property
+    def fitness(self):
+        return -self.cost
+
+    def capacity(self, trip: int) -> float:
+        return self.truck_load if self.trip_truck[trip] else self.car_load
+
+    def trips(self) -> List[List[Item]]:
+        """Lista kursów (również pustych) jako listy przedmiotów"""
+        if self.order is None:
+            order = np.argsort(self.trip_of, kind='stable')
+        else:
+            order = self.order[np.argsort(self.trip_of[self.order], kind='stable')]
+        bounds = np.cumsum(self.trip_size)[:-1]
+        return [[self.items[i] for i in part] for part in np.split(order, bounds)] \
+            if self.n_trips else []
+
+    def trip(self, trip: int) -> Trip:
+        return self.trip_load[trip], self.trip_size[trip], self.trip_truck[trip]
+
+    def move_delta(self, item: int, trip: int):
+        """Zmiana kosztu po przeniesieniu przedmiotu `item` do kursu `trip` (lub NEW_TRIP)
+        bez wykonywania ruchu, w czasie O(1)"""
+        source = self.trip_of[item]
+        if source == trip:
+            return 0
+        target = None if trip == NEW_TRIP else self.trip(trip)
+        return move_delta(self.weights[item], self.trip(source), target, self.args, self.vehicle_by_load)
+
+    def fits(self, item: int, trip: int) -> bool:
+        load = self.trip_load[trip] + self.weights[item]
+        if self.vehicle_by_load:
+            return load <= self.truck_load
+        return load <= self.capacity(trip)
+
+    def add_trip(self, truck: bool = False) -> int:
+        """Dodaje pusty kurs i zwraca jego numer; tablice kursów rosną dwukrotnie,
+        więc zamortyzowany czas to O(1)"""
+        trip = self.n_trips
+        if trip == len(self._trip_load):
+            capacity = max(1, 2 * trip)
+            self._trip_load = np.resize(self._trip_load, capacity)
+            self._trip_size = np.resize(self._trip_size, capacity)
+            self._trip_truck = np.resize(self._trip_truck, capacity)
+            self._trip_cost = np.resize(self._trip_cost, capacity)
+        self._trip_load[trip] = 0
+        self._trip_size[trip] = 0
+        self._trip_truck[trip] = truck
+        self._trip_cost[trip] = 0
+        self.n_trips += 1
+        return trip
+
+    def move(self, item: int, trip: int):
+        """Przenosi przedmiot o numerze `item` do kursu `trip` (lub NEW_TRIP)
+        w czasie O(1) (zamortyzowanym, jeśli powstaje nowy kurs)"""
+        if trip == NEW_TRIP:
+            trip = self.add_trip(self.weights[item] > self.car_load)
+        source = self.trip_of[item]
+        if source == trip:
+            return
+        weight = self.weights[item]
+        self.trip_of[item] = trip
+        self._trip_load[source] -= weight
+        self._trip_size[source] -= 1
+        self._trip_load[trip] += weight
+        self._trip_size[trip] += 1
+        self._update_trip(source)
+        self._update_trip(trip)
+
+    def _update_trip(self, trip: int):
+        if self.vehicle_by_load:
+            self._trip_truck[trip] = self._trip_load[trip] > self.car_load
+        if self._trip_size[trip] == 0:
+            self._trip_cost[trip] = 0
+        else:
+            self._trip_cost[trip] = self.truck_cost if self._trip_truck[trip] else self.car_cost
+
+    def is_feasible(self) -> bool:
+        capacity = np.where(self.trip_truck, self.truck_load, self.car_load)
+        return bool(np.all(self.trip_load <= capacity))
+
+    def copy(self):
+        ret = Assignment.__new__(Assignment)
+        ret.items = self.items
+        ret.weights = self.weights
+        ret.args = self.args
+        ret.vehicle_by_load = self.vehicle_by_load
+        ret.order = self.order
+        ret.n_trips = self.n_trips
+        ret.trip_of = self.trip_of.copy()
+        ret._trip_load = self.trip_load.copy()
+        ret._trip_size = self.trip_size.copy()
+        ret._trip_truck = self.trip_truck.copy()
+        ret._trip_cost = self.trip_cost.copy()
+        return ret
+
+    @property
+    def truck_load(self):
+        return self.args[0]
+
+    @property
+    def car_load(self):
+        return self.args[1]
+
+    @property
+    def truck_cost(self):
+        return self.args[2]
+
+    @property
+    def car_cost(self):
+        return self.args[3]
+
+    def __len__(self):
+        return len(self.trip_of)
+
+    def __repr__(self):
+        return f'Assignment(trips={self.n_trips}, items={len(self)}, cost={self.cost})'
@@ -0,0 +1,75 @@
+import unittest
+from assignment import Assignment, NEW_TRIP
+from bees.ProblemParameters import ProblemParameters
+from bees.Solution import Solution
+from genetic.genes import Chromosome
+from Item import Item
+
+
+class AssignmentTest(unittest.TestCase):
+    def setUp(self):
+        self.items = Item.indexed([
+            Item(name='chair1', weight=4),
+            Item(name='chair2', weight=4),
+            Item(name='chair3', weight=4),
+            Item(name='chair4', weight=4),
+            Item(name='table', weight=20),
+        ])
+        self.basic_args = (60, 12, 50, 15)
+
+    def test_chromosome_round_trip(self):
+        chromosome = Chromosome([self.items[:3], self.items[3:]], *self.basic_args)
+        assignment = chromosome.to_assignment()
+        self.assertEqual(assignment.cost, chromosome.cost)
+        self.assertEqual(sorted(assignment.trip_load), [12, 24])
+        back = Chromosome.from_assignment(assignment)
+        self.assertEqual(back.genes, chromosome.genes)
+
+    def test_solution_keeps_vehicle_type(self):
+        pp = ProblemParameters(*self.basic_args)
+        solution = Solution([self.items[:2]], [self.items[2:3], self.items[3:], []], pp)
+        assignment = solution.to_assignment()
+        self.assertEqual(assignment.cost, solution.cost)
+        self.assertEqual(list(assignment.trip_truck), [False, True, True, True])
+        back = Solution.from_assignment(assignment, pp)
+        self.assertEqual(back.truck_trips, solution.truck_trips)
+
+    def test_move(self):
+        assignment = Chromosome([self.items[:3], self.items[3:]], *self.basic_args).to_assignment()
+        table = self.items[4].index
+        trip = assignment.add_trip()
+        assignment.move(table, trip)
+        self.assertEqual(assignment.trip_load[trip], 20)
+        self.assertTrue(assignment.trip_truck[trip])
+        self.assertEqual(assignment.cost, Chromosome.from_assignment(assignment).cost)
+
+    def test_add_trip_grows(self):
+        assignment = Chromosome([self.items], *self.basic_args).to_assignment()
+        for item in range(len(self.items)):
+            assignment.move(item, NEW_TRIP)
+        self.assertEqual(assignment.n_trips, 6)
+        self.assertEqual(list(assignment.trip_size), [0, 1, 1, 1, 1, 1])
+        self.assertEqual(assignment.cost, 4 * 15 + 50)
+        self.assertEqual(assignment.copy().cost, assignment.cost)
+
+    def test_encode_keeps_order(self):
+        pp = ProblemParameters(*self.basic_args)
+        solution = Solution([self.items[2::-1]], [[self.items[4], self.items[3]], []], pp)
+        code = solution.to_assignment().encode()
+        back = Solution.from_assignment(
+            Assignment.decode(code, self.items, pp.args, vehicle_by_load=False), pp)
+        self.assertEqual(back.car_trips, solution.car_trips)
+        self.assertEqual(back.truck_trips, solution.truck_trips)
+
+    def test_move_delta_matches_move(self):
+        chromosome = Chromosome([self.items[:2], self.items[2:4], self.items[4:]], *self.basic_args)
+        base = chromosome.to_assignment()
+        for item in range(len(self.items)):
+            for trip in list(range(base.n_trips)) + [NEW_TRIP]:
+                moved = base.copy()
+                moved.move(item, trip)
+                self.assertEqual(base.move_delta(item, trip), moved.cost - base.cost)
+
+
+if __name__ == '__main__':
+    unittest.main()
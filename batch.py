@@ -0,0 +1,312 @@
+"""Rozwiązywanie wielu instancji naraz w puli procesów
+
+    python batch.py test_data -o wyniki.jsonl -e both -w 8
+    python batch.py zlecenia.jsonl -o wyniki.jsonl
+
+Źródłem jest katalog (wszystkie pliki .json i .bin, również binarne pliki instance.py)
+albo plik JSON Lines, w którym każdy wiersz opisuje jedną instancję:
+
+    {"path": "zlecenia/1.json", "id": "zlecenie-1", "engine": "genetic"}
+
+(id i engine są opcjonalne, ścieżki względne liczone są od katalogu pliku). Największe
+instancje trafiają do procesów jako pierwsze, procesy są używane ponownie dla kolejnych
+instancji, a wynik każdego przebiegu jest dopisywany do pliku wynikowego zaraz po jego
+zakończeniu.
+"""
+import json
+import os
+import random
+import sys
+import time
+from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stderr, redirect_stdout
+from typing import Iterator, List
+from bees.BeeAlgorithm import BeeAlgorithm
+import exact
+from genetic.GeneticAlgorithm import GeneticAlgorithm
+from genetic.fitness import population_fitness
+from genetic.ga_selections import best_rank_selection
+from genetic.genes import gene_cache
+from instance import DEFAULT_CACHE_DIR, Instance, load_cached
+from heuristics import HEURISTICS
+from lower_bound import BOUNDS, bound_stop_condition, gap, lower_bound
+from main import bee_fpf, ga_population_generator, get_bee_sf, get_pp
+from util import mp_context
+
+EXTENSIONS = ('.json', '.bin')
+
+
+def discover(source: str, engine: str = 'genetic') -> List[dict]:
+    """Zadania (id, path, engine, size) dla katalogu albo pliku JSON Lines;
+    instancja z engine 'both' daje po jednym zadaniu na algorytm"""
+    if os.path.isdir(source):
+        entries = [{'path': os.path.join(source, name)} for name in sorted(os.listdir(source))
+                   if name.endswith(EXTENSIONS)]
+    else:
+        base = os.path.dirname(source)
+        with open(source) as fin:
+            entries = [json.loads(line) for line in fin if line.strip()]
+        for entry in entries:
+            entry['path'] = os.path.join(base, entry['path'])
+
+    tasks = []
+    for entry in entries:
+        entry_engine = entry.get('engine', engine)
+        for task_engine in ('genetic', 'bees') if entry_engine == 'both' else (entry_engine,):
+            if task_engine not in ENGINES:
+                raise ValueError(f'Unknown engine {task_engine!r} for {entry["path"]}')
+            tasks.append({
+                'id': entry.get('id', entry['path']),
+                'path': entry['path'],
+                'engine': task_engine,
+                # brakujący plik zostanie zgłoszony w wyniku swojego zadania
+                'size': os.path.getsize(entry['path']) if os.path.exists(entry['path']) else 0,
+            })
+    return tasks
+
+
+def schedule(tasks: List[dict]) -> List[dict]:
+    """Najpierw największe instancje, żeby najdłuższe przebiegi nie zostały na koniec"""
+    return sorted(tasks, key=lambda task: task['size'], reverse=True)
+
+
+def trip_indices(trips) -> list:
+    return [[item.index for item in trip] for trip in trips if len(trip)]
+
+
+def solve_genetic(instance: Instance, args, stop_condition):
+    # geny poprzedniej instancji nie zostaną już użyte
+    gene_cache.cache_clear()
+    ga = GeneticAlgorithm(ga_population_generator(instance, args.pop_size, args.init, args.init_mix), best_rank_selection,
+                          stop_condition, fitness_evaluator=population_fitness, instance=instance)
+    best = ga.run(args.gens)
+    genes = [gene for gene in best.genes if gene.subset]
+    return (best.cost, trip_indices(gene for gene in genes if not gene.is_by_truck),
+            trip_indices(gene for gene in genes if gene.is_by_truck))
+
+
+def solve_bees(instance: Instance, args, stop_condition):
+    ns = args.scouts
+    ba = BeeAlgorithm(ns, ns // 2, ns // 4, 50, 10, 5, bee_fpf,
+                      get_bee_sf(instance, args.init, args.init_mix), get_pp(instance),
+                      stop_condition=stop_condition)
+    solution = ba.run(args.gens)
+    return solution.cost, trip_indices(solution.car_trips), trip_indices(solution.truck_trips)
+
+
+def solve_exact(instance: Instance, args, stop_condition):
+    result = exact.solve(instance, args.time_limit)
+    return result.cost, trip_indices(result.car_trips), trip_indices(result.truck_trips)
+
+
+ENGINES = {
+    'genetic': solve_genetic,
+    'bees': solve_bees,
+    'exact': solve_exact,
+}
+
+
+def deadline_stop_condition(stop_condition, deadline: float):
+    """stop_condition, który kończy też przebieg po chwili deadline (time.monotonic)"""
+    def _stop_condition(best, fitness, generations_unchanged):
+        return time.monotonic() >= deadline or stop_condition(best, fitness, generations_unchanged)
+    return _stop_condition
+
+
+def run_engine(instance: Instance, engine: str, args, seed, deadline: float = None) -> dict:
+    """Jeden przebieg algorytmu: liczba przedmiotów, koszt, kursy (numery przedmiotów)
+    i odległość od dolnego ograniczenia
+
+    deadline - chwila (time.monotonic), po której genetic i bees kończą przebieg po bieżącym
+    pokoleniu (exact korzysta z args.time_limit)
+    """
+    random.seed(seed)
+    bound = None if args.bound == 'none' else lower_bound(instance, args.bound)
+    stop_condition = bound_stop_condition(bound, args.gap, args.unchanged_gens)
+    if deadline is not None:
+        stop_condition = deadline_stop_condition(stop_condition, deadline)
+    cost, car_trips, truck_trips = ENGINES[engine](instance, args, stop_condition)
+    result = {'items': len(instance), 'cost': cost, 'car_trips': car_trips, 'truck_trips': truck_trips}
+    if bound is not None:
+        result.update(bound=bound, gap=gap(cost, bound))
+    return result
+
+
+def error_record(task: dict, error: BaseException) -> dict:
+    return {'id': task['id'], 'path': task['path'], 'engine': task['engine'],
+            'error': f'{type(error).__name__}: {error}'}
+
+
+def solve(task: dict, args) -> dict:
+    """Jeden przebieg w procesie puli; błąd jest zwracany w wyniku zamiast przerywać całość"""
+    start = time.perf_counter()
+    result = {'id': task['id'], 'path': task['path'], 'engine': task['engine']}
+    try:
+        # paski postępu i wydruki algorytmów wielu procesów byłyby nieczytelne
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull), redirect_stderr(devnull):
+            instance = (Instance.load(task['path']) if args.no_cache
+                        else load_cached(task['path'], args.cache_dir))
+            # wynik instancji nie zależy od kolejności ani procesu, w którym jest liczona
+            result.update(run_engine(instance, task['engine'], args,
+                                     f'{args.seed}:{task["id"]}:{task["engine"]}'))
+    except (Exception, SystemExit) as e:
+        # SystemExit zgłaszają m.in. operatory genetyczne po wykryciu błędnego chromosomu
+        result.update(error_record(task, e))
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def run_batch(tasks: List[dict], args, workers: int = None) -> Iterator[dict]:
+    """Wyniki zadań w kolejności ich zakończenia
+
+    Do puli trafia naraz najwyżej dwa razy tyle zadań, ile jest procesów, więc liczba
+    oczekujących wyników nie rośnie z liczbą instancji. Każde zadanie daje wynik: wyjątek,
+    którego nie obsłużyło solve, trafia do pola error.
+
+    Jeśli proces puli zginie (BrokenProcessPool), pula jest tworzona od nowa, a przerwane
+    zadania są powtarzane pojedynczo; zadanie, które zabije proces także wtedy,
+    dostaje wynik z błędem.
+    """
+    workers = workers or os.cpu_count()
+    pending = deque(schedule(tasks))
+    # zadania przerwane razem z zepsutą pulą, powtarzane po jednym
+    suspects = deque()
+    running = {}
+    alone = None
+    executor = ProcessPoolExecutor(workers, mp_context=mp_context())
+    try:
+        while pending or suspects or running:
+            broken = False
+            try:
+                # zadanie opuszcza kolejkę dopiero po udanym submit
+                if suspects:
+                    if not running:
+                        alone = executor.submit(solve, suspects[0], args)
+                        running[alone] = suspects.popleft()
+                else:
+                    while pending and len(running) < 2 * workers:
+                        future = executor.submit(solve, pending[0], args)
+                        running[future] = pending.popleft()
+            except BrokenProcessPool:
+                broken = True
+            results = []
+            if running and not broken:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    try:
+                        results.append(future.result())
+                    except BrokenProcessPool as e:
+                        broken = True
+                        if future is alone:
+                            results.append(error_record(task, e))
+                        else:
+                            suspects.append(task)
+                    except BaseException as e:
+                        results.append(error_record(task, e))
+            if broken:
+                suspects.extend(running.values())
+                running.clear()
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = ProcessPoolExecutor(workers, mp_context=mp_context())
+            if alone is not None and alone not in running:
+                alone = None
+            yield from results
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def main():
+    parser = ArgumentParser(description='Rozwiązywanie wielu instancji problemu w puli procesów')
+    parser.add_argument(
+        'source',
+        help='Katalog z plikami instancji (.json, .bin) albo plik JSON Lines z polami path, '
+             'id i engine'
+    )
+    parser.add_argument(
+        '-o', '--output',
+        help='Plik JSON Lines na wyniki (domyślnie standardowe wyjście)'
+    )
+    parser.add_argument(
+        '-e', '--engine', choices=('genetic', 'bees', 'both', 'exact'), default='genetic',
+        help='Algorytm dla instancji, które nie podają go w pliku JSON Lines (domyślnie genetic)'
+    )
+    parser.add_argument(
+        '--time-limit', type=float, default=60.0,
+        help='Limit czasu w sekundach dla algorytmu exact (domyślnie 60)'
+    )
+    parser.add_argument(
+        '-w', dest='workers', type=int, default=None,
+        help='Liczba procesów (domyślnie liczba procesorów)'
+    )
+    parser.add_argument(
+        '-n', dest='gens', type=int, default=1000,
+        help='Ilość pokoleń (iteracji algorytmu pszczelego) dla każdej instancji (domyślnie 1000)'
+    )
+    parser.add_argument(
+        '-u', dest='unchanged_gens', type=int, default=200,
+        help='Ilość pokoleń (iteracji) z rzędu bez poprawy, po których przebieg '
+             'się kończy (domyślnie 200)'
+    )
+    parser.add_argument(
+        '--bound', choices=(*BOUNDS, 'none'), default='none',
+        help='Dolne ograniczenie kosztu, po którego osiągnięciu przebieg się kończy: continuous '
+             'albo integer (domyślnie none - bez ograniczenia, zob. lower_bound.py)'
+    )
+    parser.add_argument(
+        '--gap', type=float, default=0.0,
+        help='Względna odległość od dolnego ograniczenia, przy której można się zatrzymać (domyślnie 0)'
+    )
+    parser.add_argument(
+        '--init', choices=(*HEURISTICS, 'random'), default='random',
+        help='Heurystyka tworząca część rozwiązań startowych: ffd albo bfd (domyślnie random - '
+             'tylko rozwiązania losowe, zob. heuristics.py)'
+    )
+    parser.add_argument(
+        '--init-mix', type=float, default=0.1,
+        help='Udział rozwiązań startowych z heurystyki (domyślnie 0.1)'
+    )
+    parser.add_argument(
+        '-k', dest='pop_size', type=int, default=100,
+        help='Rozmiar populacji algorytmu genetycznego (domyślnie 100)'
+    )
+    parser.add_argument(
+        '-s', dest='scouts', type=int, default=100,
+        help='Liczba zwiadowców algorytmu pszczelego (domyślnie 100)'
+    )
+    parser.add_argument(
+        '--seed', type=int, default=0,
+        help='Ziarno; każda instancja dostaje własne, wyznaczone z niego i jej id (domyślnie 0)'
+    )
+    parser.add_argument(
+        '--cache-dir', default=DEFAULT_CACHE_DIR,
+        help=f'Katalog na sparsowane instancje JSON (domyślnie {DEFAULT_CACHE_DIR})'
+    )
+    parser.add_argument(
+        '--no-cache', action='store_true',
+        help='Parsuje pliki JSON bez zapisywania i odczytu katalogu --cache-dir'
+    )
+    args = parser.parse_args()
+
+    if args.init == 'random':
+        args.init = None
+    tasks = discover(args.source, args.engine)
+    fout = open(args.output, 'w') if args.output else sys.stdout
+    failed = 0
+    start = time.perf_counter()
+    try:
+        for result in run_batch(tasks, args, args.workers):
+            failed += 'error' in result
+            fout.write(json.dumps(result) + '\n')
+            fout.flush()
+    finally:
+        if fout is not sys.stdout:
+            fout.close()
+    print(f'{len(tasks)} runs, {failed} failed, {time.perf_counter() - start:.1f} s', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+import unittest
+from argparse import Namespace
+from unittest import mock
+from batch import ENGINES, discover, run_batch, schedule
+
+TEST_DATA = os.path.join(os.path.dirname(__file__), 'test_data')
+
+
+def kill_worker(instance, args, stop_condition):
+    os._exit(1)
+
+
+def exit_run(instance, args, stop_condition):
+    raise SystemExit(1)
+
+
+class BatchTest(unittest.TestCase):
+    def test_discover(self):
+        tasks = discover(TEST_DATA, 'both')
+        self.assertEqual(len(tasks), 2 * len(os.listdir(TEST_DATA)))
+        sizes = [task['size'] for task in schedule(tasks)]
+        self.assertEqual(sizes, sorted(sizes, reverse=True))
+
+    def args(self):
+        return Namespace(gens=5, unchanged_gens=5, pop_size=10, scouts=8, seed=0, no_cache=True,
+                         cache_dir=None, bound='integer', gap=0.0, init='bfd',
+                         init_mix=0.5)
+
+    def test_run_batch(self):
+        args = self.args()
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = os.path.join(tmp, 'manifest.jsonl')
+            with open(manifest, 'w') as fout:
+                for name, engine in (('simple.json', 'genetic'), ('medium.json', 'bees'),
+                                     ('missing.json', 'genetic')):
+                    fout.write(json.dumps({'path': os.path.join(TEST_DATA, name), 'id': name,
+                                           'engine': engine}) + '\n')
+            results = {r['id']: r for r in run_batch(discover(manifest), args, workers=2)}
+        self.assertEqual(sorted(results), ['medium.json', 'missing.json', 'simple.json'])
+        self.assertIn('error', results['missing.json'])
+        for name, n_items in (('simple.json', 15), ('medium.json', 52)):
+            result = results[name]
+            trips = result['car_trips'] + result['truck_trips']
+            self.assertEqual(sorted(i for trip in trips for i in trip), list(range(n_items)))
+            self.assertGreaterEqual(result['cost'], result['bound'])
+
+    def test_failing_tasks(self):
+        path = os.path.join(TEST_DATA, 'simple.json')
+        tasks = [{'id': engine, 'path': path, 'engine': engine, 'size': 0}
+                 for engine in ('genetic', 'kill', 'exit', 'bees')]
+        # procesy puli (fork) dziedziczą podmienione ENGINES
+        with mock.patch.dict(ENGINES, kill=kill_worker, exit=exit_run):
+            results = {r['id']: r for r in run_batch(tasks, self.args(), workers=2)}
+        self.assertEqual(sorted(results), ['bees', 'exit', 'genetic', 'kill'])
+        self.assertTrue(results['kill']['error'].startswith('BrokenProcessPool'))
+        self.assertTrue(results['exit']['error'].startswith('SystemExit'))
+        # zadania przerwane razem z zabitym procesem zostały powtórzone
+        for engine in ('genetic', 'bees'):
+            self.assertNotIn('error', results[engine])
+
+
+if __name__ == '__main__':
+    unittest.main()
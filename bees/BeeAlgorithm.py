@@ -1,11 +1,20 @@
+from contextlib import nullcontext
+from typing import Sequence
+from assignment import Assignment
 from bees.bees import Scout, FlowerPatch
+from bees.foraging import ForagingPool
 from bees.ProblemParameters import ProblemParameters
+from bees.Solution import Solution
+from metrics import StageTimer, distinct_share, stage
 from tqdm import trange
 import random
+import time
 
 
 class BeeAlgorithm:
-    def __init__(self, ns, nb, ne, nre, nrb, rn, fpf: callable, sf: callable, pp: ProblemParameters):
+    def __init__(self, ns, nb, ne, nre, nrb, rn, fpf: callable, sf: callable, pp: ProblemParameters,
+                 workers: int = None, chunk_size: int = None, callbacks: Sequence[callable] = (),
+                 stop_condition: callable = None):
         """
         Keyword arguments:
             ns - number of scouts
@@ -17,6 +26,13 @@ class BeeAlgorithm:
             fpf - function that determines size of the flower patch based on the scouts solution fitness
             sf - function that returns random solution
             pp - problem parameters (car/truck load, car/truck cost)
+            workers - number of processes exploring patches and generating scouts (None - current process only);
+                with workers the result for a fixed seed does not depend on their number
+            chunk_size - number of patches or scouts sent to a worker at once
+            callbacks - functions called after every iteration with a dict of its metrics
+                (see metrics.py); stage timings are only measured when there are callbacks
+            stop_condition - called after every iteration with the best scout's solution, its fitness
+                and the number of iterations in a row without improvement; True ends the run
         """
         self.ns = ns
         self.nb = nb
@@ -27,67 +43,162 @@ class BeeAlgorithm:
         self.fpf = fpf
         self.sf = sf
         self.pp = pp
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.callbacks = list(callbacks)
+        self.timer = StageTimer() if self.callbacks else None
+        self.stop_condition = stop_condition
+        self.iteration = 0
+        self.best_fitness = None
+        self.iterations_unchanged = 0  # number of iterations in a row without improvement
         self.scouts = []
         self.flower_patches = []
 
-    def run(self, n):
+    def foraging_pool(self):
+        if self.workers is None:
+            return nullcontext()
+        return ForagingPool(self.workers, self.fpf, self.sf, self.chunk_size)
+
+    def state(self) -> dict:
+        """State needed to resume the run (see checkpoint.py); sampled neighbours are not kept"""
+        return {
+            'iteration': self.iteration,
+            'scouts': [scout.solution.to_assignment().encode() for scout in self.scouts],
+            'patch_sizes': [patch.size for patch in self.flower_patches],
+            'best_fitness': self.best_fitness,
+            'iterations_unchanged': self.iterations_unchanged,
+            'random': random.getstate(),
+        }
+
+    def restore(self, state: dict, items):
+        """Inverse of state; items[i] must be the item with index i"""
+        if len(state['scouts']) != self.ns:
+            raise ValueError(f"Saved state has {len(state['scouts'])} scouts, the algorithm has {self.ns}")
+        self.scouts = [Scout(Solution.from_assignment(
+                           Assignment.decode(code, items, self.pp.args, vehicle_by_load=False), self.pp), i)
+                       for i, code in enumerate(state['scouts'])]
+        self.flower_patches = [FlowerPatch(scout, self.fpf) for scout in self.scouts]
+        for patch, size in zip(self.flower_patches, state['patch_sizes']):
+            patch.size = size
+        self.iteration = state['iteration']
+        self.best_fitness = state['best_fitness']
+        self.iterations_unchanged = state['iterations_unchanged']
+        random.setstate(state['random'])
+
+    def run(self, n, checkpoint=None):
         """
         Keyword arguments:
-            n - number of times the algorithm is executed
+            n - number of times the algorithm is executed; after restore the run continues up to n iterations in total
+            checkpoint - checkpoint.Checkpoint the state is periodically saved to
         """
-        print("Initialization of scouts and flower patches")
-        for i in trange(self.ns):
-            self.scouts.append(Scout(self.sf(), i))
-            self.flower_patches.append(FlowerPatch(self.scouts[i], self.fpf))
-
-        print("Running main loop")
-        for _ in trange(n):
-            # print(max(self.scouts, key=lambda s : s.fitness).fitness)
-            found_better = self.local_search()
-            self.neighbourhood_shrinking(found_better)
-            self.global_search()
+        try:
+            with self.foraging_pool() as pool:
+                if not self.scouts:
+                    print("Initialization of scouts and flower patches")
+                    if pool is None:
+                        for i in trange(self.ns):
+                            self.scouts.append(Scout(self.sf(), i))
+                            self.flower_patches.append(FlowerPatch(self.scouts[i], self.fpf))
+                    else:
+                        seeds = [random.getrandbits(64) for _ in range(self.ns)]
+                        self.flower_patches = pool.new_scouts(range(self.ns), seeds, with_patches=True)
+                        self.scouts = [fp.scout for fp in self.flower_patches]
+
+                print("Running main loop")
+                for _ in trange(self.iteration, n):
+                    best = self.step(pool)
+                    if checkpoint is not None:
+                        checkpoint.update(self.iteration, self.state)
+                    if self.stop_condition is not None and \
+                            self.stop_condition(best.solution, best.fitness, self.iterations_unchanged):
+                        break
+            if checkpoint is not None:
+                checkpoint.save(self.state())
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
 
         return max(self.scouts, key=lambda s: s.fitness).solution
 
-    def local_search(self):
+    def step(self, pool: ForagingPool = None) -> Scout:
+        """One iteration of the main loop, returns the best scout"""
+        start = time.perf_counter()
+        with stage(self.timer, 'local_search'):
+            found_better = self.local_search(pool)
+        with stage(self.timer, 'shrinking'):
+            self.neighbourhood_shrinking(found_better)
+        with stage(self.timer, 'global_search'):
+            self.global_search(pool)
+        self.iteration += 1
+        best = max(self.scouts, key=lambda s: s.fitness)
+        if self.best_fitness is not None and best.fitness <= self.best_fitness:
+            self.iterations_unchanged += 1
+        else:
+            self.best_fitness = best.fitness
+            self.iterations_unchanged = 0
+        if self.callbacks:
+            self.report(time.perf_counter() - start)
+        return best
+
+    def report(self, seconds):
+        """Passes metrics of the iteration that just finished to all callbacks
+
+        Evaluations are the foragers sent to patches plus the new random scouts.
+        """
+        fitness = [scout.fitness for scout in self.scouts]
+        evaluations = self.ne * self.nre + (self.nb - self.ne) * self.nrb + self.ns - self.nb
+        record = {
+            'engine': 'bees',
+            'generation': self.iteration,
+            'seconds': seconds,
+            'stages': self.timer.pop(),
+            'evaluations': evaluations,
+            'evals_per_sec': evaluations / seconds if seconds > 0 else None,
+            'best_fitness': max(fitness),
+            'mean_fitness': sum(fitness) / len(fitness),
+            'diversity': distinct_share(fitness),
+        }
+        for callback in self.callbacks:
+            callback(record)
+
+    def local_search(self, pool: ForagingPool = None):
         found_better = [False] * self.ns
         ss = sorted(self.scouts, key=lambda s: s.fitness, reverse=True)
-        for scout in ss[:self.ne]:
-            mf = scout.fitness
-            better_sol = None
-            for _ in range(self.nre):
-                sol = random.choice(self.flower_patches[scout.i].solutions)
-                if sol.fitness > mf:
-                    found_better[scout.i] = True
-                    mf = sol.fitness
-                    better_sol = sol
-            if better_sol is not None:
-                new_scout = Scout(better_sol, scout.i)
-                self.flower_patches[scout.i] = FlowerPatch(new_scout, self.fpf)
-                self.scouts[scout.i] = new_scout
-
-        for scout in ss[self.ne:self.nb]:
-            mf = scout.fitness
-            better_sol = None
-            for _ in range(self.nrb):
-                sol = random.choice(self.flower_patches[scout.i].solutions)
-                if sol.fitness > mf:
-                    found_better[scout.i] = True
-                    mf = sol.fitness
-                    better_sol = sol
-            if better_sol is not None:
-                new_scout = Scout(better_sol, scout.i)
-                self.flower_patches[scout.i] = FlowerPatch(new_scout, self.fpf)
-                self.scouts[scout.i] = new_scout
+        foragers = [(scout, self.nre) for scout in ss[:self.ne]] + \
+                   [(scout, self.nrb) for scout in ss[self.ne:self.nb]]
+
+        if pool is None:
+            new_patches = []
+            for scout, recruits in foragers:
+                better_sol = self.flower_patches[scout.i].explore(recruits)
+                new_patches.append(None if better_sol is None
+                                   else FlowerPatch(Scout(better_sol, scout.i), self.fpf))
+        else:
+            new_patches = pool.forage([self.flower_patches[scout.i] for scout, _ in foragers],
+                                      [recruits for _, recruits in foragers],
+                                      [random.getrandbits(64) for _ in foragers])
+
+        for (scout, _), patch in zip(foragers, new_patches):
+            if patch is not None:
+                found_better[scout.i] = True
+                self.flower_patches[scout.i] = patch
+                self.scouts[scout.i] = patch.scout
         return found_better
 
     def neighbourhood_shrinking(self, found_better):
         for i, b in enumerate(found_better):
             if not b:
-                if len(self.flower_patches[i].solutions) > self.rn:
-                    self.flower_patches[i].solutions = self.flower_patches[i].solutions[:-self.rn]
+                self.flower_patches[i].shrink(self.rn)
 
-    def global_search(self):
+    def global_search(self, pool: ForagingPool = None):
         ss = sorted(self.scouts, key=lambda s: s.fitness, reverse=True)
-        for scout in ss[self.nb:]:
-            self.scouts[scout.i] = Scout(self.sf(), scout.i)
+        if pool is None:
+            for scout in ss[self.nb:]:
+                self.scouts[scout.i] = Scout(self.sf(), scout.i)
+                self.flower_patches[scout.i] = FlowerPatch(self.scouts[scout.i], self.fpf)
+        else:
+            indices = [scout.i for scout in ss[self.nb:]]
+            seeds = [random.getrandbits(64) for _ in indices]
+            for patch in pool.new_scouts(indices, seeds, with_patches=True):
+                self.scouts[patch.scout.i] = patch.scout
+                self.flower_patches[patch.scout.i] = patch
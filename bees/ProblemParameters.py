@@ -4,3 +4,8 @@ class ProblemParameters:
         self.car_load = car_load
         self.truck_cost = truck_cost
         self.car_cost = car_cost
+
+    @property
+    def args(self):
+        """Parameters in the order used by genetic.genes and Assignment"""
+        return self.truck_load, self.car_load, self.truck_cost, self.car_cost
@@ -1,15 +1,40 @@
 from bees.ProblemParameters import ProblemParameters
+from assignment import Assignment
 
 
 class Solution:
     def __init__(self, car_trips: list, truck_trips: list, pp: ProblemParameters):
+        self.pp = pp
         self.car_trips = car_trips
         self.truck_trips = truck_trips
-        self.pp = pp
+
+    # the cost is cached until a trip list is replaced; trip lists must not be changed in place
+    @property
+    def car_trips(self) -> list:
+        return self._car_trips
+
+    @car_trips.setter
+    def car_trips(self, car_trips: list):
+        self._car_trips = car_trips
+        self._cost = None
+
+    @property
+    def truck_trips(self) -> list:
+        return self._truck_trips
+
+    @truck_trips.setter
+    def truck_trips(self, truck_trips: list):
+        self._truck_trips = truck_trips
+        self._cost = None
 
     @property
     def cost(self):
-        return len(self.car_trips) * self.pp.car_cost + len(self.truck_trips) * self.pp.truck_cost
+        """Empty trips are not driven, so they cost nothing (same as an empty Gene)"""
+        if self._cost is None:
+            car_trips = sum(1 for ct in self.car_trips if ct)
+            truck_trips = sum(1 for tt in self.truck_trips if tt)
+            self._cost = car_trips * self.pp.car_cost + truck_trips * self.pp.truck_cost
+        return self._cost
 
     @property
     def fitness(self):
@@ -32,6 +57,24 @@ class Solution:
                 return False
         return True
 
+    def to_assignment(self, items=None) -> Assignment:
+        """Array-backed copy of this solution, trips keep their vehicle type and the order
+        of their items (items must be indexed)"""
+        trips = self.car_trips + self.truck_trips
+        truck = [False] * len(self.car_trips) + [True] * len(self.truck_trips)
+        return Assignment.from_partition(trips, self.pp.args, truck=truck, items=items,
+                                         keep_order=True)
+
+    @staticmethod
+    def from_assignment(assignment: Assignment, pp: ProblemParameters = None):
+        if pp is None:
+            pp = ProblemParameters(*assignment.args)
+        car_trips = []
+        truck_trips = []
+        for trip, truck in zip(assignment.trips(), assignment.trip_truck):
+            (truck_trips if truck else car_trips).append(trip)
+        return Solution(car_trips, truck_trips, pp)
+
     def __str__(self):
         return f"Fitness: {self.fitness}\n" \
                f"Car trips: {self.car_trips}\n" \
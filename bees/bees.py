@@ -1,4 +1,6 @@
 from bees.Solution import Solution
+from capacity_index import FirstFitTree
+from assignment import move_delta
 import random
 
 
@@ -7,13 +9,75 @@ class Scout:
         self.solution = solution
         self.i = i
 
+    @property
+    def solution(self) -> Solution:
+        return self._solution
+
+    @solution.setter
+    def solution(self, solution: Solution):
+        self._solution = solution
+        self._fitness = None
+
     @property
     def cost(self):
-        return self.solution.cost
+        return -self.fitness
 
     @property
     def fitness(self):
-        return self.solution.fitness
+        """Fitness of the solution, cached until the solution is replaced"""
+        if self._fitness is None:
+            self._fitness = self.solution.fitness
+        return self._fitness
+
+
+class _TripLoads:
+    """Loads of one vehicle's trips of a neighbour, on top of the patch's shared state
+
+    Loads of the scout's trips are computed once per patch and free space of every
+    trip lives in the patch's FirstFitTree; restore() brings the tree back to the
+    scout's state, so the next neighbour can reuse it.
+    """
+
+    def __init__(self, loads: list, tree: FirstFitTree, capacity):
+        self.base_loads = loads
+        self.loads = {}
+        self.tree = tree
+        self.capacity = capacity
+        # the tree only narrows the search, fits are checked exactly like `load + weight <= capacity`
+        self.tolerance = 1e-9 * max(capacity, 1)
+        self.n = len(loads)
+        self.saved = {}
+
+    def load(self, k):
+        return self.loads[k] if k in self.loads else self.base_loads[k]
+
+    def _set_load(self, k, load):
+        if k < self.n and k not in self.saved:
+            self.saved[k] = self.tree[k]
+        self.loads[k] = load
+        self.tree.update(k, self.capacity - load)
+
+    def remove(self, k, item):
+        self._set_load(k, self.load(k) - item.weight)
+
+    def place(self, weight) -> int:
+        """Number of the first trip the weight fits in or -1"""
+        k = self.tree.first_fit(weight - self.tolerance)
+        while k >= 0 and self.load(k) + weight > self.capacity:
+            k = self.tree.first_fit(weight - self.tolerance, k + 1)
+        if k >= 0:
+            self._set_load(k, self.load(k) + weight)
+        return k
+
+    def new_trip(self, weight) -> int:
+        k = self.tree.append(self.capacity - weight)
+        self.loads[k] = weight
+        return k
+
+    def restore(self):
+        self.tree.truncate(self.n)
+        for k, residual in self.saved.items():
+            self.tree.update(k, residual)
 
 
 class FlowerPatch:
@@ -23,50 +87,140 @@ class FlowerPatch:
             scout - bee scout which solution will used to creating this flower patch
             fpf - function that determines size of the flower patch based on the scouts solution fitness
             mp - mutation probability mutation removes one item from a trip and later adds that item to random trip
+
+        The patch is lazy: it only keeps its size. A neighbour is generated the first
+        time it is sampled and stored as a list of moves (item, from trip, to trip)
+        relative to the scout's solution, where a trip is (is_truck, number) and
+        numbers past the scout's trips denote new trips. It is turned into
+        a Solution only when it is better than the scout's one.
         """
         self.scout = scout
         self.mp = mp
-        self.solutions = [self.get_solution() for _ in range(fpf(self.scout.fitness))]
-
-    def get_solution(self):
-        """with the probability of mp removes item from a trip and then adds it to the other trip"""
-        items_to_add = []
-        car_trips = []
-        truck_trips = []
-
-        for ct in self.scout.solution.car_trips:
-            car_trips.append(ct.copy())
-            if random.random() < self.mp:
-                if ct == []:
-                    continue
-                removed_item = random.choice(ct)
-                car_trips[-1].remove(removed_item)
-                items_to_add.append(removed_item)
-
-        for tt in self.scout.solution.truck_trips:
-            truck_trips.append(tt.copy())
-            if random.random() < self.mp:
-                if tt == []:
-                    continue
-                removed_item = random.choice(tt)
-                truck_trips[-1].remove(removed_item)
-                items_to_add.append(removed_item)
-
-        random.shuffle(items_to_add)
-        for item in items_to_add:
-            item_added = False
-            for ct in car_trips:
-                if sum(i.weight for i in ct) + item.weight <= self.scout.solution.pp.car_load:
-                    ct.append(item)
-                    item_added = True
-                    break
-            if item_added:
+        self.size = fpf(self.scout.fitness)
+        self.moves = {}
+        pp = scout.solution.pp
+        # loads and free space of the scout's trips, kept between neighbours
+        self.car_loads = [sum(i.weight for i in ct) for ct in scout.solution.car_trips]
+        self.truck_loads = [sum(i.weight for i in tt) for tt in scout.solution.truck_trips]
+        self.car_tree = FirstFitTree(pp.car_load - load for load in self.car_loads)
+        self.truck_tree = FirstFitTree(pp.truck_load - load for load in self.truck_loads)
+
+    def __len__(self):
+        return self.size
+
+    def neighbour(self, k: int, rng=random) -> list:
+        """Moves of the k-th neighbour, generated on first use"""
+        if k not in self.moves:
+            self.moves[k] = self.get_moves(rng)
+        return self.moves[k]
+
+    def shrink(self, rn: int):
+        """Drops the last rn neighbours unless that would empty the patch"""
+        if self.size > rn:
+            self.size -= rn
+            self.moves = {k: m for k, m in self.moves.items() if k < self.size}
+
+    def explore(self, recruits: int, rng=random):
+        """Sends `recruits` foragers to random neighbours of the patch,
+        returns the best solution better than the scout's one or None"""
+        if self.size <= 0:
+            return None
+        mf = self.scout.fitness
+        better_moves = None
+        for _ in range(recruits):
+            moves = self.neighbour(rng.randrange(self.size), rng)
+            fitness = self.scout.fitness - self.cost_change(moves)
+            if fitness > mf:
+                mf = fitness
+                better_moves = moves
+        return None if better_moves is None else self.materialise(better_moves)
+
+    def cost_change(self, moves: list):
+        """Cost of the neighbour minus cost of the scout's solution, from cached trip loads"""
+        solution = self.scout.solution
+        trips = {}
+
+        def trip(truck, k):
+            if (truck, k) not in trips:
+                vehicle_trips, loads = ((solution.truck_trips, self.truck_loads) if truck
+                                        else (solution.car_trips, self.car_loads))
+                trips[truck, k] = (loads[k], len(vehicle_trips[k]), truck) if k < len(loads) \
+                    else (0, 0, truck)
+            return trips[truck, k]
+
+        change = 0
+        for item, source, target in moves:
+            if source == target:
+                continue
+            source_trip, target_trip = trip(*source), trip(*target)
+            change += move_delta(item.weight, source_trip, target_trip, solution.pp.args,
+                                 vehicle_by_load=False)
+            trips[source] = (source_trip[0] - item.weight, source_trip[1] - 1, source_trip[2])
+            trips[target] = (target_trip[0] + item.weight, target_trip[1] + 1, target_trip[2])
+        return change
+
+    def materialise(self, moves: list) -> Solution:
+        """Builds the neighbour; unchanged trips are shared with the scout's solution"""
+        solution = self.scout.solution
+        trips = (list(solution.car_trips), list(solution.truck_trips))
+        copied = set()
+
+        def own(truck, k):
+            vehicle_trips = trips[truck]
+            while len(vehicle_trips) <= k:
+                vehicle_trips.append([])
+                copied.add((truck, len(vehicle_trips) - 1))
+            if (truck, k) not in copied:
+                vehicle_trips[k] = vehicle_trips[k].copy()
+                copied.add((truck, k))
+            return vehicle_trips[k]
+
+        for item, (truck, k), _ in moves:
+            own(truck, k).remove(item)
+        for item, _, (truck, k) in moves:
+            own(truck, k).append(item)
+        return Solution(trips[False], trips[True], solution.pp)
+
+    def get_moves(self, rng=random) -> list:
+        """with the probability of mp removes item from a trip and then adds it to the other trip
+
+        Returns the moves only; the first trip with enough space is found in O(log trips).
+        """
+        solution = self.scout.solution
+        car_loads = _TripLoads(self.car_loads, self.car_tree, solution.pp.car_load)
+        truck_loads = _TripLoads(self.truck_loads, self.truck_tree, solution.pp.truck_load)
+        removed = []
+
+        for truck, loads, source in ((False, car_loads, solution.car_trips),
+                                     (True, truck_loads, solution.truck_trips)):
+            for k, trip in enumerate(source):
+                if rng.random() < self.mp:
+                    if trip == []:
+                        continue
+                    removed_item = rng.choice(trip)
+                    loads.remove(k, removed_item)
+                    removed.append((removed_item, (truck, k)))
+
+        rng.shuffle(removed)
+        moves = []
+        for item, source in removed:
+            k = car_loads.place(item.weight)
+            if k >= 0:
+                moves.append((item, source, (False, k)))
                 continue
-            for tt in truck_trips:
-                if sum(i.weight for i in tt) + item.weight <= self.scout.solution.pp.truck_load:
-                    tt.append(item)
-                    item_added = True
-                    break
-            if not item_added:
-                car_trips.append([item])
-        return Solution(car_trips, truck_trips, self.scout.solution.pp)
+            k = truck_loads.place(item.weight)
+            if k >= 0:
+                moves.append((item, source, (True, k)))
+            # an item too heavy for a car can only start a new truck trip
+            elif item.weight > solution.pp.car_load:
+                moves.append((item, source, (True, truck_loads.new_trip(item.weight))))
+            else:
+                moves.append((item, source, (False, car_loads.new_trip(item.weight))))
+
+        car_loads.restore()
+        truck_loads.restore()
+        return moves
+
+    def get_solution(self, rng=random) -> Solution:
+        """A new random neighbour of the scout's solution"""
+        return self.materialise(self.get_moves(rng))
@@ -0,0 +1,80 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+from bees.bees import Scout, FlowerPatch
+from util import mp_context
+
+_fpf = None
+_sf = None
+
+
+def _init_worker(fpf, sf):
+    global _fpf, _sf
+    _fpf = fpf
+    _sf = sf
+
+
+def _forage(patch: FlowerPatch, recruits: int, seed: int) -> Tuple[Optional[FlowerPatch], dict]:
+    better_sol = patch.explore(recruits, random.Random(seed))
+    if better_sol is None:
+        return None, patch.moves
+    return FlowerPatch(Scout(better_sol, patch.scout.i), _fpf), {}
+
+
+def _new_scouts(tasks, with_patches: bool):
+    ret = []
+    for i, seed in tasks:
+        # sf draws from the global generator, which belongs to this worker only
+        random.seed(seed)
+        scout = Scout(_sf(), i)
+        ret.append(FlowerPatch(scout, _fpf) if with_patches else scout)
+    return ret
+
+
+class ForagingPool:
+    """Process pool exploring flower patches and generating random scouts
+
+    Every task gets its own seed drawn by the caller, and results are returned
+    in task order, so the outcome does not depend on the number of workers.
+    """
+
+    def __init__(self, workers: int, fpf: callable, sf: callable, chunk_size: int = None):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.executor = ProcessPoolExecutor(
+            workers, mp_context=mp_context(), initializer=_init_worker, initargs=(fpf, sf))
+
+    def _chunk_size(self, n):
+        return self.chunk_size or max(1, -(-n // (self.workers * 4)))
+
+    def forage(self, patches: Sequence[FlowerPatch], recruits: Sequence[int],
+               seeds: Sequence[int]) -> List[Optional[FlowerPatch]]:
+        """For every patch returns the patch of its improved scout, or None if no better solution was found
+
+        Neighbours generated by a worker in a patch that did not improve are stored back in that patch.
+        """
+        ret = []
+        results = self.executor.map(_forage, patches, recruits, seeds,
+                                    chunksize=self._chunk_size(len(patches)))
+        for patch, (new_patch, moves) in zip(patches, results):
+            if new_patch is None:
+                patch.moves = moves
+            ret.append(new_patch)
+        return ret
+
+    def new_scouts(self, indices: Sequence[int], seeds: Sequence[int], with_patches=False) -> list:
+        """Random scouts (or their flower patches) for the given scout indices"""
+        tasks = list(zip(indices, seeds))
+        size = self._chunk_size(len(tasks))
+        futures = [self.executor.submit(_new_scouts, tasks[start:start + size], with_patches)
+                   for start in range(0, len(tasks), size)]
+        return [x for future in futures for x in future.result()]
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
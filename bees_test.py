@@ -0,0 +1,159 @@
+import os
+import random
+import unittest
+from bees.BeeAlgorithm import BeeAlgorithm
+from bees.ProblemParameters import ProblemParameters
+from bees.Solution import Solution
+from bees.bees import FlowerPatch, Scout
+from Item import Item
+from instance import Instance
+from main import bee_fpf, get_bee_sf, get_pp
+from rand_solution_generator import rand_solution
+
+
+class FlowerPatchTest(unittest.TestCase):
+    def setUp(self):
+        items, *args = Item.from_json(os.path.join(os.path.dirname(__file__), 'test_data', 'ex.json'))
+        self.items = items
+        self.pp = ProblemParameters(*args)
+        random.seed(3)
+        car_trips, truck_trips = rand_solution(items, self.pp.car_load, self.pp.truck_load)
+        self.scout = Scout(Solution(car_trips, truck_trips, self.pp), 0)
+        self.patch = FlowerPatch(self.scout, lambda fitness: 20, mp=0.5)
+
+    def assertFeasible(self, solution: Solution):
+        trips = solution.car_trips + solution.truck_trips
+        self.assertEqual(sorted(item.index for trip in trips for item in trip),
+                         list(range(len(self.items))))
+        for trip in solution.car_trips:
+            self.assertLessEqual(sum(item.weight for item in trip), self.pp.car_load)
+        for trip in solution.truck_trips:
+            self.assertLessEqual(sum(item.weight for item in trip), self.pp.truck_load)
+
+    def test_cost_change_matches_materialised(self):
+        rng = random.Random(1)
+        for k in range(len(self.patch)):
+            moves = self.patch.neighbour(k, rng)
+            neighbour = self.patch.materialise(moves)
+            self.assertEqual(self.patch.cost_change(moves), neighbour.cost - self.scout.solution.cost)
+
+    def test_neighbours_are_feasible(self):
+        rng = random.Random(2)
+        for k in range(len(self.patch)):
+            self.assertFeasible(self.patch.materialise(self.patch.neighbour(k, rng)))
+
+    def test_materialise_keeps_scout(self):
+        solution = self.scout.solution
+        car_trips = [list(trip) for trip in solution.car_trips]
+        truck_trips = [list(trip) for trip in solution.truck_trips]
+        rng = random.Random(4)
+        for k in range(len(self.patch)):
+            self.patch.materialise(self.patch.neighbour(k, rng))
+        self.assertEqual(solution.car_trips, car_trips)
+        self.assertEqual(solution.truck_trips, truck_trips)
+
+    def test_neighbour_is_cached(self):
+        rng = random.Random(5)
+        moves = self.patch.neighbour(3, rng)
+        self.assertIs(self.patch.neighbour(3, rng), moves)
+
+    def test_shrink(self):
+        rng = random.Random(6)
+        for k in range(len(self.patch)):
+            self.patch.neighbour(k, rng)
+        kept = self.patch.neighbour(4, rng)
+        self.patch.shrink(15)
+        self.assertEqual(len(self.patch), 5)
+        self.assertEqual(sorted(self.patch.moves), list(range(5)))
+        self.assertIs(self.patch.neighbour(4, rng), kept)
+        # shrinking would empty the patch, so it keeps its size
+        self.patch.shrink(5)
+        self.assertEqual(len(self.patch), 5)
+
+
+def linear_scan_neighbour(solution: Solution, mp, rng) -> Solution:
+    """Neighbour built by scanning all trips for the first one with enough space,
+    as get_solution did before the trip loads were cached"""
+    pp = solution.pp
+    car_trips = [list(trip) for trip in solution.car_trips]
+    truck_trips = [list(trip) for trip in solution.truck_trips]
+    removed = []
+    for trips in (car_trips, truck_trips):
+        for trip in trips:
+            if rng.random() < mp and trip:
+                item = rng.choice(trip)
+                trip.remove(item)
+                removed.append(item)
+    rng.shuffle(removed)
+    for item in removed:
+        for trips, load in ((car_trips, pp.car_load), (truck_trips, pp.truck_load)):
+            trip = next((t for t in trips if sum(i.weight for i in t) + item.weight <= load), None)
+            if trip is not None:
+                trip.append(item)
+                break
+        else:
+            (truck_trips if item.weight > pp.car_load else car_trips).append([item])
+    return Solution(car_trips, truck_trips, pp)
+
+
+class FirstFitRng:
+    """Always removes the first item of a trip and places removed items in reverse order"""
+
+    def random(self):
+        return 0
+
+    def choice(self, seq):
+        return seq[0]
+
+    def shuffle(self, seq):
+        seq.reverse()
+
+
+class GetMovesTest(unittest.TestCase):
+    def test_matches_linear_scan(self):
+        items, *args = Item.from_json(os.path.join(os.path.dirname(__file__), 'test_data', 'ex.json'))
+        pp = ProblemParameters(*args)
+        for seed in range(5):
+            random.seed(seed)
+            scout = Scout(Solution(*rand_solution(items, pp.car_load, pp.truck_load), pp), 0)
+            patch = FlowerPatch(scout, lambda fitness: 10, mp=0.3)
+            for k in range(5):
+                expected = linear_scan_neighbour(scout.solution, patch.mp, random.Random(k))
+                neighbour = patch.get_solution(random.Random(k))
+                self.assertEqual(neighbour.car_trips, expected.car_trips)
+                self.assertEqual(neighbour.truck_trips, expected.truck_trips)
+
+    def test_heavy_item_opens_truck_trip(self):
+        heavy, light = Item(weight=50, name='heavy', index=0), Item(weight=10, name='light', index=1)
+        other, light2 = Item(weight=50, name='other', index=2), Item(weight=10, name='light2', index=3)
+        pp = ProblemParameters(60, 12, 50, 15)
+        scout = Scout(Solution([], [[heavy, light], [light2, other]], pp), 0)
+        moves = FlowerPatch(scout, lambda fitness: 1, mp=1).get_moves(FirstFitRng())
+        # light2 fills the first truck trip, so the heavy item fits nowhere and cannot go by car
+        self.assertEqual(moves, [(light2, (True, 1), (True, 0)), (heavy, (True, 0), (True, 2))])
+
+
+class ForagingPoolTest(unittest.TestCase):
+    def run_bees(self, workers, chunk_size=None):
+        instance = Instance.load(os.path.join(os.path.dirname(__file__), 'test_data', 'ex.json'))
+        random.seed(0)
+        ba = BeeAlgorithm(8, 4, 2, 5, 3, 1, bee_fpf, get_bee_sf(instance), get_pp(instance),
+                          workers=workers, chunk_size=chunk_size)
+        ba.run(4)
+        return ba
+
+    def test_result_does_not_depend_on_workers(self):
+        one = self.run_bees(1)
+        for workers, chunk_size in ((2, 1), (3, None)):
+            other = self.run_bees(workers, chunk_size)
+            for scout, other_scout in zip(one.scouts, other.scouts):
+                self.assertEqual(other_scout.solution.car_trips, scout.solution.car_trips)
+                self.assertEqual(other_scout.solution.truck_trips, scout.solution.truck_trips)
+            for patch, other_patch in zip(one.flower_patches, other.flower_patches):
+                self.assertEqual(other_patch.size, patch.size)
+                # neighbours sampled by the workers are merged back into the same patches
+                self.assertEqual(other_patch.moves, patch.moves)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,217 @@
+"""Pomiary wydajności obu algorytmów i ich operatorów na losowych instancjach rosnącego rozmiaru
+
+    python benchmark.py -o wyniki.json
+    python benchmark.py --compare przed.json po.json
+"""
+import json
+import random
+import subprocess
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from bees.BeeAlgorithm import BeeAlgorithm
+from bees.ProblemParameters import ProblemParameters
+from bees.Solution import Solution
+from bees.bees import Scout, FlowerPatch
+from exact import branch_and_bound
+from genetic.GeneticAlgorithm import GeneticAlgorithm
+from genetic.fitness import population_fitness
+from genetic.ga_selections import best_rank_selection
+from genetic.genes import Chromosome, gene_cache
+from instance_generator import PRESETS, generate
+from main import bee_fpf
+from rand_solution_generator import rand_solution
+
+# 100 000 przedmiotów wymaga podania wprost (-s 100000): jedno pokolenie algorytmu
+# genetycznego tej wielkości trwa bardzo długo
+SIZES = (100, 1000, 10_000)
+def random_chromosome(instance):
+    items, truck_load, car_load, truck_cost, car_cost = instance
+    car_trips, truck_trips = rand_solution(items, car_load, truck_load, random.random())
+    return Chromosome(car_trips + truck_trips, truck_load, car_load, truck_cost, car_cost)
+
+
+def random_solution(instance):
+    items, truck_load, car_load, truck_cost, car_cost = instance
+    car_trips, truck_trips = rand_solution(items, car_load, truck_load)
+    return Solution(car_trips, truck_trips, ProblemParameters(truck_load, car_load, truck_cost, car_cost))
+
+
+# Każdy pomiar dostaje instancję i generator liczb losowych, a zwraca jednostkę,
+# funkcję wykonującą jedną operację (lub jedno pokolenie) i funkcję zwracającą koszt
+# najlepszego rozwiązania (None, jeśli pomiar go nie dotyczy).
+
+def bench_rand_solution(instance, rng):
+    items, truck_load, car_load, *_ = instance
+    return 'ops', lambda: rand_solution(items, car_load, truck_load), None
+
+
+def bench_cross(instance, rng):
+    mother, father = random_chromosome(instance), random_chromosome(instance)
+    return 'ops', lambda: mother.cross(father, rng), None
+
+
+def bench_mutation(instance, rng):
+    chromosome = random_chromosome(instance)
+    return 'ops', lambda: chromosome.mutation(rng), lambda: chromosome.cost
+
+
+def bench_get_solution(instance, rng):
+    patch = FlowerPatch(Scout(random_solution(instance), 0), bee_fpf)
+    return 'ops', lambda: patch.get_solution(rng), None
+
+
+def bench_genetic(instance, rng, pop_size=20):
+    ga = GeneticAlgorithm(lambda: [random_chromosome(instance) for _ in range(pop_size)],
+                          best_rank_selection, lambda *_: False,
+                          fitness_evaluator=population_fitness)
+    ga.start()
+    return 'generations', ga.step, lambda: ga.global_best.cost
+
+
+def bench_bees(instance, rng, ns=20):
+    ba = BeeAlgorithm(ns, ns // 2, ns // 4, 10, 5, 5, bee_fpf, lambda: random_solution(instance),
+                      ProblemParameters(*instance[1:]))
+    ba.scouts = [Scout(ba.sf(), i) for i in range(ns)]
+    ba.flower_patches = [FlowerPatch(scout, ba.fpf) for scout in ba.scouts]
+    return 'generations', ba.step, lambda: min(scout.cost for scout in ba.scouts)
+
+
+def bench_exact(instance, rng, time_limit=1.0):
+    """Koszt dokładny (albo najlepszy po time_limit sekundach) jako odniesienie dla kosztów
+    pozostałych pomiarów"""
+    items, truck_load, car_load, truck_cost, car_cost = instance
+    result = None
+
+    def _solve():
+        nonlocal result
+        result = branch_and_bound(items, car_load, truck_load, car_cost, truck_cost, time_limit)
+
+    return 'solves', _solve, lambda: result.cost
+
+
+BENCHMARKS = {
+    'rand_solution': bench_rand_solution,
+    'cross': bench_cross,
+    'mutation': bench_mutation,
+    'get_solution': bench_get_solution,
+    'genetic': bench_genetic,
+    'bees': bench_bees,
+    'exact': bench_exact,
+}
+# exact dla dużych instancji zawsze wyczerpuje limit czasu, więc trzeba go wybrać wprost (-b exact)
+DEFAULT_BENCHMARKS = [name for name in BENCHMARKS if name != 'exact']
+
+
+def run_benchmark(name, instance, budget, seed):
+    """Przygotowanie i pierwsza operacja są śledzone przez tracemalloc (szczytowe zużycie pamięci),
+    pozostałe operacje są wykonywane bez śledzenia, aż minie `budget` sekund"""
+    random.seed(seed)
+    rng = random.Random(seed)
+    # geny zapamiętane przez poprzednie pomiary zaniżałyby czas i pamięć
+    gene_cache.cache_clear()
+    tracemalloc.start()
+    unit, op, cost = BENCHMARKS[name](instance, rng)
+    op()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    ops = 0
+    start = time.perf_counter()
+    while True:
+        op()
+        ops += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= budget:
+            break
+    return {
+        'benchmark': name,
+        'items': len(instance[0]),
+        'unit': unit,
+        'ops': ops,
+        'seconds': elapsed,
+        'per_sec': ops / elapsed,
+        'peak_memory': peak,
+        'cost': None if cost is None else cost(),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_result(result):
+    cost = '' if result['cost'] is None else f', koszt {result["cost"]}'
+    return (f'{result["benchmark"]:>14} {result["items"]:>7}: '
+            f'{result["per_sec"]:10.2f} {result["unit"]}/s, '
+            f'pamięć {result["peak_memory"] / 2 ** 20:8.1f} MiB{cost}')
+
+
+def compare(old_path, new_path):
+    with open(old_path) as fin:
+        old = {(r['benchmark'], r['items']): r for r in json.load(fin)['results']}
+    with open(new_path) as fin:
+        new = json.load(fin)['results']
+    for result in new:
+        before = old.get((result['benchmark'], result['items']))
+        if before is None:
+            continue
+        print(f'{result["benchmark"]:>14} {result["items"]:>7}: '
+              f'{result["per_sec"] / before["per_sec"]:6.2f}x szybciej, '
+              f'{result["peak_memory"] / max(before["peak_memory"], 1):6.2f}x pamięci, '
+              f'koszt {before["cost"]} -> {result["cost"]}')
+
+
+def main():
+    parser = ArgumentParser(description='Pomiary wydajności algorytmów')
+    parser.add_argument(
+        '-s', '--sizes', type=int, nargs='+', default=list(SIZES),
+        help=f'Liczby przedmiotów w instancjach, np. 100 1000 10000 100000 '
+             f'(domyślnie {" ".join(map(str, SIZES))})'
+    )
+    parser.add_argument(
+        '-b', '--benchmarks', nargs='+', choices=sorted(BENCHMARKS), default=DEFAULT_BENCHMARKS,
+        help='Pomiary do wykonania (domyślnie wszystkie poza exact)'
+    )
+    parser.add_argument(
+        '-t', '--budget', type=float, default=2.0,
+        help='Czas w sekundach przeznaczony na każdy pomiar, nie licząc przygotowania (domyślnie 2)'
+    )
+    parser.add_argument(
+        '--seed', type=int, default=0,
+        help='Ziarno instancji i algorytmów (domyślnie 0)'
+    )
+    parser.add_argument(
+        '-o', '--output',
+        help='Plik JSON, do którego zostaną zapisane wyniki'
+    )
+    parser.add_argument(
+        '--compare', nargs=2, metavar=('PRZED', 'PO'),
+        help='Porównuje dwa pliki z wynikami zamiast wykonywać pomiary'
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = []
+    for n_items in args.sizes:
+        # parametry jak w test_data/ex.json, masy z przedziału [1, 20]
+        instance = generate(n_items, args.seed, **PRESETS['simple']).as_tuple()
+        for name in args.benchmarks:
+            results.append(run_benchmark(name, instance, args.budget, args.seed))
+            print(format_result(results[-1]), flush=True)
+
+    if args.output:
+        with open(args.output, 'w') as fout:
+            json.dump({'revision': git_revision(), 'budget': args.budget, 'seed': args.seed,
+                       'results': results}, fout, indent=2)
+
+
+if __name__ == '__main__':
+    main()
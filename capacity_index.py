@@ -0,0 +1,123 @@
+from typing import Callable, Iterable, Iterator
+from sortedcontainers import SortedKeyList
+
+_EMPTY = float('-inf')
+
+
+class FirstFitTree:
+    """Drzewo przedziałowe (maksimum) nad wolnym miejscem kolejnych kursów
+
+    Odpowiada na pytanie "który jest pierwszy kurs, w którym zmieści się przedmiot"
+    w czasie O(log n); zmiana wolnego miejsca kursu również kosztuje O(log n),
+    a dodanie kursu na końcu - zamortyzowane O(log n).
+    """
+
+    def __init__(self, residuals: Iterable[float] = ()):
+        residuals = list(residuals)
+        size = 1
+        while size < len(residuals):
+            size *= 2
+        self._build(residuals, size)
+
+    def _build(self, residuals, size):
+        self.n = len(residuals)
+        self.size = size
+        self.tree = [_EMPTY] * (2 * self.size)
+        self.tree[self.size:self.size + self.n] = residuals
+        for node in range(self.size - 1, 0, -1):
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i: int) -> float:
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        return self.tree[self.size + i]
+
+    def update(self, i: int, residual: float):
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        node = self.size + i
+        self.tree[node] = residual
+        node //= 2
+        while node:
+            value = max(self.tree[2 * node], self.tree[2 * node + 1])
+            if self.tree[node] == value:
+                break
+            self.tree[node] = value
+            node //= 2
+
+    def append(self, residual: float) -> int:
+        """Dodaje kurs na końcu i zwraca jego numer"""
+        if self.n == self.size:
+            self._build(self.tree[self.size:self.size + self.n], 2 * self.size)
+        self.n += 1
+        self.update(self.n - 1, residual)
+        return self.n - 1
+
+    def truncate(self, n: int):
+        """Usuwa kursy o numerach >= n"""
+        while self.n > n:
+            self.update(self.n - 1, _EMPTY)
+            self.n -= 1
+
+    def first_fit(self, weight: float, start: int = 0) -> int:
+        """Numer pierwszego kursu o numerze >= start z wolnym miejscem >= weight albo -1"""
+        if start == 0:
+            if self.tree[1] < weight:
+                return -1
+            node = 1
+        else:
+            if start >= self.n:
+                return -1
+            node = self.size + start
+            if self.tree[node] >= weight:
+                return start
+            # wspinaczka do pierwszego prawego sąsiada, w którego poddrzewie jest miejsce
+            while node > 1:
+                if node % 2 == 0 and self.tree[node + 1] >= weight:
+                    node += 1
+                    break
+                node //= 2
+            else:
+                return -1
+        while node < self.size:
+            node *= 2
+            if self.tree[node] < weight:
+                node += 1
+        return node - self.size
+
+
+class BestFitIndex:
+    """Kursy posortowane po obciążeniu
+
+    Odpowiada na pytania "który kurs o obciążeniu <= max_load jest najcięższy", czyli
+    najciaśniej pasujący dla przedmiotu o masie capacity - max_load, i "który kurs jest
+    najlżejszy" w czasie O(log n); dodanie i usunięcie kursu również kosztuje O(log n).
+    Kursy o równym obciążeniu są zwracane w kolejności wstawiania.
+    """
+
+    def __init__(self, trips: Iterable = (), load: Callable[[object], float] = None):
+        self.load = load if load is not None else (lambda trip: trip)
+        self.trips = SortedKeyList(trips, key=self.load)
+
+    def __len__(self):
+        return len(self.trips)
+
+    def __iter__(self):
+        return iter(self.trips)
+
+    def add(self, trip):
+        self.trips.add(trip)
+
+    def remove(self, trip):
+        self.trips.remove(trip)
+
+    def tightest(self, max_load: float) -> Iterator:
+        """Kursy o obciążeniu <= max_load od najcięższego"""
+        return self.trips.irange_key(max_key=max_load, reverse=True)
+
+    def lightest(self) -> Iterator:
+        """Wszystkie kursy od najlżejszego"""
+        return iter(self.trips)
@@ -0,0 +1,50 @@
+import random
+import unittest
+from capacity_index import BestFitIndex, FirstFitTree
+
+
+class FirstFitTreeTest(unittest.TestCase):
+    def test_matches_linear_scan(self):
+        rng = random.Random(0)
+        residuals = [rng.uniform(0, 10) for _ in range(13)]
+        tree = FirstFitTree(residuals)
+        for _ in range(500):
+            if rng.random() < 0.3:
+                i = rng.randrange(len(residuals))
+                residuals[i] = rng.uniform(0, 10)
+                tree.update(i, residuals[i])
+            elif rng.random() < 0.1:
+                residuals.append(rng.uniform(0, 10))
+                tree.append(residuals[-1])
+            weight = rng.uniform(0, 10)
+            start = rng.randrange(len(residuals) + 1)
+            expected = next((i for i, r in enumerate(residuals) if i >= start and r >= weight), -1)
+            self.assertEqual(tree.first_fit(weight, start), expected)
+
+    def test_truncate(self):
+        tree = FirstFitTree([1, 2])
+        tree.append(10)
+        self.assertEqual(tree.first_fit(5), 2)
+        tree.truncate(2)
+        self.assertEqual(tree.first_fit(5), -1)
+        self.assertEqual(len(tree), 2)
+
+
+class BestFitIndexTest(unittest.TestCase):
+    def test_queries(self):
+        index = BestFitIndex([3, 7, 1, 7, 5])
+        self.assertEqual(list(index.tightest(6)), [5, 3, 1])
+        self.assertEqual(next(index.tightest(7)), 7)
+        self.assertEqual(list(index.tightest(0.5)), [])
+        index.remove(7)
+        index.add(2)
+        self.assertEqual(list(index.lightest()), [1, 2, 3, 5, 7])
+
+    def test_load_key(self):
+        index = BestFitIndex([('a', 4), ('b', 2)], load=lambda trip: trip[1])
+        self.assertEqual(next(index.tightest(3)), ('b', 2))
+        self.assertEqual(len(index), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
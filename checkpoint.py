@@ -0,0 +1,93 @@
+"""Okresowy zapis stanu algorytmu, z którego można wznowić przerwany przebieg
+
+    python main.py duza.json -n 100000 --checkpoint-dir stan
+    python main.py duza.json -n 100000 --checkpoint-dir stan --resume
+
+Stan zwracają GeneticAlgorithm.state i BeeAlgorithm.state (osobniki w postaci tablic numpy
+z Assignment.encode), a przywracają ich metody restore.
+"""
+import os
+import pickle
+import tempfile
+import threading
+from typing import Callable, Optional
+from instance import Instance
+
+
+def instance_key(instance: Instance):
+    """Rozpoznaje instancję, dla której zapisano stan, bez zapisywania jej przedmiotów"""
+    return len(instance), tuple(instance.args), float(instance.weights.sum())
+
+
+class Checkpoint:
+    """Plik ze stanem algorytmu zapisywanym co `every` pokoleń (iteracji)
+
+    Stan jest pobierany w pętli algorytmu, a serializowany i zapisywany w osobnym wątku,
+    więc pętla czeka tylko wtedy, gdy poprzedni zapis jeszcze trwa. Plik jest podmieniany
+    przez os.replace, więc zawsze zawiera pełny ostatni stan.
+
+    # Interfejs
+    ## Metody
+    * load -> ostatni zapisany stan (None, jeśli pliku nie ma)
+    * update -> zapis stanu, jeśli numer pokolenia jest wielokrotnością every
+    * save -> zapis stanu
+    * close -> czeka na zakończenie zapisu
+    """
+
+    def __init__(self, path: str, every: int = 50, instance: Instance = None):
+        if every < 1:
+            raise ValueError('Checkpoint interval must be positive')
+        self.path = path
+        self.every = every
+        self.key = None if instance is None else instance_key(instance)
+        self._writer: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+    def load(self) -> Optional[dict]:
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'rb') as fin:
+            key, state = pickle.load(fin)
+        if self.key is not None and key is not None and key != self.key:
+            raise ValueError(f'{self.path} was saved for a different problem instance')
+        return state
+
+    def update(self, step: int, state: Callable[[], dict]):
+        """state jest wywoływane tylko wtedy, gdy stan ma zostać zapisany"""
+        if step % self.every == 0:
+            self.save(state())
+
+    def save(self, state: dict):
+        self.close()
+        self._writer = threading.Thread(target=self._write, args=(state,))
+        self._writer.start()
+
+    def _write(self, state: dict):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as fout:
+                    pickle.dump((self.key, state), fout, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, self.path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except BaseException as e:
+            self._error = e
+
+    def close(self):
+        """Czeka na bieżący zapis; błąd zapisu jest zgłaszany tutaj"""
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,65 @@
+import os
+import random
+import tempfile
+import unittest
+from bees.BeeAlgorithm import BeeAlgorithm
+from checkpoint import Checkpoint
+from genetic.GeneticAlgorithm import GeneticAlgorithm
+from genetic.fitness import population_fitness
+from genetic.ga_selections import best_rank_selection
+from instance import Instance
+from main import bee_fpf, ga_population_generator, get_bee_sf, get_pp
+
+
+class CheckpointTest(unittest.TestCase):
+    def setUp(self):
+        self.instance = Instance.load(os.path.join(os.path.dirname(__file__), 'test_data', 'ex.json'))
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'run.ckpt')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def genetic(self):
+        return GeneticAlgorithm(ga_population_generator(self.instance, 10), best_rank_selection,
+                                lambda *_: False, fitness_evaluator=population_fitness,
+                                instance=self.instance)
+
+    def test_genetic_resume(self):
+        random.seed(0)
+        uninterrupted = self.genetic()
+        uninterrupted.run(6)
+
+        random.seed(0)
+        self.genetic().run(3, Checkpoint(self.path, 2, self.instance))
+        random.seed(1)
+        resumed = self.genetic()
+        resumed.restore(Checkpoint(self.path, instance=self.instance).load(), self.instance.items)
+        self.assertEqual(resumed.generation, 3)
+        resumed.run(6)
+        # wznowiony przebieg jest identyczny z nieprzerwanym
+        self.assertEqual(resumed.fitness.tolist(), uninterrupted.fitness.tolist())
+        self.assertEqual(resumed.global_best.genes, uninterrupted.global_best.genes)
+
+    def test_bees_restore(self):
+        random.seed(0)
+        ba = BeeAlgorithm(8, 4, 2, 5, 3, 1, bee_fpf, get_bee_sf(self.instance), get_pp(self.instance))
+        ba.run(3, Checkpoint(self.path, 1, self.instance))
+        restored = BeeAlgorithm(8, 4, 2, 5, 3, 1, bee_fpf, get_bee_sf(self.instance), get_pp(self.instance))
+        restored.restore(Checkpoint(self.path, instance=self.instance).load(), self.instance.items)
+        self.assertEqual(restored.iteration, 3)
+        for scout, saved in zip(ba.scouts, restored.scouts):
+            self.assertEqual(saved.solution.car_trips, scout.solution.car_trips)
+            self.assertEqual(saved.solution.truck_trips, scout.solution.truck_trips)
+        self.assertEqual([p.size for p in restored.flower_patches], [p.size for p in ba.flower_patches])
+
+    def test_other_instance(self):
+        with Checkpoint(self.path, instance=self.instance) as checkpoint:
+            checkpoint.save({})
+        other = Instance.load(os.path.join(os.path.dirname(__file__), 'test_data', 'hard.json'))
+        with self.assertRaises(ValueError):
+            Checkpoint(self.path, instance=other).load()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,331 @@
+"""Usługa rozwiązująca instancje przesyłane przez gniazdo, w puli stale działających procesów
+
+    python daemon.py --socket /run/solver.sock -w 8
+    python daemon.py --port 8765
+
+Usługa słucha tylko lokalnie: na gnieździe uniksowym albo na porcie interfejsu 127.0.0.1.
+Każde połączenie przesyła żądania w formacie JSON Lines (jedno w wierszu) i dostaje odpowiedzi
+w tej samej kolejności; równoległe żądania wymagają równoległych połączeń:
+
+    {"id": "z1", "engine": "genetic", "instance": {"truck_load": 40, ..., "items": [...]},
+     "params": {"gens": 500, "pop_size": 50}, "time_limit": 10}
+
+instance ma strukturę test_data/simple.json, engine to genetic, bees albo exact, a params
+i time_limit są opcjonalne (parametry jak w batch.py). Odpowiedź zawiera id, engine i pola
+wyniku batch.py: items, cost, car_trips, truck_trips (numery przedmiotów), bound i gap, a także
+seconds, queued (czas oczekiwania na proces) i timed_out. Błąd zwracany jest jako
+{"id": ..., "error": ...}, a żądanie odrzucone z powodu przeciążenia ma dodatkowo
+"overloaded": true i można je ponowić później. Żądanie {"command": "ping"} zwraca stan usługi.
+
+Procesy puli powstają przy starcie i obsługują kolejne żądania z zaimportowanymi już modułami
+algorytmów, więc żądanie nie płaci za uruchomienie interpretera. Naraz przyjmowanych jest
+najwyżej queue_size żądań (liczonych od przyjęcia do zakończenia obliczeń), kolejne są od razu
+odrzucane. Limit czasu jest sprawdzany przez algorytmy po każdym pokoleniu (exact - w trakcie
+przeszukiwania); jeśli wynik nie nadejdzie mimo to w ciągu GRACE sekund po limicie, klient
+dostaje błąd, a miejsce w kolejce zwalnia się dopiero po zakończeniu obliczeń.
+"""
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stderr, redirect_stdout
+from batch import ENGINES, run_engine
+from heuristics import HEURISTICS
+from instance import Instance
+from lower_bound import BOUNDS
+
+# parametry przebiegu, które może podać żądanie, i ich wartości domyślne (jak w batch.py)
+DEFAULT_PARAMS = {
+    'gens': 1000,
+    'unchanged_gens': 200,
+    'pop_size': 100,
+    'scouts': 100,
+    'seed': 0,
+    'bound': 'none',
+    'gap': 0.0,
+    'init': 'random',
+    'init_mix': 0.1,
+}
+# ile sekund po limicie czasu czekać na wynik, zanim klient dostanie błąd
+GRACE = 30.0
+# największy akceptowany wiersz żądania
+MAX_REQUEST_BYTES = 256 * 2 ** 20
+
+
+def parse_params(params: dict, time_limit: float) -> Namespace:
+    """Parametry przebiegu w postaci argumentów batch.py; nieznany lub błędny parametr to ValueError"""
+    unknown = set(params) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f'Unknown parameters: {", ".join(sorted(unknown))}')
+    args = Namespace(**{**DEFAULT_PARAMS, **params}, time_limit=time_limit)
+    for name in ('gens', 'unchanged_gens', 'pop_size', 'scouts'):
+        if not isinstance(getattr(args, name), int) or getattr(args, name) < 1:
+            raise ValueError(f'{name} must be a positive integer')
+    if args.bound not in (*BOUNDS, 'none'):
+        raise ValueError(f'Unknown lower bound {args.bound!r}')
+    if args.init not in (*HEURISTICS, 'random'):
+        raise ValueError(f'Unknown heuristic {args.init!r}')
+    if not 0 <= args.init_mix <= 1:
+        raise ValueError('init_mix must be between 0 and 1')
+    if args.init == 'random':
+        args.init = None
+    return args
+
+
+def pool_context():
+    """forkserver (albo spawn, jeśli system go nie ma) zamiast fork: pula jest odtwarzana
+    z wątku obsługującego żądanie, a fork wielowątkowego procesu kopiuje blokady trzymane
+    przez inne wątki. Serwer forkserver importuje moduły algorytmów raz, więc nowe procesy
+    startują z nimi już wczytanymi."""
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    ctx = multiprocessing.get_context('forkserver')
+    ctx.set_forkserver_preload(['batch'])
+    return ctx
+
+
+def _warm_up():
+    """Uruchamia proces puli przed pierwszym żądaniem"""
+    return os.getpid()
+
+
+def _solve(request_id, engine: str, data: dict, args: Namespace, submitted: float) -> dict:
+    """Jedno żądanie w procesie puli; błąd jest zwracany w odpowiedzi"""
+    start = time.monotonic()
+    result = {'id': request_id, 'engine': engine, 'queued': start - submitted}
+    deadline = start + args.time_limit
+    try:
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull), redirect_stderr(devnull):
+            instance = Instance.from_dict(data)
+            result.update(run_engine(instance, engine, args, f'{args.seed}:{request_id}:{engine}',
+                                     deadline))
+        result['timed_out'] = time.monotonic() >= deadline
+    except (Exception, SystemExit) as e:
+        # SystemExit zgłaszają m.in. operatory genetyczne po wykryciu błędnego chromosomu
+        result['error'] = f'{type(e).__name__}: {e}'
+    result['seconds'] = time.monotonic() - start
+    return result
+
+
+class SolverDaemon:
+    """Pula procesów rozwiązujących żądania z ograniczoną kolejką
+
+    # Interfejs
+    ## Atrybuty
+    * workers -> liczba procesów puli
+    * queue_size -> ile żądań może być naraz przyjętych (liczone razem z obliczanymi)
+    * default_time_limit, max_time_limit -> limit czasu żądania bez time_limit i największy dozwolony
+    ## Metody
+    * handle -> odpowiedź na jedno zdekodowane żądanie (blokuje do zakończenia obliczeń)
+    * server -> serwer gniazda uniksowego (path) albo portu 127.0.0.1 (port)
+    * close -> zatrzymanie puli
+    """
+
+    def __init__(self, workers: int = None, queue_size: int = None,
+                 default_time_limit: float = 60.0, max_time_limit: float = 600.0):
+        self.workers = workers or os.cpu_count()
+        self.queue_size = queue_size or 2 * self.workers
+        self.default_time_limit = default_time_limit
+        self.max_time_limit = max_time_limit
+        self.slots = threading.BoundedSemaphore(self.queue_size)
+        self.pending = 0
+        self.served = 0
+        self.lock = threading.Lock()
+        self.pool_lock = threading.Lock()
+        self.executor = None
+        self._start_pool()
+
+    def _start_pool(self):
+        self.executor = ProcessPoolExecutor(self.workers, mp_context=pool_context())
+        # każde zadanie bez bezczynnego procesu uruchamia nowy proces
+        for future in [self.executor.submit(_warm_up) for _ in range(self.workers)]:
+            future.result()
+
+    def _release(self, _):
+        with self.lock:
+            self.pending -= 1
+        self.slots.release()
+
+    def handle(self, request) -> dict:
+        request_id = request.get('id') if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict):
+                raise ValueError('Request must be a JSON object')
+            if request.get('command') == 'ping':
+                return {'id': request_id, 'workers': self.workers, 'queue_size': self.queue_size,
+                        'pending': self.pending, 'served': self.served}
+            engine = request.get('engine', 'genetic')
+            if engine not in ENGINES:
+                raise ValueError(f'Unknown engine {engine!r}, expected one of {tuple(ENGINES)}')
+            if not isinstance(request.get('instance'), dict):
+                raise ValueError('Request has no instance object')
+            time_limit = request.get('time_limit', self.default_time_limit)
+            if not isinstance(time_limit, (int, float)) or not 0 < time_limit <= self.max_time_limit:
+                raise ValueError(f'time_limit must be in (0, {self.max_time_limit}]')
+            args = parse_params(request.get('params', {}), float(time_limit))
+        except (TypeError, ValueError) as e:
+            return {'id': request_id, 'error': f'{type(e).__name__}: {e}'}
+
+        if not self.slots.acquire(blocking=False):
+            return {'id': request_id, 'error': f'Overloaded: {self.queue_size} requests pending',
+                    'overloaded': True}
+        with self.lock:
+            self.pending += 1
+        executor = self.executor
+        try:
+            future = executor.submit(_solve, request_id, engine, request['instance'], args,
+                                     time.monotonic())
+        except BrokenProcessPool:
+            self._release(None)
+            self._restart_pool(executor)
+            return {'id': request_id, 'error': 'Worker pool restarted, retry the request',
+                    'overloaded': True}
+        future.add_done_callback(self._release)
+        try:
+            result = future.result(timeout=time_limit + GRACE)
+        except TimeoutError:
+            return {'id': request_id, 'error': f'No result within {time_limit + GRACE:g} s'}
+        except BrokenProcessPool:
+            self._restart_pool(executor)
+            return {'id': request_id, 'error': 'Worker process died'}
+        with self.lock:
+            self.served += 1
+        return result
+
+    def _restart_pool(self, broken: ProcessPoolExecutor):
+        """Nowa pula w miejsce tej, której proces zginął (np. z braku pamięci); pulę
+        zastępuje tylko pierwszy wątek, który to zauważył"""
+        with self.pool_lock:
+            if self.executor is broken:
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._start_pool()
+
+    def server(self, path: str = None, port: int = None) -> socketserver.BaseServer:
+        if (path is None) == (port is None):
+            raise ValueError('Give exactly one of path and port')
+        if path is not None:
+            if os.path.exists(path):
+                os.unlink(path)
+            server = _UnixServer(path, _Handler)
+        else:
+            server = _TCPServer(('127.0.0.1', port), _Handler)
+        server.solver = self
+        return server
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            line = self.rfile.readline(MAX_REQUEST_BYTES + 1)
+            if not line:
+                return
+            if not line.strip():
+                continue
+            if len(line) > MAX_REQUEST_BYTES:
+                self._reply({'error': f'Request longer than {MAX_REQUEST_BYTES} bytes'})
+                return
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                self._reply({'error': f'JSONDecodeError: {e}'})
+                continue
+            self._reply(self.server.solver.handle(request))
+
+    def _reply(self, response: dict):
+        self.wfile.write(json.dumps(response).encode() + b'\n')
+        self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def request(address, payload: dict, timeout: float = None) -> dict:
+    """Klient: wysyła jedno żądanie do usługi (ścieżka gniazda albo numer portu) i zwraca odpowiedź"""
+    if isinstance(address, int):
+        sock = socket.create_connection(('127.0.0.1', address), timeout)
+    else:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(address)
+    with sock, sock.makefile('rwb') as stream:
+        stream.write(json.dumps(payload).encode() + b'\n')
+        stream.flush()
+        return json.loads(stream.readline())
+
+
+def main():
+    parser = ArgumentParser(description='Lokalna usługa rozwiązująca instancje problemu w puli procesów')
+    address = parser.add_mutually_exclusive_group(required=True)
+    address.add_argument(
+        '--socket', metavar='ŚCIEŻKA',
+        help='Gniazdo uniksowe, na którym usługa przyjmuje żądania'
+    )
+    address.add_argument(
+        '--port', type=int,
+        help='Port interfejsu 127.0.0.1, na którym usługa przyjmuje żądania'
+    )
+    parser.add_argument(
+        '-w', dest='workers', type=int, default=None,
+        help='Liczba procesów (domyślnie liczba procesorów)'
+    )
+    parser.add_argument(
+        '-q', '--queue-size', type=int, default=None,
+        help='Ile żądań może czekać lub być obliczanych naraz; kolejne są odrzucane '
+             '(domyślnie dwa razy liczba procesów)'
+    )
+    parser.add_argument(
+        '--time-limit', type=float, default=60.0,
+        help='Limit czasu żądania, które go nie podaje, w sekundach (domyślnie 60)'
+    )
+    parser.add_argument(
+        '--max-time-limit', type=float, default=600.0,
+        help='Największy limit czasu, jaki może podać żądanie (domyślnie 600)'
+    )
+    args = parser.parse_args()
+    if args.time_limit > args.max_time_limit:
+        parser.error('--time-limit cannot exceed --max-time-limit')
+
+    with SolverDaemon(args.workers, args.queue_size, args.time_limit, args.max_time_limit) as solver:
+        server = solver.server(args.socket, args.port)
+        # SIGTERM (np. od menedżera usług) kończy pracę jak Ctrl+C
+        signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+        print(f'Listening on {args.socket or f"127.0.0.1:{args.port}"} with {solver.workers} workers',
+              file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import json
+import os
+import signal
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from batch import ENGINES
+from daemon import SolverDaemon, _solve, parse_params, request
+
+TEST_DATA = os.path.join(os.path.dirname(__file__), 'test_data')
+
+
+def exit_run(instance, args, stop_condition):
+    raise SystemExit(1)
+
+
+def load(name):
+    with open(os.path.join(TEST_DATA, name)) as fin:
+        return json.load(fin)
+
+
+class DaemonTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'solver.sock')
+        self.solver = SolverDaemon(workers=1, queue_size=1)
+        self.server = self.solver.server(self.path)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.solver.close()
+        self.tmp.cleanup()
+
+    def test_solve(self):
+        params = {'gens': 10, 'pop_size': 10, 'scouts': 8, 'bound': 'integer'}
+        for engine in ('genetic', 'bees', 'exact'):
+            result = request(self.path, {'id': engine, 'engine': engine, 'instance': load('simple.json'),
+                                         'params': params, 'time_limit': 10})
+            self.assertNotIn('error', result)
+            self.assertEqual(result['id'], engine)
+            trips = result['car_trips'] + result['truck_trips']
+            self.assertEqual(sorted(i for trip in trips for i in trip), list(range(15)))
+            self.assertGreaterEqual(result['cost'], result['bound'])
+
+    def test_invalid_requests(self):
+        self.assertIn('error', request(self.path, {'engine': 'simplex', 'instance': load('simple.json')}))
+        self.assertIn('error', request(self.path, {'instance': load('simple.json'), 'params': {'x': 1}}))
+        self.assertIn('error', request(self.path, {'instance': {'items': []}}))
+        self.assertIn('error', request(self.path, {'instance': load('simple.json'), 'time_limit': 1e6}))
+
+    def test_overloaded(self):
+        slow = {}
+        thread = threading.Thread(target=lambda: slow.update(request(
+            self.path, {'engine': 'exact', 'instance': load('hard.json'), 'time_limit': 1})))
+        thread.start()
+        while request(self.path, {'command': 'ping'})['pending'] == 0:
+            time.sleep(0.01)
+        rejected = request(self.path, {'engine': 'exact', 'instance': load('simple.json')})
+        thread.join()
+        self.assertTrue(rejected.get('overloaded'))
+        self.assertTrue(slow['timed_out'])
+        self.assertNotIn('error', slow)
+
+    def test_restart_after_worker_death(self):
+        os.kill(next(iter(self.solver.executor._processes)), signal.SIGKILL)
+        payload = {'engine': 'exact', 'instance': load('simple.json'), 'time_limit': 10}
+        # żądanie, które zauważy śmierć procesu, dostaje błąd, a następne trafia do nowej puli
+        self.assertIn('error', request(self.path, payload))
+        result = request(self.path, payload)
+        self.assertNotIn('error', result)
+        self.assertEqual(request(self.path, {'command': 'ping'})['pending'], 0)
+
+    def test_exit_in_engine(self):
+        # procesy puli (forkserver) nie widzą podmienionych ENGINES, więc _solve jest wołane wprost
+        with mock.patch.dict(ENGINES, exit=exit_run):
+            result = _solve('exit', 'exit', load('simple.json'), parse_params({}, 10.0), time.monotonic())
+        self.assertTrue(result['error'].startswith('SystemExit'))
+        self.assertEqual(result['id'], 'exit')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+"""Dokładne rozwiązanie metodą podziału i ograniczeń, punkt odniesienia dla obu algorytmów
+
+Rozwiązanie składa się z x kursów ciężarówką (do truck_load) i y kursów samochodem (do car_load)
+i kosztuje x * truck_cost + y * car_cost, jak bees.Solution. Pary (x, y) są sprawdzane od
+najtańszej, zaczynając od relaksacji z lower_bound.py: jeśli przedmioty nie mieszczą się
+w x + y kursach, para przechodzi w (x, y + 1), a jeśli się mieszczą - rozwiązanie jest optymalne,
+bo wszystkie tańsze pary zostały wykluczone. Koszt rozwiązania z best_fit_decreasing ogranicza
+pary z góry.
+
+Wykonalność pary rozstrzyga przeszukiwanie w głąb: przedmioty od najcięższego trafiają do kursów
+z wolnym miejscem, od najciaśniej pasującego. Kursy o równym wolnym miejscu są symetryczne, więc
+sprawdzany jest tylko jeden z nich; przedmiot wypełniający kurs dokładnie trafia tylko do niego.
+Gałąź jest odcinana, gdy dla pewnej masy w pozostałe przedmioty o masie >= w nie mieszczą się
+łącznie w wolnym miejscu kursów, do których w ogóle wejdą (dla najlżejszego przedmiotu jest to
+porównanie pozostałej masy z użytecznym wolnym miejscem). Stany bez rozwiązania (numer przedmiotu
+i wolne miejsce kursów) są pamiętane i wspólne dla wszystkich par, bo nie zależą od tego, z jakich
+kursów powstały.
+
+Masy z co najwyżej sześcioma cyframi po przecinku są przeliczane na liczby całkowite, więc
+porównania i pamięć stanów są dokładne.
+"""
+import dataclasses
+import heapq
+import math
+import time
+from typing import List, Optional
+from heuristics import best_fit_decreasing
+from lower_bound import integer_bound
+
+# po tylu węzłach sprawdzany jest limit czasu
+_CHECK_EVERY = 1024
+
+
+class _Timeout(Exception):
+    pass
+
+
+@dataclasses.dataclass
+class ExactResult:
+    """Najlepsze znalezione rozwiązanie i udowodnione dolne ograniczenie kosztu
+
+    optimal - prawda, jeśli cost == bound (przeszukiwanie zakończyło się przed limitem czasu)
+    """
+    car_trips: List[list]
+    truck_trips: List[list]
+    cost: float
+    bound: float
+    optimal: bool
+    nodes: int
+    seconds: float
+
+
+def _scale(weights, *capacities) -> int:
+    """Najmniejsza potęga 10, po pomnożeniu przez którą masy i ładowności są całkowite (0 - brak)"""
+    for digits in range(7):
+        scale = 10 ** digits
+        if all(abs(value * scale - round(value * scale)) < 1e-6 for value in (*weights, *capacities)):
+            return scale
+    return 0
+
+
+class _Search:
+    """Przeszukiwanie w głąb dla kolejnych par (x, y) ze wspólną pamięcią stanów bez rozwiązania"""
+
+    def __init__(self, weights, deadline, max_states):
+        # od najcięższego
+        self.weights = weights
+        self.smallest = weights[-1] if weights else 0
+        self.remaining = [0] * (len(weights) + 1)
+        for i in range(len(weights) - 1, -1, -1):
+            self.remaining[i] = self.remaining[i + 1] + weights[i]
+        self.deadline = deadline
+        self.max_states = max_states
+        self.failed = set()
+        self.nodes = 0
+
+    def feasible(self, capacities) -> Optional[List[list]]:
+        """Numery przedmiotów (pozycje w weights) każdego kursu albo None
+
+        Przeszukiwanie korzysta z jawnego stosu, bo jego głębokość to liczba przedmiotów.
+        """
+        self.residuals = list(capacities)
+        placed = []
+        stack = [self._expand(0)]
+        while stack:
+            if len(placed) == len(self.weights):
+                trips = [[] for _ in capacities]
+                for i, k in enumerate(placed):
+                    trips[k].append(i)
+                return trips
+            state, options = stack[-1]
+            k = next(options, None)
+            if k is None:
+                stack.pop()
+                if state is not None:
+                    if len(self.failed) >= self.max_states:
+                        self.failed.clear()
+                    self.failed.add(state)
+                if placed:
+                    self.residuals[placed.pop()] += self.weights[len(placed)]
+                continue
+            self.residuals[k] -= self.weights[len(placed)]
+            placed.append(k)
+            stack.append(self._expand(len(placed)))
+        return None
+
+    def _fits_by_size(self, i, usable) -> bool:
+        """Przedmioty o masie >= w mieszczą się tylko w kursach z wolnym miejscem >= w,
+        więc ich łączna masa nie może przekraczać wolnego miejsca tych kursów (dla każdego w)"""
+        weights = self.weights
+        space = 0
+        b = len(usable)
+        j = i
+        while j < len(weights):
+            weight = weights[j]
+            while j < len(weights) and weights[j] == weight:
+                j += 1
+            while b > 0 and usable[b - 1] >= weight:
+                b -= 1
+                space += usable[b]
+            if self.remaining[i] - self.remaining[j] > space:
+                return False
+        return True
+
+    def _expand(self, i):
+        """Stan węzła (None dla liścia i odciętej gałęzi) i kursy, do których próbować włożyć
+        przedmiot i: po jednym z każdej wartości wolnego miejsca, od najciaśniej pasującego"""
+        if i == len(self.weights):
+            return None, iter(())
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % _CHECK_EVERY == 0 \
+                and time.perf_counter() > self.deadline:
+            raise _Timeout
+        usable = sorted(r for r in self.residuals if r >= self.smallest)
+        if not self._fits_by_size(i, usable):
+            return None, iter(())
+        state = (i, tuple(usable))
+        if state in self.failed:
+            return None, iter(())
+
+        weight = self.weights[i]
+        fitting = sorted((r, k) for k, r in enumerate(self.residuals) if r >= weight)
+        if fitting and fitting[0][0] == weight:
+            fitting = fitting[:1]
+        options = []
+        for residual, k in fitting:
+            if not options or residual != self.residuals[options[-1]]:
+                options.append(k)
+        return state, iter(options)
+
+
+def branch_and_bound(items, car_capacity, truck_capacity, car_cost, truck_cost,
+                     time_limit: float = None, max_states: int = 2_000_000) -> ExactResult:
+    """Rozwiązanie optymalne albo, po time_limit sekundach, najlepsze znalezione
+    i udowodnione ograniczenie; sygnatura jak heurystyki z heuristics.py
+
+    max_states - ile stanów bez rozwiązania pamiętać (po przekroczeniu pamięć jest czyszczona)
+    """
+    start = time.perf_counter()
+    deadline = None if time_limit is None else start + time_limit
+    if any(item.weight > truck_capacity for item in items):
+        raise ValueError('An item is heavier than the truck capacity')
+    items = sorted(items, key=lambda item: item.weight, reverse=True)
+
+    car_trips, truck_trips = best_fit_decreasing(items, car_capacity, truck_capacity, car_cost, truck_cost)
+    best_cost = len(car_trips) * car_cost + len(truck_trips) * truck_cost
+    bound = integer_bound([item.weight for item in items], truck_capacity, car_capacity,
+                          truck_cost, car_cost)
+
+    scale = _scale([item.weight for item in items], car_capacity, truck_capacity)
+    if scale:
+        weights = [round(item.weight * scale) for item in items]
+        car_load, truck_load = round(car_capacity * scale), round(truck_capacity * scale)
+    else:
+        weights = [item.weight for item in items]
+        car_load, truck_load = car_capacity, truck_capacity
+    total = sum(weights)
+    # przedmioty cięższe od ładowności samochodu i od połowy ładowności ciężarówki jadą osobno
+    min_trucks = max(sum(w > truck_load / 2 for w in weights if w > car_load),
+                     math.ceil(sum(w for w in weights if w > car_load) / truck_load))
+
+    def min_cars(trucks):
+        return max(0, math.ceil((total - trucks * truck_load) / car_load))
+
+    candidates = [(trucks * truck_cost + min_cars(trucks) * car_cost, trucks, min_cars(trucks))
+                  for trucks in range(min_trucks, len(items) + 1)]
+    heapq.heapify(candidates)
+    search = _Search(weights, deadline, max_states)
+    optimal = False
+    try:
+        while True:
+            if not candidates or candidates[0][0] >= best_cost:
+                optimal = True
+                break
+            cost, trucks, cars = heapq.heappop(candidates)
+            bound = max(bound, cost)
+            # samochody przed ciężarówkami: przedmiot lżejszy od kursu samochodem trafia
+            # najpierw do niego, bo przeszukiwanie zaczyna od najciaśniej pasujących kursów
+            trips = search.feasible([car_load] * cars + [truck_load] * trucks)
+            if trips is not None:
+                car_trips = [[items[i] for i in trip] for trip in trips[:cars] if trip]
+                truck_trips = [[items[i] for i in trip] for trip in trips[cars:] if trip]
+                best_cost = len(car_trips) * car_cost + len(truck_trips) * truck_cost
+                optimal = True
+                break
+            heapq.heappush(candidates, (cost + car_cost, trucks, cars + 1))
+    except _Timeout:
+        pass
+    if optimal:
+        bound = best_cost
+    return ExactResult(car_trips, truck_trips, best_cost, bound, optimal, search.nodes,
+                       time.perf_counter() - start)
+
+
+def solve(instance, time_limit: float = None) -> ExactResult:
+    """branch_and_bound dla instance.Instance"""
+    items, truck_capacity, car_capacity, truck_cost, car_cost = instance.as_tuple()
+    return branch_and_bound(items, car_capacity, truck_capacity, car_cost, truck_cost, time_limit)
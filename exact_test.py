@@ -0,0 +1,52 @@
+import os
+import random
+import unittest
+from math import fsum
+from exact import branch_and_bound, solve
+from instance import Instance
+from Item import Item
+from lower_bound_test import optimum
+
+TEST_DATA = os.path.join(os.path.dirname(__file__), 'test_data')
+
+
+class ExactTest(unittest.TestCase):
+    def check(self, result, items, truck_load, car_load, truck_cost, car_cost):
+        trips = result.car_trips + result.truck_trips
+        self.assertEqual(sorted(item.index for trip in trips for item in trip),
+                         sorted(item.index for item in items))
+        self.assertTrue(all(fsum(i.weight for i in trip) <= car_load for trip in result.car_trips))
+        self.assertTrue(all(fsum(i.weight for i in trip) <= truck_load for trip in result.truck_trips))
+        self.assertEqual(result.cost, len(result.car_trips) * car_cost + len(result.truck_trips) * truck_cost)
+        self.assertLessEqual(result.bound, result.cost)
+
+    def test_matches_brute_force(self):
+        rng = random.Random(1)
+        for _ in range(30):
+            args = (40, rng.choice([10, 15, 25]), rng.choice([20, 50, 100]), rng.choice([10, 15]))
+            weights = [round(rng.uniform(1, 40), 2) for _ in range(rng.randint(1, 7))]
+            items = Item.indexed(Item(weight, f'item{i}') for i, weight in enumerate(weights))
+            truck_load, car_load, truck_cost, car_cost = args
+            result = branch_and_bound(items, car_load, truck_load, car_cost, truck_cost)
+            self.check(result, items, *args)
+            self.assertTrue(result.optimal)
+            self.assertEqual(result.cost, optimum(weights, *args))
+
+    def test_test_data(self):
+        for name, cost in (('simple.json', 180), ('medium.json', 610)):
+            instance = Instance.load(os.path.join(TEST_DATA, name))
+            result = solve(instance, time_limit=30)
+            self.check(result, instance.items, *instance.args)
+            self.assertTrue(result.optimal)
+            self.assertEqual(result.cost, cost)
+
+    def test_time_limit(self):
+        instance = Instance.load(os.path.join(TEST_DATA, 'hard.json'))
+        result = solve(instance, time_limit=0.2)
+        self.check(result, instance.items, *instance.args)
+        self.assertFalse(result.optimal)
+        self.assertLess(result.seconds, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,14 @@
-from random import random, choice
+import random
+import time
+from contextlib import nullcontext
+from typing import Sequence
+import numpy as np
 from tqdm import trange
+from assignment import Assignment, item_table
+from genetic.fitness import object_fitness
+from genetic.genes import Chromosome, gene_cache
+from genetic.offspring import OffspringPool, plan_offspring, serial_offspring
+from metrics import StageTimer, gene_diversity, hit_rate, stage
 
 
 def key_f(x):
@@ -9,39 +18,175 @@ def key_f(x):
 class GeneticAlgorithm:
 
     def __init__(self, first_population_generator: callable,
-                 selection_model: callable, stop_condition: callable, mutation_probability: float = 0.1):
+                 selection_model: callable, stop_condition: callable, mutation_probability: float = 0.1,
+                 fitness_evaluator: callable = None, workers: int = None, chunk_size: int = None,
+                 instance=None, callbacks: Sequence[callable] = ()):
+        """
+        fitness_evaluator - funkcja zwracająca tablicę sprawności całego pokolenia
+        (np. genetic.fitness.population_fitness); jeśli jest podana, model selekcji
+        dostaje tę tablicę jako drugi argument
+        workers - liczba procesów tworzących potomstwo (None - w bieżącym procesie);
+        wynik nie zależy od liczby procesów, przedmioty muszą być ponumerowane
+        chunk_size - liczba dzieci zlecanych procesowi naraz
+        instance - instance.Instance, z której pochodzą przedmioty populacji; jej lista
+        przedmiotów trafia wtedy do procesów bez budowania jej od nowa z populacji
+        callbacks - funkcje wywoływane po każdym pokoleniu ze słownikiem pomiarów (zob. metrics.py);
+        tylko wtedy mierzone są czasy etapów
+        """
         self.first_generation_func = first_population_generator
         self.selection_model = selection_model
         self.stop_condition = stop_condition
         self.mutation_probability = mutation_probability
+        self.fitness_evaluator = fitness_evaluator
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.instance = instance
+        self.callbacks = list(callbacks)
+        self.timer = StageTimer() if self.callbacks else None
+        self.generation = 0
+        self.population = []
+        self.fitness = None
+        self.global_best = None
+        self.global_best_fitness = None
+        self.generations_unchanged = 0  # ilość pokoleń z rzędu bez poprawy
 
-    def run(self, n_generations):
+    def evaluate(self, population):
+        if self.fitness_evaluator is None:
+            return object_fitness(population)
+        return self.fitness_evaluator(population)
+
+    def select(self, population, fitness):
+        if self.fitness_evaluator is None:
+            return self.selection_model(population)
+        return self.selection_model(population, fitness)
+
+    def start(self):
+        """Tworzy pierwsze pokolenie posortowane malejąco po sprawności"""
         population = self.first_generation_func()
-        population.sort(key=key_f, reverse=True)
-        population_len = len(population)
-        global_best = population[0]
-        generations_unchanged = 0  # ilość pokoleń z rzędu bez poprawy
-        for i in trange(n_generations):
-            selected = self.selection_model(population)
-            new_population = selected.copy()
-            while len(new_population) != population_len:
-                child = choice(population).cross(choice(population))
-                if random() <= self.mutation_probability:
-                    child.mutation()
-                new_population.append(child)
-
-            population = new_population
-            the_best_match = max(population, key=key_f)
-            if key_f(the_best_match) <= key_f(global_best):
-                generations_unchanged += 1
-            else:
-                global_best = the_best_match
-                generations_unchanged = 0
-
-            # if i % 50 == 0:
-            #     print(f'Generation: {i} S: {the_best_match}')
-
-            if self.stop_condition(the_best_match, the_best_match.fitness, generations_unchanged):
-                break
-
-        return global_best
+        fitness = self.evaluate(population)
+        order = np.argsort(-fitness, kind='stable')
+        self.population = [population[i] for i in order]
+        self.fitness = fitness[order]
+        self.global_best = self.population[0]
+        self.global_best_fitness = self.fitness[0]
+        self.generations_unchanged = 0
+        self.generation = 0
+
+    def offspring_pool(self):
+        if self.workers is None:
+            return nullcontext()
+        items = item_table(self.population[0]) if self.instance is None else self.instance.items
+        return OffspringPool(self.workers, items, self.population[0].args, self.chunk_size)
+
+    def step(self, pool: OffspringPool = None):
+        """Tworzy kolejne pokolenie i zwraca jego najlepszego osobnika oraz jego sprawność"""
+        start = time.perf_counter()
+        cache_before = gene_cache.cache_info() if self.callbacks else None
+        with stage(self.timer, 'selection'):
+            selected = self.select(self.population, self.fitness)
+        plan = plan_offspring(len(self.population), len(self.population) - len(selected))
+        if pool is None:
+            # krzyżowanie i mutacja mierzone osobno dla każdego dziecka
+            children = serial_offspring(self.population, plan, self.mutation_probability, self.timer)
+        else:
+            with stage(self.timer, 'offspring'):
+                children = pool.offspring(self.population, plan, self.mutation_probability)
+
+        self.population = selected + children
+        with stage(self.timer, 'evaluation'):
+            self.fitness = self.evaluate(self.population)
+        self.generation += 1
+        best_i = int(np.argmax(self.fitness))
+        the_best_match = self.population[best_i]
+        if self.fitness[best_i] <= self.global_best_fitness:
+            self.generations_unchanged += 1
+        else:
+            self.global_best = the_best_match
+            self.global_best_fitness = self.fitness[best_i]
+            self.generations_unchanged = 0
+        if self.callbacks:
+            self.report(time.perf_counter() - start, cache_before, self.fitness[best_i])
+        return the_best_match, self.fitness[best_i]
+
+    def report(self, seconds, cache_before, best_fitness):
+        """Przekazuje pomiary właśnie utworzonego pokolenia wszystkim callbacks
+
+        Przy tworzeniu potomstwa w procesach etap 'offspring' obejmuje krzyżowanie i mutację,
+        a trafienia gene_cache dotyczą tylko bieżącego procesu.
+        """
+        record = {
+            'engine': 'genetic',
+            'generation': self.generation,
+            'seconds': seconds,
+            'stages': self.timer.pop(),
+            'evaluations': len(self.population),
+            'evals_per_sec': len(self.population) / seconds if seconds > 0 else None,
+            'best_fitness': float(best_fitness),
+            'global_best_fitness': float(self.global_best_fitness),
+            'mean_fitness': float(np.mean(self.fitness)),
+            'diversity': gene_diversity(self.population),
+            'gene_cache_hit_rate': hit_rate(cache_before, gene_cache.cache_info()),
+        }
+        for callback in self.callbacks:
+            callback(record)
+
+    def best(self, k):
+        """k najlepszych osobników bieżącego pokolenia"""
+        order = np.argsort(-self.fitness, kind='stable')[:k]
+        return [self.population[i] for i in order]
+
+    def immigrate(self, migrants):
+        """Zastępuje najsłabsze osobniki bieżącego pokolenia przybyszami"""
+        worst = np.argsort(self.fitness, kind='stable')[:len(migrants)]
+        for i, migrant in zip(worst, migrants):
+            self.population[i] = migrant
+        self.fitness = self.evaluate(self.population)
+
+    def state(self) -> dict:
+        """Stan potrzebny do wznowienia przebiegu (zob. checkpoint.py)"""
+        items = item_table(self.global_best)
+        return {
+            'generation': self.generation,
+            'args': self.global_best.args,
+            'population': [c.to_assignment(items).encode() for c in self.population],
+            'global_best': self.global_best.to_assignment(items).encode(),
+            'global_best_fitness': float(self.global_best_fitness),
+            'generations_unchanged': self.generations_unchanged,
+            'random': random.getstate(),
+        }
+
+    def restore(self, state: dict, items):
+        """Odwrotność state; items[i] musi być przedmiotem o numerze i"""
+        args = state['args']
+        self.population = [Chromosome.from_assignment(Assignment.decode(code, items, args))
+                           for code in state['population']]
+        self.fitness = self.evaluate(self.population)
+        self.global_best = Chromosome.from_assignment(Assignment.decode(state['global_best'], items, args))
+        self.global_best_fitness = state['global_best_fitness']
+        self.generations_unchanged = state['generations_unchanged']
+        self.generation = state['generation']
+        random.setstate(state['random'])
+
+    def run(self, n_generations, checkpoint=None):
+        """Po restore kontynuuje przerwany przebieg do łącznie n_generations pokoleń
+
+        checkpoint - checkpoint.Checkpoint, do którego okresowo trafia stan algorytmu
+        """
+        if not self.population:
+            self.start()
+        try:
+            with self.offspring_pool() as pool:
+                for _ in trange(self.generation, n_generations):
+                    the_best_match, best_fitness = self.step(pool)
+                    if checkpoint is not None:
+                        checkpoint.update(self.generation, self.state)
+
+                    if self.stop_condition(the_best_match, best_fitness, self.generations_unchanged):
+                        break
+            if checkpoint is not None:
+                checkpoint.save(self.state())
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+
+        return self.global_best
@@ -0,0 +1,175 @@
+import random
+from typing import List, Sequence
+from tqdm import tqdm
+from assignment import Assignment, item_table
+from genetic.GeneticAlgorithm import GeneticAlgorithm
+from genetic.genes import Chromosome
+from util import mp_context
+
+
+def ring(n_islands) -> List[List[int]]:
+    """Wyspa i wysyła przybyszów do wyspy i + 1"""
+    return [[(i + 1) % n_islands] for i in range(n_islands)]
+
+
+def fully_connected(n_islands) -> List[List[int]]:
+    """Każda wyspa wysyła przybyszów do wszystkich pozostałych"""
+    return [[j for j in range(n_islands) if j != i] for i in range(n_islands)]
+
+
+TOPOLOGIES = {
+    'ring': ring,
+    'full': fully_connected,
+}
+
+
+def _island(conn, ga_args, ga_kwargs, seed, metrics: bool):
+    """Pętla procesu wyspy: na polecenie koordynatora przyjmuje przybyszów,
+    tworzy kolejne pokolenia i odsyła najlepsze osobniki w postaci Assignment.encode
+    (oraz pomiary tych pokoleń, jeśli `metrics`)
+    """
+    random.seed(seed)
+    records = []
+    ga = GeneticAlgorithm(*ga_args, **ga_kwargs, callbacks=[records.append] if metrics else ())
+    ga.start()
+    items = item_table(ga.population[0])
+    args = ga.population[0].args
+    conn.send((items, args))
+    while True:
+        command, generations, migrants, n_migrants = conn.recv()
+        if command == 'stop':
+            break
+        if migrants:
+            ga.immigrate([Chromosome.from_assignment(Assignment.decode(code, items, args))
+                          for code in migrants])
+        for _ in range(generations):
+            ga.step()
+        conn.send((
+            [c.to_assignment(items).encode() for c in ga.best(n_migrants)],
+            ga.global_best.to_assignment(items).encode(),
+            ga.global_best_fitness,
+            records,
+        ))
+        records.clear()
+    conn.close()
+
+
+class IslandModel:
+
+    def __init__(self, n_islands: int, first_population_generator: callable,
+                 selection_model: callable, stop_condition: callable, mutation_probability: float = 0.1,
+                 fitness_evaluator: callable = None, migration_interval: int = 10,
+                 migrants: int = 2, topology='ring', callbacks: Sequence[callable] = ()):
+        """Niezależne populacje GeneticAlgorithm w osobnych procesach, co
+        `migration_interval` pokoleń wymieniające `migrants` najlepszych osobników
+
+        topology - 'ring', 'full' albo funkcja n_islands -> lista odbiorców każdej wyspy
+        stop_condition - wywoływany po każdej wymianie z najlepszym osobnikiem wszystkich
+        wysp i liczbą pokoleń bez poprawy globalnego najlepszego
+        callbacks - jak w GeneticAlgorithm; pomiary każdej wyspy (z jej numerem w 'island')
+        docierają do koordynatora przy każdej wymianie
+        """
+        self.n_islands = n_islands
+        self.first_generation_func = first_population_generator
+        self.selection_model = selection_model
+        self.stop_condition = stop_condition
+        self.mutation_probability = mutation_probability
+        self.fitness_evaluator = fitness_evaluator
+        self.migration_interval = migration_interval
+        self.migrants = migrants
+        self.callbacks = list(callbacks)
+        self.targets = (TOPOLOGIES[topology] if isinstance(topology, str) else topology)(n_islands)
+        self.global_best = None
+        self.global_best_fitness = None
+        self.generations_unchanged = 0
+
+    def run(self, n_generations):
+        """Jeśli proces którejś wyspy zginie, pozostałe są kończone, a run zgłasza RuntimeError
+        z numerem tej wyspy"""
+        ctx = mp_context()
+        ga_args = (self.first_generation_func, self.selection_model, self.stop_condition,
+                   self.mutation_probability)
+        ga_kwargs = {'fitness_evaluator': self.fitness_evaluator}
+        conns = []
+        processes = []
+        for _ in range(self.n_islands):
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(target=_island,
+                                  args=(child_conn, ga_args, ga_kwargs, random.getrandbits(64),
+                                        bool(self.callbacks)),
+                                  daemon=True)
+            process.start()
+            # koniec potoku należy do wyspy; bez zamknięcia recv nie zauważy jej śmierci
+            child_conn.close()
+            conns.append(parent_conn)
+            processes.append(process)
+
+        def dead(island):
+            """Kończy pozostałe wyspy i zwraca błąd opisujący wyspę, która przestała odpowiadać"""
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            processes[island].join(timeout=5)
+            return RuntimeError(f'Island {island} (pid {processes[island].pid}) died '
+                                f'with exit code {processes[island].exitcode}')
+
+        def send(island, message):
+            try:
+                conns[island].send(message)
+            except ConnectionError as err:
+                raise dead(island) from err
+
+        def recv(island):
+            try:
+                return conns[island].recv()
+            except (EOFError, ConnectionError) as err:
+                raise dead(island) from err
+
+        try:
+            items, args = recv(0)
+            for island in range(1, self.n_islands):
+                recv(island)
+
+            inbox = [[] for _ in range(self.n_islands)]
+            done = 0
+            with tqdm(total=n_generations) as progress:
+                while done < n_generations:
+                    generations = min(self.migration_interval, n_generations - done)
+                    for island, migrants in enumerate(inbox):
+                        send(island, ('evolve', generations, migrants, self.migrants))
+                    replies = [recv(island) for island in range(self.n_islands)]
+                    done += generations
+                    progress.update(generations)
+                    for island, (_, _, _, records) in enumerate(replies):
+                        for record in records:
+                            for callback in self.callbacks:
+                                callback(dict(record, island=island))
+
+                    inbox = [[] for _ in range(self.n_islands)]
+                    for source, (best, _, _, _) in enumerate(replies):
+                        for target in self.targets[source]:
+                            inbox[target] += best
+
+                    island = max(range(self.n_islands), key=lambda i: replies[i][2])
+                    _, best_code, best_fitness, _ = replies[island]
+                    if self.global_best_fitness is not None and best_fitness <= self.global_best_fitness:
+                        self.generations_unchanged += generations
+                    else:
+                        self.global_best = Chromosome.from_assignment(
+                            Assignment.decode(best_code, items, args))
+                        self.global_best_fitness = best_fitness
+                        self.generations_unchanged = 0
+
+                    if self.stop_condition(self.global_best, self.global_best_fitness,
+                                           self.generations_unchanged):
+                        break
+            for island in range(self.n_islands):
+                send(island, ('stop', 0, None, 0))
+        finally:
+            for conn in conns:
+                conn.close()
+            for process in processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+        return self.global_best
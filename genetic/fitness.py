@@ -0,0 +1,28 @@
+from typing import Sequence
+import numpy as np
+
+
+def population_fitness(population: Sequence) -> np.ndarray:
+    """Liczy sprawność (-koszt) wszystkich chromosomów pokolenia w jednym przebiegu
+
+    Masy wszystkich genów populacji trafiają do jednej tablicy, z której
+    wektorowo wyznaczane są rodzaje pojazdów i koszty kursów, a następnie
+    sumowane per chromosom. Wszystkie chromosomy muszą dotyczyć tej samej
+    instancji problemu.
+    """
+    if not population:
+        return np.empty(0)
+    lengths = np.fromiter((len(c.genes) for c in population),
+                          dtype=np.int64, count=len(population))
+    weights = np.fromiter((g.weight for c in population for g in c.genes),
+                          dtype=np.float64, count=int(lengths.sum()))
+    truck_load, car_load, truck_cost, car_cost = population[0].args
+    costs = np.where(weights == 0, 0,
+                     np.where(weights > car_load, truck_cost, car_cost))
+    owner = np.repeat(np.arange(len(population)), lengths)
+    return -np.bincount(owner, weights=costs, minlength=len(population))
+
+
+def object_fitness(population: Sequence) -> np.ndarray:
+    """Sprawność populacji liczona przez właściwość `fitness` każdego osobnika"""
+    return np.fromiter((c.fitness for c in population), dtype=np.float64, count=len(population))
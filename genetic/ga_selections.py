@@ -1,4 +1,10 @@
-def best_rank_selection(generation):
+import numpy as np
+
+
+def best_rank_selection(generation, fitness=None):
     max_selected = len(generation) // 10
+    if fitness is not None:
+        order = np.argsort(-np.asarray(fitness), kind='stable')[:max_selected]
+        return [generation[i] for i in order]
     sorted_by_fitness = sorted(generation, key=lambda x: x.fitness, reverse=True)
     return sorted_by_fitness[:max_selected]
@@ -1,10 +1,15 @@
+from bisect import insort
+from collections import OrderedDict, namedtuple
 from functools import cached_property
-from typing import Iterable, Set, List
-from sortedcontainers import SortedList
+from itertools import chain
+from math import fsum, isclose
+from operator import attrgetter
+from typing import Iterable, Set, List, Tuple
 import random
-import util
 import logging
 from Item import Item
+from assignment import Assignment, trip_cost
+from capacity_index import BestFitIndex
 
 
 def mass_fitness(s: Iterable[Item], truck_load, car_load):
@@ -23,6 +28,8 @@ class Gene:
 
     # Interfejs
     ## Atrybuty
+    * items -> krotka przedmiotów
+    * ids -> posortowane numery przedmiotów (Item.ids), wyznaczają tożsamość genu
     * subset -> niemutowalny zbiór przedmiotów
     * is_by_truck -> prawda jeśli transport musi odbyć się ciężarówką, fałsz w przeciwnym wypadku
     * truck_load, car_load, truck_cost, car_cost -> dane wejściowe problemu
@@ -30,21 +37,41 @@ class Gene:
     * mass_fitness -> sprawność massFitness z dokumentacji
     * cost_fitness -> sprawność costFitness z dokumentacji
     ## Metody
+    * without, with_item -> gen bez danego przedmiotu lub z dodatkowym przedmiotem (przez gene_cache)
     * __hash__ -> żeby geny można było wrzucić do zbioru
     * __str__, __eq__ -> oczywiste
     * __len__, __iter__ -> żeby gen mógł być traktowany jak Iterable
     """
 
     def __init__(self, subset: Iterable[Item], truck_load,
-                 car_load, truck_cost, car_cost):
-        self.subset = frozenset(subset)
-        subset_mass = sum(item.weight for item in subset)
+                 car_load, truck_cost, car_cost, ids: Tuple[int, ...] = None):
+        self.items = tuple(subset)
+        # porównania i haszowanie genów operują na numerach, bez haszowania przedmiotów;
+        # numery zajmują pamięć proporcjonalną do rozmiaru genu, a nie całej instancji
+        self.ids = Item.ids(self.items) if ids is None else ids
+        self._hash = hash(self.ids)
+        # fsum nie zależy od kolejności przedmiotów
+        subset_mass = fsum(item.weight for item in self.items)
         self.is_by_truck: bool = subset_mass > car_load
         self.args = truck_load, car_load, truck_cost, car_cost
 
+    @cached_property
+    def subset(self) -> frozenset:
+        return frozenset(self.items)
+
+    def without(self, item: Item) -> 'Gene':
+        rest = [i for i in self.items if i.index != item.index]
+        return make_gene(rest, *self.args, ids=tuple(i for i in self.ids if i != item.index),
+                         probe=rest[0] if rest else None)
+
+    def with_item(self, item: Item) -> 'Gene':
+        ids = list(self.ids)
+        insort(ids, item.index)
+        return make_gene(self.items + (item,), *self.args, ids=tuple(ids), probe=item)
+
     @cached_property
     def weight(self) -> float:
-        return sum(item.weight for item in self)
+        return fsum(item.weight for item in self)
 
     @cached_property
     def mass_fitness(self) -> float:
@@ -64,6 +91,18 @@ class Gene:
     def cost(self):
         return 0 if self.weight == 0 else (self.truck_cost if self.is_by_truck else self.car_cost)
 
+    def cost_fitness_with(self, weight) -> float:
+        """cost_fitness genu po dodaniu przedmiotu o masie weight, bez budowania nowego genu"""
+        new_weight = self.weight + weight
+        if new_weight > self.truck_load or new_weight == 0:
+            return 0
+        return new_weight / trip_cost(new_weight, 1, new_weight > self.car_load, self.args)
+
+    @cached_property
+    def order_key(self) -> tuple:
+        """Najmniejszy przedmiot genu - geny chromosomu są rozłączne, więc klucz jest unikalny"""
+        return (min(self.items),) if self.items else ()
+
     @property
     def truck_load(self):
         return self.args[0]
@@ -81,7 +120,7 @@ class Gene:
         return self.args[3]
 
     def __hash__(self):
-        return hash(self.subset) ^ hash('truck' if self.is_by_truck else 'car')
+        return self._hash
 
     def __str__(self):
         return (
@@ -90,39 +129,280 @@ class Gene:
         )
 
     def __len__(self):
-        return len(self.subset)
+        return len(self.items)
 
     def __eq__(self, other):
         if not isinstance(other, (Gene, set, list)):
             return NotImplemented
         elif isinstance(other, Gene):
-            return self.subset == other.subset
+            return self.ids == other.ids
         else:
-            return set(self.subset) == set(other)
+            return set(self.items) == set(other)
 
     def __repr__(self):
         return (
-            f'Gene({repr(set(self.subset))}, {self.truck_load}, '
+            f'Gene({repr(set(self.items))}, {self.truck_load}, '
             f'{self.car_load}, {self.truck_cost}, {self.car_cost})'
         )
 
     def __iter__(self):
-        return iter(self.subset)
+        return iter(self.items)
+
+
+def gene_order(gene: Gene):
+    """Klucz sortowania genów malejąco po cost_fitness z deterministycznym rozstrzyganiem remisów
+
+    Kolejność iteracji po zbiorze zależy od skrótów przedmiotów, czyli od procesu,
+    a krzyżowanie i mutacja muszą dawać ten sam wynik dla tego samego ziarna
+    niezależnie od tego, w którym procesie zostały wykonane.
+    """
+    return -gene.cost_fitness, gene.order_key
+
+
+GeneCacheInfo = namedtuple('GeneCacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class GeneCache:
+    """Tablica internowania genów z ograniczeniem rozmiaru (LRU)
+
+    Geny są niemutowalne, więc ten sam obiekt może być współdzielony przez wiele
+    chromosomów. Gen zwrócony przez get ma już policzone weight, cost i cost_fitness.
+
+    # Interfejs
+    ## Atrybuty
+    * maxsize -> największa liczba przechowywanych genów (None - bez ograniczenia, 0 - wyłączona)
+    ## Metody
+    * get -> gen dla danego zbioru przedmiotów i danych problemu
+    * cache_info, cache_clear -> jak w functools.lru_cache
+    * resize -> zmiana maxsize, nadmiarowe geny są usuwane od najdawniej używanych
+    """
+
+    def __init__(self, maxsize=100_000):
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._genes: OrderedDict = OrderedDict()
+
+    def get(self, subset: Iterable[Item], args, ids: Tuple[int, ...] = None, probe: Item = None) -> Gene:
+        """ids - Item.ids(subset), jeśli są już znane; subset jest wtedy czytany tylko przy tworzeniu genu
+        probe - dowolny przedmiot z subset
+
+        Numery przedmiotów są unikalne tylko w obrębie instancji, więc znaleziony gen jest
+        używany tylko wtedy, gdy zawiera ten sam obiekt probe (geny innej instancji są zastępowane).
+        """
+        if ids is None:
+            subset = tuple(subset)
+            ids = Item.ids(subset)
+            probe = subset[0] if subset else None
+        key = ids, tuple(args)
+        gene = self._genes.get(key)
+        if gene is not None and (probe is None or any(item is probe for item in gene.items)):
+            self.hits += 1
+            self._genes.move_to_end(key)
+            return gene
+        self.misses += 1
+        gene = Gene(subset, *key[1], ids=ids)
+        gene.cost, gene.cost_fitness  # liczone raz, przy pierwszym utworzeniu genu
+        if self.maxsize != 0:
+            self._genes[key] = gene
+            self._evict()
+        return gene
+
+    def resize(self, maxsize):
+        self.maxsize = maxsize
+        self._evict()
+
+    def _evict(self):
+        if self.maxsize is not None:
+            while len(self._genes) > self.maxsize:
+                self._genes.popitem(last=False)
+
+    def cache_info(self) -> GeneCacheInfo:
+        return GeneCacheInfo(self.hits, self.misses, self.maxsize, len(self._genes))
+
+    def cache_clear(self):
+        self._genes.clear()
+        self.hits = self.misses = 0
+
+
+# wspólna dla całego procesu; procesy potomne (fork) dziedziczą jej zawartość
+gene_cache = GeneCache()
+
+
+class ValidationPolicy:
+    """Jak często sprawdzać poprawność wyniku operatora
+
+    # Interfejs
+    ## Atrybuty
+    * mode -> 'full' (każde wywołanie), 'sampled' (co every-te wywołanie, począwszy od pierwszego)
+      lub 'off' (nigdy)
+    * every -> co które wywołanie sprawdzać w trybie 'sampled'
+    ## Metody
+    * configure -> zmiana trybu
+    * should_check -> czy sprawdzić bieżące wywołanie
+    """
+    MODES = ('full', 'sampled', 'off')
+
+    def __init__(self, mode='full', every=100):
+        self.configure(mode, every)
+
+    def configure(self, mode, every=None):
+        if mode not in self.MODES:
+            raise ValueError(f'Unknown validation mode {mode!r}, expected one of {self.MODES}')
+        if every is not None:
+            if every < 1:
+                raise ValueError('Validation interval must be positive')
+            self.every = every
+        self.mode = mode
+        self.calls = 0
+
+    def should_check(self) -> bool:
+        if self.mode == 'off':
+            return False
+        if self.mode == 'full':
+            return True
+        check = self.calls % self.every == 0
+        self.calls += 1
+        return check
+
+
+# sprawdzanie wyników krzyżowania, jak gene_cache dziedziczone przez procesy potomne
+cross_validation = ValidationPolicy()
+
+
+def make_gene(subset: Iterable[Item], truck_load, car_load, truck_cost, car_cost,
+              ids: Tuple[int, ...] = None, probe: Item = None) -> Gene:
+    """Jak Gene(...), ale zwraca internowany gen z gene_cache"""
+    return gene_cache.get(subset, (truck_load, car_load, truck_cost, car_cost), ids, probe)
+
+
+class InsertionIndex:
+    """Geny rozwiązania w dwóch BestFitIndex (kursy samochodem i ciężarówką) - wybór genu,
+    do którego krzyżowanie (krok 4) i mutacja wstawiają przedmiot
+
+    Przedmiot trafia do pierwszego w kolejności gene_order genu, w którym się mieści i którego
+    cost_fitness wzrośnie, a jeśli takiego nie ma - do ostatniego genu, w którym się mieści.
+    cost_fitness to masa genu podzielona przez koszt pojazdu, więc dla genów jednego pojazdu
+    kolejność gene_order to kolejność malejącej masy: pierwszy taki gen jest najciaśniej
+    pasującym, a ostatni najlżejszym, i oba znajdowane są w czasie O(log liczby genów).
+
+    # Interfejs
+    ## Atrybuty
+    * args -> dane wejściowe problemu
+    ## Metody
+    * target -> gen, do którego trafi przedmiot o danej masie, albo None (nowy gen)
+    * insert -> wstawia przedmiot zgodnie z target i zwraca nowy gen
+    * add, remove -> dodanie i usunięcie genu
+    * __iter__, __len__ -> wszystkie geny
+    """
+
+    def __init__(self, genes: Iterable[Gene], args):
+        self.args = args
+        # indeks zawęża poszukiwania, warunki sprawdzane są dokładnie jak przy przeglądaniu genów
+        self.tolerance = 1e-9 * max(args[0], 1)
+        genes = list(genes)
+        self.cars = BestFitIndex((g for g in genes if not g.is_by_truck), load=attrgetter('weight'))
+        self.trucks = BestFitIndex((g for g in genes if g.is_by_truck), load=attrgetter('weight'))
+
+    def _vehicle(self, gene: Gene) -> BestFitIndex:
+        return self.trucks if gene.is_by_truck else self.cars
+
+    def add(self, gene: Gene):
+        self._vehicle(gene).add(gene)
+
+    def remove(self, gene: Gene):
+        self._vehicle(gene).remove(gene)
+
+    def __iter__(self):
+        return chain(self.cars, self.trucks)
+
+    def __len__(self):
+        return len(self.cars) + len(self.trucks)
+
+    def _car_limit(self, weight) -> float:
+        """Największa masa genu samochodu, którego cost_fitness wzrośnie po dodaniu weight:
+        gen zostaje kursem samochodem albo (w + weight) / truck_cost > w / car_cost"""
+        truck_load, car_load, truck_cost, car_cost = self.args
+        ratio = weight * car_cost / (truck_cost - car_cost) if truck_cost > car_cost else float('inf')
+        return max(car_load - weight, min(truck_load - weight, ratio))
+
+    def _improving(self, index: BestFitIndex, max_weight, weight) -> Gene:
+        """Pierwszy w kolejności gene_order gen indeksu, do którego warto dodać weight"""
+        best = None
+        for gene in index.tightest(max_weight + self.tolerance):
+            if best is not None and gene.cost_fitness != best.cost_fitness:
+                break
+            if (gene.weight + weight <= gene.truck_load
+                    and gene.cost_fitness_with(weight) > gene.cost_fitness
+                    and (best is None or gene_order(gene) < gene_order(best))):
+                best = gene
+        return best
+
+    def _lightest(self, index: BestFitIndex, weight) -> Gene:
+        """Ostatni w kolejności gene_order gen indeksu, w którym mieści się weight"""
+        best = None
+        for gene in index.lightest():
+            if best is not None and gene.cost_fitness != best.cost_fitness:
+                break
+            if gene.weight + weight > gene.truck_load:
+                break
+            if best is None or gene_order(gene) > gene_order(best):
+                best = gene
+        return best
+
+    def target(self, weight) -> Gene:
+        candidates = [gene for gene in (self._improving(self.trucks, self.args[0] - weight, weight),
+                                        self._improving(self.cars, self._car_limit(weight), weight))
+                      if gene is not None]
+        if candidates:
+            return min(candidates, key=gene_order)
+        candidates = [gene for gene in (self._lightest(self.trucks, weight),
+                                        self._lightest(self.cars, weight))
+                      if gene is not None]
+        return max(candidates, key=gene_order) if candidates else None
+
+    def insert(self, item: Item) -> Gene:
+        gene = self.target(item.weight)
+        if gene is None:
+            new_gene = make_gene([item], *self.args)
+        else:
+            self.remove(gene)
+            new_gene = gene.with_item(item)
+        self.add(new_gene)
+        return new_gene
 
 
 class Chromosome:
     def __init__(self, partition: Iterable[Iterable[Item]],
                  truck_load, car_load, truck_cost, car_cost):
         self.args = truck_load, car_load, truck_cost, car_cost
-        self.genes: Set[Gene] = {Gene(p, *self.args) for p in partition}
+        self.genes: Set[Gene] = {p if isinstance(p, Gene) else make_gene(p, *self.args)
+                                 for p in partition}
 
-    def cross(self, other):
+    @property
+    def genes(self) -> Set[Gene]:
+        return self._genes
+
+    @genes.setter
+    def genes(self, genes: Set[Gene]):
+        """Koszt jest pamiętany do następnej zmiany genów; zbioru nie należy zmieniać w miejscu,
+        tylko przypisać nowy"""
+        self._genes = genes
+        self._cost = None
+        self._checksum = None
+
+    def cross(self, other, rng=random):
         """Operacja krzyżowania opisana w dokumentacji pod
         Algorytmy -> genetyczny -> krzyżowanie
+
+        rng - źródło losowości (moduł random lub obiekt random.Random)
+
+        To, czy rodzice i dziecko zawierają te same przedmioty, jest sprawdzane
+        zgodnie z cross_validation.
         """
+        check = cross_validation.should_check()
         try:
             assert isinstance(other, Chromosome)
-            assert self.all_items() == other.all_items()
+            assert not check or self.same_items(other)
             logging.debug('Starting crossing algorithm')
         except AssertionError:
             logging.critical(f'''Differing chromosomes:
@@ -131,97 +411,44 @@ class Chromosome:
     {repr(other)}''')
             raise SystemExit(1)
         try:
-            self_genes: List[Gene] = sorted(
-                self.genes, key=lambda g: g.cost_fitness, reverse=True)
-            other_genes: List[Gene] = sorted(
-                other.genes, key=lambda g: g.cost_fitness, reverse=True)
-            common_genes: Set[Gene] = set()
-            i = j = 0
-            # Krok 1: szukanie identycznych genów
-            while i < len(self) and j < len(other):
-                i_fit = self_genes[i].cost_fitness
-                j_fit = other_genes[j].cost_fitness
-
-                if i_fit < j_fit:
-                    j += 1
-                elif i_fit > j_fit:
-                    i += 1
-                else:  # włączanie identycznych genów
-                    for gene in other_genes[j:]:
-                        if gene.cost_fitness < i_fit:
-                            break
-                        if gene == self_genes[i]:
-                            common_genes.add(gene)
-                            break
-                    i += 1
+            self_genes: List[Gene] = sorted(self.genes, key=gene_order)
+            other_genes: List[Gene] = sorted(other.genes, key=gene_order)
+            # Krok 1: szukanie identycznych genów (równe geny mają równe skróty)
+            common_genes: Set[Gene] = self.genes & other.genes
             # Krok 2: wybieranie najlepszych genów z obu rodziców
-            step_2_genes_self: List[Gene] = []
-            step_2_genes_other: List[Gene] = []
             genes_from_self = (len(self) - len(common_genes)) // 2
             genes_from_other = (len(other) - len(common_genes)) // 2
-            for gene in self_genes:
-                if genes_from_self == 0:
-                    break
-                if gene not in common_genes:
-                    step_2_genes_self.append(gene)
-                    genes_from_self -= 1
-            for gene in other_genes:
-                if genes_from_other == 0:
-                    break
-                if gene not in common_genes:
-                    step_2_genes_other.append(gene)
-                    genes_from_other -= 1
-
-            # przygotowanie do kroków 3-4
-            all_items: Set[Item] = set(util.flatten(self_genes))
-            in_no_genes: Set[Item] = (all_items - set(util.flatten(step_2_genes_self))
-                                      - set(util.flatten(step_2_genes_other))
-                                      - set(util.flatten(common_genes)))
-            in_2_genes: Set[Item] = (set(util.flatten(step_2_genes_self))
-                                     & set(util.flatten(step_2_genes_other)))
+            step_2_genes_self: List[Gene] = [
+                gene for gene in self_genes if gene not in common_genes][:genes_from_self]
+            step_2_genes_other: List[Gene] = [
+                gene for gene in other_genes if gene not in common_genes][:genes_from_other]
+
+            # przygotowanie do kroków 3-4: numer przedmiotu -> pozycja jego genu na liście
+            # każdego rodzica; zbiory przedmiotów to widoki kluczy tych słowników
+            item_of = {item.index: item for gene in self_genes for item in gene}
+            self_slot = {item.index: i for i, gene in enumerate(step_2_genes_self) for item in gene}
+            other_slot = {item.index: i for i, gene in enumerate(step_2_genes_other) for item in gene}
+            in_2_genes: List[Item] = [item_of[i] for i in self_slot.keys() & other_slot.keys()]
+            in_no_genes: List[Item] = [
+                item_of[i] for i in item_of.keys() - self_slot.keys() - other_slot.keys()
+                - {i for gene in common_genes for i in gene.ids}]
             # Krok 3: usuwanie przedmiotów występujących 2 razy
-            chosen_seq = chosen_gene = None
-            for item in in_2_genes:
-                self_gene = [
-                    gene for gene in step_2_genes_self if item in gene.subset][0]
-                other_gene = [
-                    gene for gene in step_2_genes_other if item in gene.subset][0]
+            for item in sorted(in_2_genes):
+                self_gene = step_2_genes_self[self_slot[item.index]]
+                other_gene = step_2_genes_other[other_slot[item.index]]
                 if (self_gene.cost_fitness < other_gene.cost_fitness
                         or (self_gene.cost_fitness == other_gene.cost_fitness
-                            and random.random() < 0.5)):
-                    chosen_gene = self_gene
-                    chosen_seq = step_2_genes_self
+                            and rng.random() < 0.5)):
+                    chosen_seq, slot = step_2_genes_self, self_slot[item.index]
                 else:
-                    chosen_gene = other_gene
-                    chosen_seq = step_2_genes_other
-                chosen_seq.remove(chosen_gene)
-                chosen_gene = Gene(set(chosen_gene) - {item}, *self.args)
-                chosen_seq.append(chosen_gene)
+                    chosen_seq, slot = step_2_genes_other, other_slot[item.index]
+                # kolejność genów nie ma znaczenia dla kroku 4, więc gen jest podmieniany na miejscu
+                chosen_seq[slot] = chosen_seq[slot].without(item)
             # Krok 4: dodawanie przedmiotów nie występujących w ogóle
-            genes_so_far = SortedList(step_2_genes_self + step_2_genes_other + list(common_genes),
-                                      key=lambda g: -g.cost_fitness)
-            for item in in_no_genes:
-                already_inserted = False
-                for gene in genes_so_far[::]:
-                    if item.weight + gene.weight > gene.truck_load:
-                        continue
-                    new_gene_ver = Gene(list(gene) + [item], *self.args)
-                    if new_gene_ver.cost_fitness > gene.cost_fitness:
-                        genes_so_far.remove(gene)
-                        genes_so_far.add(new_gene_ver)
-                        already_inserted = True
-                        break
-                if already_inserted:
-                    continue
-                for gene in genes_so_far[::-1]:
-                    if item.weight + gene.weight <= gene.truck_load:
-                        new_gene_ver = Gene(list(gene) + [item], *self.args)
-                        genes_so_far.remove(gene)
-                        genes_so_far.add(new_gene_ver)
-                        already_inserted = True
-                        break
-                if not already_inserted:
-                    genes_so_far.add(Gene([item], *self.args))
+            genes_so_far = InsertionIndex(step_2_genes_self + step_2_genes_other + list(common_genes),
+                                          self.args)
+            for item in sorted(in_no_genes):
+                genes_so_far.insert(item)
 
             ret = Chromosome(genes_so_far, *self.args)
         except Exception:
@@ -231,7 +458,7 @@ class Chromosome:
     {repr(other)}
     encountered an unexpected error''')
             raise SystemExit(1)
-        if self.all_items() == ret.all_items():
+        if not check or self.same_items(ret):
             logging.debug('Crossing success')
             return ret
         else:
@@ -244,49 +471,31 @@ class Chromosome:
     ''')
             raise SystemExit(1)
 
-    def mutation(self):
-        """delete one item from random gene and insert it in another"""
-        new_genes = sorted(self.genes, key=lambda g: -g.cost_fitness)
+    def mutation(self, rng=random):
+        """delete one item from random gene and insert it in another
+
+        rng - source of randomness (the random module or a random.Random instance)
+        """
+        new_genes = sorted(self.genes, key=gene_order)
 
         # pick gene from which we will delete one item
         # remove it from new genes so we will not insert the item back to it
-        mutated_gene = random.choices(new_genes, weights=[g.cost_fitness for g in new_genes], k=1)[0]
+        mutated_gene = rng.choices(new_genes, weights=[g.cost_fitness for g in new_genes], k=1)[0]
         new_genes.remove(mutated_gene)
 
         # pick the item to be deleted and delete it from gene
-        mutated_gene_items = list(mutated_gene)
-        item = random.choice(mutated_gene_items)
-        mutated_gene_items.remove(item)
-        mutated_gene = Gene(mutated_gene_items, *self.args)
-
-        # add item to the most efficient gene, the efficiency of which will increase as a result of such an operation
-        item_added = False
-        for g in new_genes:
-            if g.weight + item.weight > self.args[0]:
-                continue
-            new_gene = Gene(list(g) + [item], *self.args)
-            if new_gene.cost_fitness > g.cost_fitness:
-                new_genes.remove(g)
-                new_genes.append(new_gene)
-                item_added = True
-                break
-        # if we haven't added it yet, add item to the least efficient gene that will be able to contain it
-        if not item_added:
-            for g in reversed(new_genes):
-                if g.weight + item.weight > self.args[0]:
-                    continue
-                new_gene = Gene(list(g) + [item], *self.args)
-                new_genes.remove(g)
-                new_genes.append(new_gene)
-                item_added = True
-                break
-        # if we haven't added it yet (no gene can contain the item) create new gene and add item to it
-        if not item_added:
-            new_genes.append(Gene([item], *self.args))
+        mutated_gene_items = sorted(mutated_gene)
+        item = rng.choice(mutated_gene_items)
+        mutated_gene = mutated_gene.without(item)
+
+        # add item to the most efficient gene, the efficiency of which will increase as a result of such an operation,
+        # otherwise to the least efficient gene that will be able to contain it, otherwise to a new gene
+        genes = InsertionIndex(new_genes, self.args)
+        genes.insert(item)
 
         # add mutated gene that we deleted earlier
-        new_genes.append(mutated_gene)
-        self.genes = set(new_genes)
+        genes.add(mutated_gene)
+        self.genes = set(genes)
 
     @property
     def fitness(self):
@@ -295,8 +504,10 @@ class Chromosome:
 
     @property
     def cost(self):
-        """The whole chromosome cost"""
-        return sum((gene.cost for gene in self.genes))
+        """The whole chromosome cost, computed once per gene set"""
+        if self._cost is None:
+            self._cost = sum((gene.cost for gene in self.genes))
+        return self._cost
 
     @property
     def truck_load(self):
@@ -325,7 +536,32 @@ class Chromosome:
         return iter(self.genes)
 
     def all_items(self):
-        return set(util.flatten(self))
+        return {item for gene in self.genes for item in gene}
+
+    def checksum(self) -> Tuple[int, int, float]:
+        """Liczba przedmiotów, suma ich numerów i suma mas - tanie (O(liczba genów))
+        przybliżenie zbioru przedmiotów, pamiętane do następnej zmiany genów"""
+        if self._checksum is None:
+            self._checksum = (sum(len(gene) for gene in self.genes),
+                              sum(sum(gene.ids) for gene in self.genes),
+                              fsum(gene.weight for gene in self.genes))
+        return self._checksum
+
+    def same_items(self, other: 'Chromosome') -> bool:
+        """Czy chromosomy mają równe sumy kontrolne (masy porównywane z tolerancją zaokrągleń)"""
+        count, index_sum, weight = self.checksum()
+        other_count, other_index_sum, other_weight = other.checksum()
+        return (count == other_count and index_sum == other_index_sum
+                and isclose(weight, other_weight, rel_tol=1e-12, abs_tol=1e-9))
+
+    def to_assignment(self, items=None) -> Assignment:
+        """Zamienia chromosom na tablicową reprezentację (przedmioty muszą być ponumerowane)"""
+        return Assignment.from_partition(list(self.genes), self.args, items=items)
+
+    @staticmethod
+    def from_assignment(assignment: Assignment):
+        # geny są zbiorem, więc puste kursy dają co najwyżej jeden pusty gen
+        return Chromosome(assignment.trips(), *assignment.args)
 
     def __repr__(self):
         return f'Chromosome({repr([set(gene) for gene in self.genes])}, {repr(self.args)[1:-1]})'
@@ -334,8 +570,12 @@ class Chromosome:
 if __name__ == '__main__':
     # logging.basicConfig(level=logging.DEBUG)
 
-    chromosome1 = Chromosome([{Item(weight=19.34, name='toothpaste'), Item(weight=7.15, name='craft book'), Item(weight=2.02, name='tennis ball'), Item(weight=11.49, name='marble')}, {Item(weight=4.43, name='button'), Item(weight=4.78, name='carton of ice cream'), Item(weight=8.84, name='ring'), Item(weight=3.78, name='door'), Item(weight=17.28, name='pasta strainer')}, {Item(weight=8.28, name='socks'), Item(weight=12.75, name='box of tissues'), Item(weight=1.26, name='dagger'), Item(weight=17.71, name='pair of handcuffs')}, {Item(weight=2.44, name='washcloth'), Item(weight=6.53, name='sheet of paper'), Item(weight=10.56, name='cat'), Item(weight=1.99, name='martini glass'), Item(weight=17.83, name='Christmas ornament')}, {Item(weight=7.2, name='shark'), Item(weight=13.81, name='plush dog'), Item(weight=18.99, name='flashlight')}, {Item(weight=6.96, name='rusty nail'), Item(weight=1.1, name='hair clip'), Item(weight=14.49, name='cars'), Item(weight=6.07, name='bookmark'), Item(weight=11.23, name='handheld game system')}, {Item(weight=5.39, name='lemon'), Item(weight=10.28, name='multitool'), Item(weight=10.29, name='rabbit'), Item(weight=13.35, name='statuette')}, {Item(weight=13.24, name='spatula'), Item(weight=13.47, name='bottle of water'), Item(weight=13.29, name='postage stamp')}, {Item(weight=4.29, name='mirror'), Item(weight=4.46, name='soap'), Item(weight=12.03, name='spoon'), Item(weight=13.66, name='beaded bracelet')}, {Item(weight=9.4, name='can of beans'), Item(weight=13.83, name='plush rabbit'), Item(weight=16.74, name='game cartridge')}, {Item(weight=16.27, name='lip gloss'), Item(weight=4.04, name='bottle of perfume'), Item(weight=19.69, name='map')}, {Item(weight=16.51, name='hand bag'), Item(weight=6.06, name='cup'), Item(weight=14.38, name='tea cup')}, {Item(weight=6.99, name='candle'), Item(weight=5.0, name='spectacles'), Item(weight=9.08, name='incense holder'), Item(weight=18.3, name='quilt')}, {Item(weight=1.71, name='safety pin'), Item(weight=17.43, name='grid paper'), Item(weight=5.06, name='stick of incense'), Item(weight=15.8, name='milk')}, {Item(weight=16.37, name='egg beater'), Item(weight=6.83, name='hair pin'), Item(weight=9.29, name='light bulb'), Item(weight=6.25, name='roll of stickers')}, {Item(weight=11.43, name='shoes'), Item(weight=7.6, name='soccer ball'), Item(weight=1.4, name='pair of glasses'), Item(weight=16.4, name='class ring'), Item(weight=2.71, name='straw')}, {Item(weight=1.08, name='handful of change'), Item(weight=19.36, name='box'), Item(weight=2.11, name='can of whipped cream'), Item(weight=17.45, name='candlestick')}, {Item(weight=3.29, name='whip'), Item(weight=17.01, name='plush pony'), Item(weight=19.7, name='pearl necklace')}, {Item(weight=15.67, name='tooth pick'), Item(weight=9.11, name='zipper'), Item(weight=3.8, name='pair of earrings'), Item(weight=3.45, name='steak knife'), Item(weight=7.97, name='bow tie')}, {Item(weight=8.63, name='fork'), Item(weight=8.78, name='letter opener'), Item(weight=9.13, name='canteen'), Item(weight=9.39, name='egg')}, {Item(weight=2.35, name='empty tin can'), Item(weight=19.54, name='book of matches'), Item(weight=18.11, name='bell')}, {Item(weight=17.1, name='house'), Item(weight=13.4, name='pair of scissors'), Item(weight=8.24, name='chair')}, {Item(weight=8.41, name='scotch tape'), Item(weight=15.56, name='carrots'), Item(weight=12.74, name='bonesaw'), Item(weight=3.17, name='tissue box')}, {Item(weight=9.15, name='bottle of syrup'), Item(weight=7.95, name='bottle of nail polish'), Item(weight=8.11, name='zebra'), Item(weight=8.18, name='bananas')}, {Item(weight=17.0, name='laser pointer'), Item(weight=14.57, name='roll of toilet paper'), Item(weight=1.85, name='jar of pickles'), Item(weight=6.58, name='CD')}, {Item(weight=6.88, name='tv'), Item(weight=15.0, name='lace'), Item(weight=18.05, name='shawl')}], 40, 10, 50, 15)
+    partition1 = [{Item(weight=19.34, name='toothpaste'), Item(weight=7.15, name='craft book'), Item(weight=2.02, name='tennis ball'), Item(weight=11.49, name='marble')}, {Item(weight=4.43, name='button'), Item(weight=4.78, name='carton of ice cream'), Item(weight=8.84, name='ring'), Item(weight=3.78, name='door'), Item(weight=17.28, name='pasta strainer')}, {Item(weight=8.28, name='socks'), Item(weight=12.75, name='box of tissues'), Item(weight=1.26, name='dagger'), Item(weight=17.71, name='pair of handcuffs')}, {Item(weight=2.44, name='washcloth'), Item(weight=6.53, name='sheet of paper'), Item(weight=10.56, name='cat'), Item(weight=1.99, name='martini glass'), Item(weight=17.83, name='Christmas ornament')}, {Item(weight=7.2, name='shark'), Item(weight=13.81, name='plush dog'), Item(weight=18.99, name='flashlight')}, {Item(weight=6.96, name='rusty nail'), Item(weight=1.1, name='hair clip'), Item(weight=14.49, name='cars'), Item(weight=6.07, name='bookmark'), Item(weight=11.23, name='handheld game system')}, {Item(weight=5.39, name='lemon'), Item(weight=10.28, name='multitool'), Item(weight=10.29, name='rabbit'), Item(weight=13.35, name='statuette')}, {Item(weight=13.24, name='spatula'), Item(weight=13.47, name='bottle of water'), Item(weight=13.29, name='postage stamp')}, {Item(weight=4.29, name='mirror'), Item(weight=4.46, name='soap'), Item(weight=12.03, name='spoon'), Item(weight=13.66, name='beaded bracelet')}, {Item(weight=9.4, name='can of beans'), Item(weight=13.83, name='plush rabbit'), Item(weight=16.74, name='game cartridge')}, {Item(weight=16.27, name='lip gloss'), Item(weight=4.04, name='bottle of perfume'), Item(weight=19.69, name='map')}, {Item(weight=16.51, name='hand bag'), Item(weight=6.06, name='cup'), Item(weight=14.38, name='tea cup')}, {Item(weight=6.99, name='candle'), Item(weight=5.0, name='spectacles'), Item(weight=9.08, name='incense holder'), Item(weight=18.3, name='quilt')}, {Item(weight=1.71, name='safety pin'), Item(weight=17.43, name='grid paper'), Item(weight=5.06, name='stick of incense'), Item(weight=15.8, name='milk')}, {Item(weight=16.37, name='egg beater'), Item(weight=6.83, name='hair pin'), Item(weight=9.29, name='light bulb'), Item(weight=6.25, name='roll of stickers')}, {Item(weight=11.43, name='shoes'), Item(weight=7.6, name='soccer ball'), Item(weight=1.4, name='pair of glasses'), Item(weight=16.4, name='class ring'), Item(weight=2.71, name='straw')}, {Item(weight=1.08, name='handful of change'), Item(weight=19.36, name='box'), Item(weight=2.11, name='can of whipped cream'), Item(weight=17.45, name='candlestick')}, {Item(weight=3.29, name='whip'), Item(weight=17.01, name='plush pony'), Item(weight=19.7, name='pearl necklace')}, {Item(weight=15.67, name='tooth pick'), Item(weight=9.11, name='zipper'), Item(weight=3.8, name='pair of earrings'), Item(weight=3.45, name='steak knife'), Item(weight=7.97, name='bow tie')}, {Item(weight=8.63, name='fork'), Item(weight=8.78, name='letter opener'), Item(weight=9.13, name='canteen'), Item(weight=9.39, name='egg')}, {Item(weight=2.35, name='empty tin can'), Item(weight=19.54, name='book of matches'), Item(weight=18.11, name='bell')}, {Item(weight=17.1, name='house'), Item(weight=13.4, name='pair of scissors'), Item(weight=8.24, name='chair')}, {Item(weight=8.41, name='scotch tape'), Item(weight=15.56, name='carrots'), Item(weight=12.74, name='bonesaw'), Item(weight=3.17, name='tissue box')}, {Item(weight=9.15, name='bottle of syrup'), Item(weight=7.95, name='bottle of nail polish'), Item(weight=8.11, name='zebra'), Item(weight=8.18, name='bananas')}, {Item(weight=17.0, name='laser pointer'), Item(weight=14.57, name='roll of toilet paper'), Item(weight=1.85, name='jar of pickles'), Item(weight=6.58, name='CD')}, {Item(weight=6.88, name='tv'), Item(weight=15.0, name='lace'), Item(weight=18.05, name='shawl')}]
 
-    chromosome2 = Chromosome([{Item(weight=8.63, name='fork'), Item(weight=4.43, name='button'), Item(weight=8.78, name='letter opener'), Item(weight=17.45, name='candlestick')}, {Item(weight=5.0, name='spectacles'), Item(weight=12.03, name='spoon'), Item(weight=6.53, name='sheet of paper'), Item(weight=16.4, name='class ring')}, {Item(weight=19.34, name='toothpaste'), Item(weight=16.27, name='lip gloss'), Item(weight=3.45, name='steak knife')}, {Item(weight=6.88, name='tv'), Item(weight=13.29, name='postage stamp'), Item(weight=15.0, name='lace'), Item(weight=4.78, name='carton of ice cream')}, {Item(weight=9.4, name='can of beans'), Item(weight=10.29, name='rabbit'), Item(weight=18.05, name='shawl')}, {Item(weight=13.35, name='statuette'), Item(weight=8.11, name='zebra'), Item(weight=4.04, name='bottle of perfume'), Item(weight=14.49, name='cars')}, {Item(weight=16.51, name='hand bag'), Item(weight=3.8, name='pair of earrings'), Item(weight=19.69, name='map')}, {Item(weight=1.99, name='martini glass'), Item(weight=7.15, name='craft book'), Item(weight=11.49, name='marble'), Item(weight=19.36, name='box')}, {Item(weight=17.43, name='grid paper'), Item(weight=9.08, name='incense holder'), Item(weight=2.02, name='tennis ball'), Item(weight=9.29, name='light bulb')}, {Item(weight=17.71, name='pair of handcuffs'), Item(weight=17.28, name='pasta strainer')}, {Item(weight=3.17, name='tissue box'), Item(weight=6.25, name='roll of stickers'), Item(weight=13.24, name='spatula'), Item(weight=1.1, name='hair clip'), Item(weight=1.85, name='jar of pickles'), Item(weight=14.38, name='tea cup')}, {Item(weight=6.96, name='rusty nail'), Item(weight=9.13, name='canteen'), Item(weight=3.29, name='whip'), Item(weight=9.39, name='egg'), Item(weight=11.23, name='handheld game system')}, {Item(weight=7.2, name='shark'), Item(weight=8.18, name='bananas'), Item(weight=17.1, name='house'), Item(weight=6.58, name='CD')}, {Item(weight=17.0, name='laser pointer'), Item(weight=2.11, name='can of whipped cream'), Item(weight=19.7, name='pearl necklace')}, {Item(weight=5.39, name='lemon'), Item(weight=12.75, name='box of tissues'), Item(weight=15.8, name='milk')}, set(), {Item(weight=8.28, name='socks'), Item(weight=7.6, name='soccer ball'), Item(weight=13.81, name='plush dog'), Item(weight=8.24, name='chair'), Item(weight=1.71, name='safety pin')}, {Item(weight=13.66, name='beaded bracelet'), Item(weight=4.46, name='soap'), Item(weight=15.67, name='tooth pick'), Item(weight=6.07, name='bookmark')}, {Item(weight=10.28, name='multitool'), Item(weight=2.44, name='washcloth'), Item(weight=7.97, name='bow tie'), Item(weight=17.83, name='Christmas ornament')}, {Item(weight=4.29, name='mirror'), Item(weight=16.37, name='egg beater'), Item(weight=15.56, name='carrots'), Item(weight=3.78, name='door')}, {Item(weight=18.3, name='quilt'), Item(weight=1.26, name='dagger'), Item(weight=6.83, name='hair pin'), Item(weight=12.74, name='bonesaw')}, {Item(weight=2.35, name='empty tin can'), Item(weight=19.54, name='book of matches'), Item(weight=18.11, name='bell')}, {Item(weight=6.06, name='cup'), Item(weight=9.11, name='zipper'), Item(weight=5.06, name='stick of incense'), Item(weight=8.84, name='ring'), Item(weight=9.15, name='bottle of syrup'), Item(weight=1.08, name='handful of change')}, {Item(weight=11.43, name='shoes'), Item(weight=7.95, name='bottle of nail polish'), Item(weight=2.71, name='straw'), Item(weight=16.74, name='game cartridge')}, {Item(weight=8.41, name='scotch tape'), Item(weight=13.47, name='bottle of water'), Item(weight=17.01, name='plush pony')}, {Item(weight=1.4, name='pair of glasses'), Item(weight=14.57, name='roll of toilet paper'), Item(weight=13.4, name='pair of scissors'), Item(weight=10.56, name='cat')}, {Item(weight=6.99, name='candle'), Item(weight=13.83, name='plush rabbit'), Item(weight=18.99, name='flashlight')}], 40, 10, 50, 15)
+    partition2 = [{Item(weight=8.63, name='fork'), Item(weight=4.43, name='button'), Item(weight=8.78, name='letter opener'), Item(weight=17.45, name='candlestick')}, {Item(weight=5.0, name='spectacles'), Item(weight=12.03, name='spoon'), Item(weight=6.53, name='sheet of paper'), Item(weight=16.4, name='class ring')}, {Item(weight=19.34, name='toothpaste'), Item(weight=16.27, name='lip gloss'), Item(weight=3.45, name='steak knife')}, {Item(weight=6.88, name='tv'), Item(weight=13.29, name='postage stamp'), Item(weight=15.0, name='lace'), Item(weight=4.78, name='carton of ice cream')}, {Item(weight=9.4, name='can of beans'), Item(weight=10.29, name='rabbit'), Item(weight=18.05, name='shawl')}, {Item(weight=13.35, name='statuette'), Item(weight=8.11, name='zebra'), Item(weight=4.04, name='bottle of perfume'), Item(weight=14.49, name='cars')}, {Item(weight=16.51, name='hand bag'), Item(weight=3.8, name='pair of earrings'), Item(weight=19.69, name='map')}, {Item(weight=1.99, name='martini glass'), Item(weight=7.15, name='craft book'), Item(weight=11.49, name='marble'), Item(weight=19.36, name='box')}, {Item(weight=17.43, name='grid paper'), Item(weight=9.08, name='incense holder'), Item(weight=2.02, name='tennis ball'), Item(weight=9.29, name='light bulb')}, {Item(weight=17.71, name='pair of handcuffs'), Item(weight=17.28, name='pasta strainer')}, {Item(weight=3.17, name='tissue box'), Item(weight=6.25, name='roll of stickers'), Item(weight=13.24, name='spatula'), Item(weight=1.1, name='hair clip'), Item(weight=1.85, name='jar of pickles'), Item(weight=14.38, name='tea cup')}, {Item(weight=6.96, name='rusty nail'), Item(weight=9.13, name='canteen'), Item(weight=3.29, name='whip'), Item(weight=9.39, name='egg'), Item(weight=11.23, name='handheld game system')}, {Item(weight=7.2, name='shark'), Item(weight=8.18, name='bananas'), Item(weight=17.1, name='house'), Item(weight=6.58, name='CD')}, {Item(weight=17.0, name='laser pointer'), Item(weight=2.11, name='can of whipped cream'), Item(weight=19.7, name='pearl necklace')}, {Item(weight=5.39, name='lemon'), Item(weight=12.75, name='box of tissues'), Item(weight=15.8, name='milk')}, set(), {Item(weight=8.28, name='socks'), Item(weight=7.6, name='soccer ball'), Item(weight=13.81, name='plush dog'), Item(weight=8.24, name='chair'), Item(weight=1.71, name='safety pin')}, {Item(weight=13.66, name='beaded bracelet'), Item(weight=4.46, name='soap'), Item(weight=15.67, name='tooth pick'), Item(weight=6.07, name='bookmark')}, {Item(weight=10.28, name='multitool'), Item(weight=2.44, name='washcloth'), Item(weight=7.97, name='bow tie'), Item(weight=17.83, name='Christmas ornament')}, {Item(weight=4.29, name='mirror'), Item(weight=16.37, name='egg beater'), Item(weight=15.56, name='carrots'), Item(weight=3.78, name='door')}, {Item(weight=18.3, name='quilt'), Item(weight=1.26, name='dagger'), Item(weight=6.83, name='hair pin'), Item(weight=12.74, name='bonesaw')}, {Item(weight=2.35, name='empty tin can'), Item(weight=19.54, name='book of matches'), Item(weight=18.11, name='bell')}, {Item(weight=6.06, name='cup'), Item(weight=9.11, name='zipper'), Item(weight=5.06, name='stick of incense'), Item(weight=8.84, name='ring'), Item(weight=9.15, name='bottle of syrup'), Item(weight=1.08, name='handful of change')}, {Item(weight=11.43, name='shoes'), Item(weight=7.95, name='bottle of nail polish'), Item(weight=2.71, name='straw'), Item(weight=16.74, name='game cartridge')}, {Item(weight=8.41, name='scotch tape'), Item(weight=13.47, name='bottle of water'), Item(weight=17.01, name='plush pony')}, {Item(weight=1.4, name='pair of glasses'), Item(weight=14.57, name='roll of toilet paper'), Item(weight=13.4, name='pair of scissors'), Item(weight=10.56, name='cat')}, {Item(weight=6.99, name='candle'), Item(weight=13.83, name='plush rabbit'), Item(weight=18.99, name='flashlight')}]
+    # geny operują na numerach przedmiotów, Item porównuje się bez numeru
+    items = {item: item for item in Item.indexed(sorted(chain.from_iterable(partition1)))}
+    chromosome1 = Chromosome([[items[item] for item in p] for p in partition1], 40, 10, 50, 15)
+    chromosome2 = Chromosome([[items[item] for item in p] for p in partition2], 40, 10, 50, 15)
 
     chromosome1.cross(chromosome2)
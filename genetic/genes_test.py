@@ -1,16 +1,74 @@
+import os
 import unittest
 from genetic.genes import *
+from genetic.fitness import population_fitness
+from genetic.IslandModel import IslandModel
+from genetic.ga_selections import best_rank_selection
+from genetic.offspring import OffspringPool, plan_offspring, serial_offspring
+from rand_solution_generator import rand_solution
+
+
+def nested_scan_cross(mother: Chromosome, father: Chromosome, rng):
+    """Krzyżowanie przeglądające listy genów, jak przed indeksowaniem genów i przedmiotów;
+    zwraca dziecko i geny wspólne"""
+    args = mother.args
+    mother_genes = sorted(mother.genes, key=gene_order)
+    father_genes = sorted(father.genes, key=gene_order)
+    common = set()
+    i = j = 0
+    while i < len(mother_genes) and j < len(father_genes):
+        i_fit, j_fit = mother_genes[i].cost_fitness, father_genes[j].cost_fitness
+        if i_fit < j_fit:
+            j += 1
+        elif i_fit > j_fit:
+            i += 1
+        else:
+            for gene in father_genes[j:]:
+                if gene.cost_fitness < i_fit:
+                    break
+                if gene == mother_genes[i]:
+                    common.add(gene)
+                    break
+            i += 1
+    from_mother = [g for g in mother_genes if g not in common][:(len(mother_genes) - len(common)) // 2]
+    from_father = [g for g in father_genes if g not in common][:(len(father_genes) - len(common)) // 2]
+
+    def items(genes):
+        return {item for gene in genes for item in gene}
+
+    in_no_genes = items(mother_genes) - items(from_mother) - items(from_father) - items(common)
+    for item in sorted(items(from_mother) & items(from_father)):
+        mother_gene = next(g for g in from_mother if item in g.subset)
+        father_gene = next(g for g in from_father if item in g.subset)
+        if (mother_gene.cost_fitness < father_gene.cost_fitness
+                or (mother_gene.cost_fitness == father_gene.cost_fitness and rng.random() < 0.5)):
+            chosen_seq, chosen = from_mother, mother_gene
+        else:
+            chosen_seq, chosen = from_father, father_gene
+        chosen_seq.remove(chosen)
+        chosen_seq.append(Gene([i for i in chosen if i != item], *args))
+    genes = from_mother + from_father + list(common)
+    for item in sorted(in_no_genes):
+        ordered = sorted(genes, key=gene_order)
+        fitting = [g for g in ordered if g.weight + item.weight <= g.truck_load]
+        target = next((g for g in fitting if g.cost_fitness_with(item.weight) > g.cost_fitness),
+                      fitting[-1] if fitting else None)
+        if target is None:
+            genes.append(Gene([item], *args))
+        else:
+            genes[genes.index(target)] = Gene(list(target) + [item], *args)
+    return Chromosome(genes, *args), common
 
 
 class GenesTest(unittest.TestCase):
     def setUp(self):
-        self.items = [
+        self.items = Item.indexed([
             Item(name='chair1', weight=4),
             Item(name='chair2', weight=4),
             Item(name='chair3', weight=4),
             Item(name='chair4', weight=4),
             Item(name='table', weight=20),
-        ]
+        ])
         self.truck_load = 60
         self.truck_cost = 50
         self.car_load = 12
@@ -23,11 +81,118 @@ class GenesTest(unittest.TestCase):
         self.assertEqual(gene1.subset, set(self.items))
         self.assertTrue(gene1.is_by_truck)
 
+    def test_gene_cache(self):
+        cache = GeneCache(maxsize=2)
+        chairs = cache.get(self.items[:2], self.basic_args)
+        self.assertIs(cache.get(reversed(self.items[:2]), self.basic_args), chairs)
+        cache.get(self.items[2:3], self.basic_args)
+        cache.get(self.items[3:4], self.basic_args)
+        # najdawniej używany gen został usunięty
+        self.assertIsNot(cache.get(self.items[:2], self.basic_args), chairs)
+        self.assertEqual(cache.cache_info(), GeneCacheInfo(hits=1, misses=4, maxsize=2, currsize=2))
+
+    def test_gene_ids(self):
+        gene = Gene(self.items[2:0:-1], *self.basic_args)
+        self.assertEqual(gene.ids, (1, 2))
+        self.assertEqual(gene.with_item(self.items[4]).ids, (1, 2, 4))
+        self.assertEqual(gene.without(self.items[1]), Gene(self.items[2:3], *self.basic_args))
+        with self.assertRaises(ValueError):
+            Gene([Item(name='chair', weight=4)], *self.basic_args)
+
+    def test_gene_cache_separates_instances(self):
+        other_items = Item.indexed([Item(name='sofa', weight=30)])
+        self.assertEqual(make_gene(self.items[:1], *self.basic_args).weight, 4)
+        self.assertEqual(make_gene(other_items, *self.basic_args).weight, 30)
+
+    def test_cost_follows_genes(self):
+        chromosome = Chromosome([self.items[:3], self.items[3:]], *self.basic_args)
+        self.assertEqual(chromosome.cost, 65)
+        chromosome.genes = {Gene(self.items, *self.basic_args)}
+        self.assertEqual(chromosome.cost, 50)
+
+    def test_validation_policy(self):
+        sampled = ValidationPolicy('sampled', every=3)
+        self.assertEqual([sampled.should_check() for _ in range(7)],
+                         [True, False, False, True, False, False, True])
+        self.assertFalse(ValidationPolicy('off').should_check())
+        with self.assertRaises(ValueError):
+            ValidationPolicy('sometimes')
+
+    def test_same_items(self):
+        chromosome1 = Chromosome([self.items[:3], self.items[3:]], *self.basic_args)
+        chromosome2 = Chromosome([self.items[:1], self.items[1:]], *self.basic_args)
+        self.assertTrue(chromosome1.same_items(chromosome2))
+        self.assertFalse(chromosome1.same_items(Chromosome([self.items[1:]], *self.basic_args)))
+
     def test_chromosomes(self):
         chromosome1 = Chromosome([self.items[:3], self.items[3:]], *self.basic_args)
         chromosome2 = Chromosome([self.items[:1], self.items[1:]], *self.basic_args)
         chromosome2.cross(chromosome1)
 
+    def test_cross_matches_nested_scan(self):
+        items, *args = Item.from_json(
+            os.path.join(os.path.dirname(__file__), '..', 'test_data', 'ex.json'))
+        random.seed(11)
+        parents = [Chromosome(sum(rand_solution(items, args[1], args[0], random.random()), []), *args)
+                   for _ in range(6)]
+        # dzieci mają geny wspólne z rodzicami, więc krok 1 ma co znajdować
+        parents += [parents[i].cross(parents[i + 1], random.Random(i)) for i in range(5)]
+        found_common = 0
+        for seed in range(30):
+            rng = random.Random(seed)
+            mother, father = rng.choice(parents), rng.choice(parents)
+            expected, common = nested_scan_cross(mother, father, random.Random(seed))
+            self.assertEqual(mother.genes & father.genes, common)
+            self.assertEqual(mother.cross(father, random.Random(seed)).genes, expected.genes)
+            found_common += len(common)
+        self.assertGreater(found_common, 0)
+
+    def test_insertion_index_matches_scan(self):
+        rng = random.Random(3)
+        for args in ((40, 20, 50, 30), (40, 20, 30, 50), (40, 10, 50, 15)):
+            items = Item.indexed(Item(rng.choice([rng.uniform(0.5, 20), rng.randint(1, 15)]), f'item{i}')
+                                 for i in range(80))
+            genes = [make_gene(trip, *args) for trip in sum(rand_solution(items, args[1], args[0]), [])]
+            index = InsertionIndex(genes, args)
+            ordered = sorted(genes, key=gene_order)
+            for weight in [rng.uniform(0.5, 25) for _ in range(50)] + [1, 5, 10, 15]:
+                fitting = [g for g in ordered if g.weight + weight <= g.truck_load]
+                expected = next((g for g in fitting if g.cost_fitness_with(weight) > g.cost_fitness),
+                                fitting[-1] if fitting else None)
+                self.assertIs(index.target(weight), expected)
+
+    def test_population_fitness(self):
+        population = [
+            Chromosome([self.items[:3], self.items[3:]], *self.basic_args),
+            Chromosome([self.items[:1], self.items[1:]], *self.basic_args),
+            Chromosome([[item] for item in self.items], *self.basic_args),
+        ]
+        self.assertEqual(list(population_fitness(population)),
+                         [c.fitness for c in population])
+
+    def test_parallel_offspring_matches_serial(self):
+        items, *args = Item.from_json(
+            os.path.join(os.path.dirname(__file__), '..', 'test_data', 'ex.json'))
+        rng = random.Random(7)
+        population = []
+        for _ in range(20):
+            random.seed(rng.random())
+            car_trips, truck_trips = rand_solution(items, args[1], args[0], random.random())
+            population.append(Chromosome(car_trips + truck_trips, *args))
+        plan = plan_offspring(len(population), 30, rng)
+        serial = serial_offspring(population, plan, 0.5)
+        with OffspringPool(2, sorted(items, key=lambda it: it.index), tuple(args), 4) as pool:
+            parallel = pool.offspring(population, plan, 0.5)
+        self.assertEqual([c.genes for c in serial], [c.genes for c in parallel])
+
+    def test_dead_island(self):
+        def dying_generator():
+            os._exit(3)
+
+        model = IslandModel(2, dying_generator, best_rank_selection, lambda *_: False)
+        with self.assertRaisesRegex(RuntimeError, 'Island 0 .* exit code 3'):
+            model.run(5)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,102 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence, Tuple
+from assignment import Assignment
+from genetic.genes import Chromosome
+from metrics import StageTimer, stage
+from util import mp_context
+
+# (indeks matki, indeks ojca, ziarno generatora dziecka)
+Plan = List[Tuple[int, int, int]]
+
+
+def plan_offspring(population_len: int, n_children: int, rng=random) -> Plan:
+    """Losuje rodziców i ziarna wszystkich dzieci pokolenia z głównego generatora"""
+    return [
+        (rng.randrange(population_len), rng.randrange(population_len), rng.getrandbits(64))
+        for _ in range(n_children)
+    ]
+
+
+def breed(mother: Chromosome, father: Chromosome, seed: int, mutation_probability: float,
+          timer: StageTimer = None) -> Chromosome:
+    """Tworzy jedno dziecko; cała losowość pochodzi z generatora zasianego `seed`"""
+    rng = random.Random(seed)
+    with stage(timer, 'crossover'):
+        child = mother.cross(father, rng)
+    if rng.random() <= mutation_probability:
+        with stage(timer, 'mutation'):
+            child.mutation(rng)
+    return child
+
+
+def serial_offspring(population: Sequence[Chromosome], plan: Plan,
+                     mutation_probability: float, timer: StageTimer = None) -> List[Chromosome]:
+    return [breed(population[a], population[b], seed, mutation_probability, timer)
+            for a, b, seed in plan]
+
+
+_items = None
+_args = None
+
+
+def _init_worker(items, args):
+    global _items, _args
+    _items = items
+    _args = args
+
+
+def _breed_chunk(parents: Dict[int, tuple], chunk: Plan, mutation_probability: float):
+    decoded = {i: Chromosome.from_assignment(Assignment.decode(code, _items, _args))
+               for i, code in parents.items()}
+    return [breed(decoded[a], decoded[b], seed, mutation_probability).to_assignment(_items).encode()
+            for a, b, seed in chunk]
+
+
+class OffspringPool:
+    """Pula procesów tworząca potomstwo pokolenia porcjami
+
+    Rodzice i dzieci przesyłani są w postaci Assignment.encode, a lista przedmiotów
+    trafia do procesów tylko raz, przy ich starcie. Wynik jest identyczny
+    z serial_offspring dla tego samego planu.
+
+    items - lista przedmiotów, items[i].index == i
+    """
+
+    def __init__(self, workers: int, items, args, chunk_size: int = None):
+        self.workers = workers
+        self.items = items
+        self.args = args
+        self.chunk_size = chunk_size
+        self.executor = ProcessPoolExecutor(
+            workers, mp_context=mp_context(),
+            initializer=_init_worker, initargs=(items, args))
+
+    def offspring(self, population: Sequence[Chromosome], plan: Plan,
+                  mutation_probability: float) -> List[Chromosome]:
+        chunk_size = self.chunk_size or max(1, -(-len(plan) // (self.workers * 4)))
+        codes = {}
+        futures = []
+        for start in range(0, len(plan), chunk_size):
+            chunk = plan[start:start + chunk_size]
+            parents = {}
+            for a, b, _ in chunk:
+                for i in (a, b):
+                    if i not in codes:
+                        codes[i] = population[i].to_assignment(self.items).encode()
+                    parents[i] = codes[i]
+            futures.append(self.executor.submit(_breed_chunk, parents, chunk, mutation_probability))
+        children = []
+        for future in futures:
+            children += [Chromosome.from_assignment(Assignment.decode(code, self.items, self.args))
+                         for code in future.result()]
+        return children
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,164 @@
+"""Heurystyki konstrukcyjne: szybkie, dobre rozwiązania startowe dla obu algorytmów
+
+Przedmioty są rozpatrywane od najcięższego. Przedmiot cięższy od ładowności samochodu trafia
+do kursu ciężarówką, lżejszy najpierw do już rozpoczętego kursu ciężarówką (za ten kurs i tak
+płacimy), potem do kursu samochodem, a jeśli nigdzie się nie mieści, rozpoczyna nowy kurs
+pojazdem tańszym w przeliczeniu na jednostkę ładowności. Na końcu kursy ciężarówką, które
+zmieściłyby się w samochodzie, jadą samochodem, jeśli jest tańszy.
+
+first_fit_decreasing i best_fit_decreasing mają sygnaturę jak rand_solution (plus koszty)
+i działają w czasie O(n log n); solution_generator miesza je z rand_solution.
+"""
+import random
+from typing import List, Tuple
+from sortedcontainers import SortedList
+from capacity_index import FirstFitTree
+from rand_solution_generator import rand_solution
+
+
+class _Trips:
+    """Kursy jednego pojazdu i ich obciążenia; find wybiera kurs dla przedmiotu"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        # indeks zawęża poszukiwania, dopasowanie sprawdzane jest dokładnie: load + weight <= capacity
+        self.tolerance = 1e-9 * max(capacity, 1)
+        self.trips: List[list] = []
+        self.loads: List[float] = []
+
+    def fits(self, k, weight) -> bool:
+        return self.loads[k] + weight <= self.capacity
+
+    def add(self, k, item):
+        self.trips[k].append(item)
+        self.loads[k] += item.weight
+
+    def new(self, item) -> int:
+        self.trips.append([item])
+        self.loads.append(item.weight)
+        return len(self.trips) - 1
+
+
+class _FirstFit(_Trips):
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.tree = FirstFitTree()
+
+    def find(self, weight) -> int:
+        """Numer pierwszego kursu, w którym zmieści się weight, albo -1"""
+        k = self.tree.first_fit(weight - self.tolerance)
+        while k >= 0 and not self.fits(k, weight):
+            k = self.tree.first_fit(weight - self.tolerance, k + 1)
+        return k
+
+    def add(self, k, item):
+        super().add(k, item)
+        self.tree.update(k, self.capacity - self.loads[k])
+
+    def new(self, item) -> int:
+        self.tree.append(self.capacity - item.weight)
+        return super().new(item)
+
+
+class _BestFit(_Trips):
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        # (wolne miejsce, numer kursu)
+        self.residuals = SortedList()
+
+    def find(self, weight) -> int:
+        """Numer kursu z najmniejszym wolnym miejscem, w którym zmieści się weight, albo -1"""
+        for _, k in self.residuals.irange((weight - self.tolerance, -1)):
+            if self.fits(k, weight):
+                return k
+        return -1
+
+    def add(self, k, item):
+        self.residuals.remove((self.capacity - self.loads[k], k))
+        super().add(k, item)
+        self.residuals.add((self.capacity - self.loads[k], k))
+
+    def new(self, item) -> int:
+        k = super().new(item)
+        self.residuals.add((self.capacity - self.loads[k], k))
+        return k
+
+
+def _pack(trips_class, items, car_capacity, truck_capacity, car_cost, truck_cost,
+          noise=0.0) -> Tuple[list, list]:
+    """noise > 0 mnoży masy przy sortowaniu przez losowe czynniki z [1 - noise, 1 + noise],
+    więc kolejne wywołania dają różne rozwiązania"""
+    if noise:
+        items = sorted(items, key=lambda item: item.weight * random.uniform(1 - noise, 1 + noise),
+                       reverse=True)
+    else:
+        items = sorted(items, key=lambda item: item.weight, reverse=True)
+    cars = trips_class(car_capacity)
+    trucks = trips_class(truck_capacity)
+    truck_preferred = truck_cost / truck_capacity < car_cost / car_capacity
+
+    for item in items:
+        if item.weight > car_capacity:
+            k = trucks.find(item.weight)
+            if k >= 0:
+                trucks.add(k, item)
+            else:
+                trucks.new(item)
+            continue
+        for trips in (trucks, cars):
+            k = trips.find(item.weight)
+            if k >= 0:
+                trips.add(k, item)
+                break
+        else:
+            (trucks if truck_preferred else cars).new(item)
+
+    car_trips = cars.trips
+    truck_trips = []
+    for trip, load in zip(trucks.trips, trucks.loads):
+        (car_trips if load <= car_capacity and car_cost <= truck_cost else truck_trips).append(trip)
+    return car_trips, truck_trips
+
+
+def first_fit_decreasing(items, car_capacity, truck_capacity, car_cost, truck_cost, noise=0.0):
+    """Każdy przedmiot trafia do pierwszego kursu, w którym się mieści (FirstFitTree)"""
+    return _pack(_FirstFit, items, car_capacity, truck_capacity, car_cost, truck_cost, noise)
+
+
+def best_fit_decreasing(items, car_capacity, truck_capacity, car_cost, truck_cost, noise=0.0):
+    """Każdy przedmiot trafia do kursu, w którym zostanie najmniej wolnego miejsca (SortedList)"""
+    return _pack(_BestFit, items, car_capacity, truck_capacity, car_cost, truck_cost, noise)
+
+
+HEURISTICS = {
+    'ffd': first_fit_decreasing,
+    'bfd': best_fit_decreasing,
+}
+
+
+def solution_generator(items, car_capacity, truck_capacity, car_cost, truck_cost,
+                       heuristic='bfd', mix=0.1, noise=0.1, fallback: callable = None):
+    """Funkcja bez argumentów zwracająca (kursy samochodem, kursy ciężarówką), jak rand_solution
+
+    mix - prawdopodobieństwo rozwiązania z heurystyki zamiast z fallback (domyślnie rand_solution);
+    pierwsze takie rozwiązanie jest dokładne, kolejne są zaburzone o noise, żeby zachować
+    różnorodność populacji
+    """
+    if heuristic not in HEURISTICS:
+        raise ValueError(f'Unknown heuristic {heuristic!r}, expected one of {tuple(HEURISTICS)}')
+    if fallback is None:
+        def fallback():
+            return rand_solution(items, car_capacity, truck_capacity)
+    pack = HEURISTICS[heuristic]
+    exact_done = False
+
+    def _generate():
+        nonlocal exact_done
+        if random.random() >= mix:
+            return fallback()
+        if not exact_done:
+            exact_done = True
+            return pack(items, car_capacity, truck_capacity, car_cost, truck_cost)
+        return pack(items, car_capacity, truck_capacity, car_cost, truck_cost, noise)
+
+    return _generate
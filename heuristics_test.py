@@ -0,0 +1,52 @@
+import os
+import random
+import unittest
+from heuristics import HEURISTICS, solution_generator
+from instance import Instance
+from lower_bound import integer_bound
+
+
+def cost(car_trips, truck_trips, car_cost, truck_cost):
+    return len(car_trips) * car_cost + len(truck_trips) * truck_cost
+
+
+class HeuristicsTest(unittest.TestCase):
+    def setUp(self):
+        path = os.path.join(os.path.dirname(__file__), 'test_data', 'hard.json')
+        self.instance = Instance.load(path)
+        self.truck_load, self.car_load, self.truck_cost, self.car_cost = self.instance.args
+        self.args = self.car_load, self.truck_load, self.car_cost, self.truck_cost
+
+    def check(self, car_trips, truck_trips):
+        items = sorted(item.index for trip in car_trips + truck_trips for item in trip)
+        self.assertEqual(items, list(range(len(self.instance))))
+        for trips, capacity in ((car_trips, self.car_load), (truck_trips, self.truck_load)):
+            for trip in trips:
+                self.assertLessEqual(sum(item.weight for item in trip), capacity)
+
+    def test_heuristics(self):
+        bound = integer_bound(self.instance.weights, *self.instance.args)
+        for name, pack in HEURISTICS.items():
+            car_trips, truck_trips = pack(self.instance.items, *self.args)
+            self.check(car_trips, truck_trips)
+            # ok. 5% powyżej dolnego ograniczenia
+            self.assertLessEqual(cost(car_trips, truck_trips, self.car_cost, self.truck_cost),
+                                 1.05 * bound, name)
+            random.seed(0)
+            self.check(*pack(self.instance.items, *self.args, noise=0.2))
+
+    def test_solution_generator(self):
+        random.seed(0)
+        exact = HEURISTICS['bfd'](self.instance.items, *self.args)
+        generate = solution_generator(self.instance.items, *self.args, mix=0.5)
+        solutions = [generate() for _ in range(20)]
+        for solution in solutions:
+            self.check(*solution)
+        self.assertEqual(sum(solution == exact for solution in solutions), 1)
+        self.assertFalse(any(solution == exact for solution in
+                             (solution_generator(self.instance.items, *self.args, mix=0)()
+                              for _ in range(5))))
+
+
+if __name__ == '__main__':
+    unittest.main()
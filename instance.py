@@ -0,0 +1,310 @@
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from functools import cached_property
+from typing import List, Sequence, TextIO
+import numpy as np
+from Item import Item
+
+PARAMS = ('truck_load', 'car_load', 'truck_cost', 'car_cost')
+
+# Format binarny (little endian):
+#   nagłówek: magia, wersja, liczba przedmiotów, 4 parametry jako float64, dopełniony do 64 bajtów
+#   masy: n * float64
+#   tablica nazw: n + 1 przesunięć int64 w bloku nazw, blok nazw w UTF-8
+MAGIC = b'TRIPINST'
+VERSION = 1
+HEADER = struct.Struct('<8sIQ4d')
+WEIGHTS_OFFSET = 64
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')),
+    'badania-operacyjne')
+
+
+class Instance:
+    """Instancja problemu: masy przedmiotów jako tablica, ich nazwy i parametry
+
+    # Interfejs
+    ## Atrybuty
+    * weights -> tablica mas przedmiotów (float64), weights[i] to masa przedmiotu o numerze i
+    * names -> lista nazw przedmiotów
+    * truck_load, car_load, truck_cost, car_cost -> dane wejściowe problemu
+    * args -> powyższe parametry w kolejności używanej przez Gene i Assignment
+    * items -> ponumerowane przedmioty, tworzone przy pierwszym użyciu
+    * path -> plik binarny, z którego odwzorowano masy (None dla instancji w pamięci)
+    ## Metody
+    * load -> wczytanie pliku JSON lub binarnego, rozpoznanego po nagłówku
+    * from_json -> strumieniowe wczytanie pliku JSON
+    * from_dict -> instancja ze zdekodowanego dokumentu JSON (np. przesłanego przez daemon.py)
+    * from_binary, to_binary -> odczyt (przez numpy.memmap) i zapis formatu binarnego
+    * as_tuple -> to samo, co zwraca Item.from_json
+
+    Instancja odwzorowana z pliku binarnego jest serializowana (pickle) jako ścieżka pliku,
+    więc proces, który ją odczyta, odwzorowuje ten sam plik zamiast dostawać kopię mas.
+    """
+
+    def __init__(self, weights, names: Sequence[str], truck_load, car_load, truck_cost, car_cost,
+                 path: str = None):
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.names = names
+        self.truck_load = truck_load
+        self.car_load = car_load
+        self.truck_cost = truck_cost
+        self.car_cost = car_cost
+        self.path = path
+
+    @property
+    def args(self):
+        return self.truck_load, self.car_load, self.truck_cost, self.car_cost
+
+    @cached_property
+    def items(self) -> List[Item]:
+        return [Item(weight, name, i)
+                for i, (weight, name) in enumerate(zip(self.weights.tolist(), self.names))]
+
+    def as_tuple(self):
+        return (self.items, *self.args)
+
+    def __len__(self):
+        return len(self.weights)
+
+    def __repr__(self):
+        return f'Instance(items={len(self)}, args={self.args})'
+
+    def __reduce__(self):
+        if self.path is not None:
+            return Instance.from_binary, (self.path,)
+        return Instance, (np.asarray(self.weights), list(self.names), *self.args)
+
+    @staticmethod
+    def load(path: str):
+        with open(path, 'rb') as fin:
+            binary = fin.read(len(MAGIC)) == MAGIC
+        return Instance.from_binary(path) if binary else Instance.from_json(path)
+
+    def to_binary(self, path: str):
+        names = [name.encode() for name in self.names]
+        offsets = np.zeros(len(names) + 1, dtype='<i8')
+        np.cumsum([len(name) for name in names], out=offsets[1:])
+        with open(path, 'wb') as fout:
+            fout.write(HEADER.pack(MAGIC, VERSION, len(self), *self.args).ljust(WEIGHTS_OFFSET, b'\0'))
+            fout.write(self.weights.astype('<f8').tobytes())
+            fout.write(offsets.tobytes())
+            fout.write(b''.join(names))
+
+    @staticmethod
+    def from_binary(path: str, mmap: bool = True):
+        """Wczytuje plik zapisany przez to_binary; z mmap masy i nazwy są odwzorowane, a nie kopiowane"""
+        with open(path, 'rb') as fin:
+            magic, version, n_items, *params = HEADER.unpack(fin.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a binary instance file (version {VERSION})')
+
+        def read(dtype, offset, count):
+            if count == 0:
+                return np.empty(0, dtype=dtype)
+            if mmap:
+                return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(count,))
+            return np.fromfile(path, dtype=dtype, count=count, offset=offset)
+
+        weights = read('<f8', WEIGHTS_OFFSET, n_items)
+        names_offset = WEIGHTS_OFFSET + 8 * n_items
+        offsets = read('<i8', names_offset, n_items + 1) if n_items else np.zeros(1, dtype='<i8')
+        blob = read(np.uint8, names_offset + 8 * (n_items + 1), int(offsets[-1]))
+        # parametry całkowite (jak w plikach JSON) pozostają liczbami całkowitymi
+        params = [int(param) if param.is_integer() else param for param in params]
+        return Instance(weights, _NameTable(offsets, blob), *params, path=path if mmap else None)
+
+    @staticmethod
+    def from_dict(data: dict):
+        """Instancja z już zdekodowanego dokumentu w formacie test_data/*.json"""
+        missing = [param for param in PARAMS if param not in data]
+        if missing:
+            raise ValueError(f'JSON instance has no {", ".join(missing)}')
+        items = data.get('items', [])
+        return Instance(np.array([item['weight'] for item in items], dtype=np.float64),
+                        [item.get('name', '') for item in items], *(data[param] for param in PARAMS))
+
+    @staticmethod
+    def from_json(path: str, chunk_size: int = 1 << 20):
+        """Wczytuje plik w formacie test_data/*.json kawałkami po chunk_size znaków
+
+        Przedmioty są dekodowane partiami mieszczącymi się w buforze, a ich masy i nazwy
+        od razu trafiają do tablic, więc drzewo całego dokumentu nigdy nie powstaje w pamięci.
+        """
+        with open(path) as fin:
+            return _JsonReader(fin, chunk_size).instance()
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fin:
+        for chunk in iter(lambda: fin.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_cached(path: str, cache_dir: str = DEFAULT_CACHE_DIR) -> Instance:
+    """Jak Instance.load, ale plik JSON jest parsowany tylko raz: wynik trafia do cache_dir
+    w formacie binarnym pod skrótem zawartości pliku, a kolejne wywołania go odwzorowują"""
+    with open(path, 'rb') as fin:
+        if fin.read(len(MAGIC)) == MAGIC:
+            return Instance.from_binary(path)
+    cached = os.path.join(cache_dir, file_hash(path) + '.bin')
+    if os.path.exists(cached):
+        return Instance.from_binary(cached)
+    instance = Instance.from_json(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    # zapis do pliku tymczasowego i podmiana, żeby równoległe wywołania nie czytały połowy pliku
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    os.close(fd)
+    try:
+        instance.to_binary(tmp)
+        os.replace(tmp, cached)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return instance
+
+
+class _NameTable(Sequence):
+    """Nazwy przedmiotów dekodowane z bloku UTF-8 dopiero przy odczycie"""
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('name index out of range')
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode()
+
+    def __iter__(self):
+        data = bytes(self.blob)
+        offsets = self.offsets.tolist()
+        for start, end in zip(offsets, offsets[1:]):
+            yield data[start:end].decode()
+
+
+class _JsonReader:
+    """Minimalny strumieniowy parser obiektu najwyższego poziomu z listą 'items'"""
+
+    def __init__(self, fin: TextIO, chunk_size: int):
+        self.fin = fin
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _read(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.fin.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # odczytany początek bufora nie jest już potrzebny
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Pierwszy znak różny od białego, bez przesuwania pozycji"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read():
+                raise ValueError('Unexpected end of JSON instance file')
+
+    def _expect(self, chars: str) -> str:
+        char = self._peek()
+        if char not in chars:
+            raise ValueError(f'Expected one of {chars!r} in JSON instance file, got {char!r}')
+        self.pos += 1
+        return char
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._read():
+                    raise
+                continue
+            # liczba na końcu bufora mogła zostać ucięta
+            if end == len(self.buffer) and self._read():
+                continue
+            self.pos = end
+            return value
+
+    def _batch(self) -> list:
+        """Przedmioty od bieżącej pozycji do ostatniego pełnego przedmiotu w buforze zakończonego
+        przecinkiem, zdekodowane jednym wywołaniem json.loads (pusta lista, jeśli się nie da)"""
+        cut = self.buffer.rfind('},', self.pos)
+        if cut < 0:
+            return []
+        try:
+            # cięcie wewnątrz nazwy zostawiłoby niezamknięty napis, więc zawsze jest wykrywane
+            batch = json.loads('[' + self.buffer[self.pos:cut + 1] + ']')
+        except json.JSONDecodeError:
+            return []
+        self.pos = cut + 1
+        return batch
+
+    def _items(self, weights: array, names: List[str]):
+        self._expect('[')
+        if self._peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            batch = self._batch() or [self._value()]
+            weights.extend(item['weight'] for item in batch)
+            names.extend(item.get('name', '') for item in batch)
+            if self._expect(',]') == ']':
+                return
+
+    def instance(self) -> Instance:
+        params = {}
+        weights = array('d')
+        names = []
+        self._expect('{')
+        if self._peek() == '}':
+            raise ValueError('Empty JSON instance file')
+        while True:
+            key = self._value()
+            self._expect(':')
+            if key == 'items':
+                self._items(weights, names)
+            else:
+                params[key] = self._value()
+            if self._expect(',}') == '}':
+                break
+        missing = [param for param in PARAMS if param not in params]
+        if missing:
+            raise ValueError(f'JSON instance file has no {", ".join(missing)}')
+        return Instance(np.frombuffer(weights, dtype=np.float64), names,
+                        *(params[param] for param in PARAMS))
+
+
+if __name__ == '__main__':
+    # konwersja: python instance.py plik.json [plik.bin]
+    if len(sys.argv) not in (2, 3):
+        sys.exit(f'usage: {sys.argv[0]} INSTANCE.json [INSTANCE.bin]')
+    source = sys.argv[1]
+    target = sys.argv[2] if len(sys.argv) == 3 else source.rsplit('.', 1)[0] + '.bin'
+    Instance.load(source).to_binary(target)
@@ -0,0 +1,125 @@
+"""Generator losowych instancji problemu w formacie test_data/*.json
+
+    python instance_generator.py 1000000 -o duza.json --seed 1 --preset hard -d bimodal
+"""
+import json
+from argparse import ArgumentParser
+from typing import Iterator
+import numpy as np
+from instance import Instance
+
+# parametry plików z test_data
+PRESETS = {
+    'simple': dict(truck_load=40, car_load=10, truck_cost=50, car_cost=15),
+    'medium': dict(truck_load=30, car_load=15, truck_cost=60, car_cost=10),
+    'hard': dict(truck_load=100, car_load=40, truck_cost=150, car_cost=20),
+}
+DISTRIBUTIONS = ('uniform', 'normal', 'lognormal', 'bimodal')
+CHUNK = 1 << 16
+
+
+def sample_weights(rng: np.random.Generator, distribution: str, n: int,
+                   min_weight: float, max_weight: float) -> np.ndarray:
+    """n mas z przedziału [min_weight, max_weight], zaokrąglonych do setnych jak w test_data"""
+    span = max_weight - min_weight
+    if distribution == 'uniform':
+        weights = rng.uniform(min_weight, max_weight, n)
+    elif distribution == 'normal':
+        weights = rng.normal(min_weight + span / 2, span / 6, n)
+    elif distribution == 'lognormal':
+        # większość przedmiotów lekkich, nieliczne ciężkie
+        weights = min_weight + rng.lognormal(0, 0.75, n) * span / 8
+    elif distribution == 'bimodal':
+        # przedmioty mieszczące się w samochodzie i takie, które wymagają ciężarówki
+        heavy = rng.random(n) < 0.5
+        weights = rng.normal(np.where(heavy, min_weight + 0.8 * span, min_weight + 0.2 * span),
+                             span / 10)
+    else:
+        raise ValueError(f'Unknown weight distribution {distribution!r}, expected one of {DISTRIBUTIONS}')
+    return np.clip(np.round(weights, 2), max(min_weight, 0.01), max_weight)
+
+
+def weight_chunks(n_items, seed, distribution, min_weight, max_weight,
+                  truck_load) -> Iterator[np.ndarray]:
+    """Masy kolejnych przedmiotów, po CHUNK naraz; max_weight domyślnie równe połowie ładowności ciężarówki"""
+    if max_weight is None:
+        max_weight = truck_load / 2
+    if not 0 < min_weight <= max_weight <= truck_load:
+        raise ValueError('Weights must satisfy 0 < min_weight <= max_weight <= truck_load')
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_items, CHUNK):
+        yield sample_weights(rng, distribution, min(CHUNK, n_items - start), min_weight, max_weight)
+
+
+def generate(n_items: int, seed: int = 0, distribution: str = 'uniform',
+             truck_load=40, car_load=10, truck_cost=50, car_cost=15,
+             min_weight: float = 1, max_weight: float = None) -> Instance:
+    """Instancja w pamięci"""
+    weights = np.concatenate(
+        list(weight_chunks(n_items, seed, distribution, min_weight, max_weight, truck_load))
+        or [np.empty(0)])
+    return Instance(weights, [f'item{i}' for i in range(n_items)],
+                    truck_load, car_load, truck_cost, car_cost)
+
+
+def write_json(path: str, n_items: int, seed: int = 0, distribution: str = 'uniform',
+               truck_load=40, car_load=10, truck_cost=50, car_cost=15,
+               min_weight: float = 1, max_weight: float = None):
+    """Jak generate, ale zapisuje instancję do pliku kawałkami, bez trzymania jej w pamięci"""
+    chunks = weight_chunks(n_items, seed, distribution, min_weight, max_weight, truck_load)
+    with open(path, 'w') as fout:
+        fout.write('{\n')
+        for key, value in (('car_cost', car_cost), ('truck_cost', truck_cost),
+                           ('car_load', car_load), ('truck_load', truck_load)):
+            fout.write(f'  {json.dumps(key)}: {json.dumps(value)},\n')
+        fout.write('  "items": [')
+        i = 0
+        for weights in chunks:
+            fout.write(''.join(
+                f'{"," if i + j else ""}\n    {{"name": "item{i + j}", "weight": {weight!r}}}'
+                for j, weight in enumerate(weights.tolist())))
+            i += len(weights)
+        fout.write('\n  ]\n}\n')
+
+
+def main():
+    parser = ArgumentParser(description='Generator losowych instancji problemu')
+    parser.add_argument('n_items', type=int, help='Liczba przedmiotów')
+    parser.add_argument('-o', '--output', required=True, help='Ścieżka pliku JSON')
+    parser.add_argument('--seed', type=int, default=0, help='Ziarno (domyślnie 0)')
+    parser.add_argument(
+        '-d', '--distribution', choices=DISTRIBUTIONS, default='uniform',
+        help='Rozkład mas przedmiotów (domyślnie uniform)'
+    )
+    parser.add_argument(
+        '-p', '--preset', choices=sorted(PRESETS), default='simple',
+        help='Parametry pojazdów jak w pliku z test_data (domyślnie simple)'
+    )
+    parser.add_argument(
+        '--load-ratio', type=float,
+        help='Stosunek ładowności ciężarówki do ładowności samochodu, '
+             'zastępuje ładowność ciężarówki z --preset'
+    )
+    parser.add_argument(
+        '--cost-ratio', type=float,
+        help='Stosunek kosztu kursu ciężarówką do kosztu kursu samochodem, '
+             'zastępuje koszt ciężarówki z --preset'
+    )
+    parser.add_argument('--min-weight', type=float, default=1, help='Najmniejsza masa (domyślnie 1)')
+    parser.add_argument(
+        '--max-weight', type=float,
+        help='Największa masa (domyślnie połowa ładowności ciężarówki)'
+    )
+    args = parser.parse_args()
+
+    params = dict(PRESETS[args.preset])
+    if args.load_ratio is not None:
+        params['truck_load'] = params['car_load'] * args.load_ratio
+    if args.cost_ratio is not None:
+        params['truck_cost'] = params['car_cost'] * args.cost_ratio
+    write_json(args.output, args.n_items, args.seed, args.distribution,
+               min_weight=args.min_weight, max_weight=args.max_weight, **params)
+
+
+if __name__ == '__main__':
+    main()
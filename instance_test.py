@@ -0,0 +1,74 @@
+import json
+import os
+import pickle
+import tempfile
+import unittest
+from instance import Instance, load_cached
+from instance_generator import generate, write_json
+
+
+class InstanceTest(unittest.TestCase):
+    def test_matches_json_load(self):
+        path = os.path.join(os.path.dirname(__file__), 'test_data', 'hard.json')
+        with open(path) as fin:
+            expected = json.load(fin)
+        # małe kawałki sprawdzają dzielenie liczb i napisów między odczytami
+        for chunk_size in (3, 1 << 20):
+            instance = Instance.from_json(path, chunk_size)
+            self.assertEqual(instance.weights.tolist(), [item['weight'] for item in expected['items']])
+            self.assertEqual(instance.names, [item['name'] for item in expected['items']])
+            self.assertEqual(instance.args, (expected['truck_load'], expected['car_load'],
+                                             expected['truck_cost'], expected['car_cost']))
+
+    def test_names_with_separators(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'tricky.json')
+            with open(path, 'w') as fout:
+                fout.write('{"truck_load": 5, "car_load": 2, "truck_cost": 3, "car_cost": 1, "items": ['
+                           '{"name": "a},{\\"b", "weight": 2}, {"weight": 3, "name": "},"}, {"weight": 4}]}')
+            instance = Instance.from_json(path, 5)
+        self.assertEqual(instance.names, ['a},{"b', '},', ''])
+        self.assertEqual(instance.weights.tolist(), [2, 3, 4])
+
+    def test_generator_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'instance.json')
+            write_json(path, 1000, seed=5, distribution='bimodal', truck_load=100, car_load=40)
+            loaded = Instance.from_json(path)
+        generated = generate(1000, seed=5, distribution='bimodal', truck_load=100, car_load=40)
+        self.assertEqual(loaded.weights.tolist(), generated.weights.tolist())
+        self.assertEqual(loaded.args, generated.args)
+        self.assertTrue(((generated.weights >= 1) & (generated.weights <= 50)).all())
+        self.assertEqual([item.index for item in loaded.items], list(range(1000)))
+
+    def test_binary_round_trip(self):
+        instance = Instance.from_json(os.path.join(os.path.dirname(__file__), 'test_data', 'hard.json'))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'hard.bin')
+            instance.to_binary(path)
+            for mmap in (True, False):
+                loaded = Instance.from_binary(path, mmap)
+                self.assertEqual(loaded.args, instance.args)
+                self.assertEqual(loaded.weights.tolist(), instance.weights.tolist())
+                self.assertEqual(list(loaded.names), instance.names)
+                self.assertEqual(loaded.names[-1], instance.names[-1])
+            mapped = Instance.load(path)
+            # odwzorowana instancja jest przesyłana jako ścieżka
+            self.assertLess(len(pickle.dumps(mapped)), 200)
+            self.assertEqual(pickle.loads(pickle.dumps(mapped)).weights.tolist(), instance.weights.tolist())
+            del mapped, loaded
+
+    def test_load_cached(self):
+        path = os.path.join(os.path.dirname(__file__), 'test_data', 'medium.json')
+        with tempfile.TemporaryDirectory() as cache_dir:
+            parsed = load_cached(path, cache_dir)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            cached = load_cached(path, cache_dir)
+            self.assertIsNotNone(cached.path)
+            self.assertEqual(cached.weights.tolist(), parsed.weights.tolist())
+            self.assertEqual(cached.args, parsed.args)
+            del cached
+
+
+if __name__ == '__main__':
+    unittest.main()
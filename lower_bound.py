@@ -0,0 +1,72 @@
+"""Dolne ograniczenia kosztu przeprowadzki i warunek stopu, który z nich korzysta
+
+Kurs kosztuje tyle, co kurs ciężarówką, jeśli przewozi więcej niż ładowność samochodu,
+a tyle, co kurs samochodem w przeciwnym razie (jak Gene.cost). Każde rozwiązanie składa się
+więc z x kursów po co najwyżej truck_load i y kursów po co najwyżej car_load, przy czym
+przedmioty cięższe od car_load jadą kursami pierwszego rodzaju. Obydwa ograniczenia
+rozwiązują tę relaksację: ciągłe dla rzeczywistych x i y, całkowitoliczbowe dla całkowitych.
+"""
+import math
+from typing import Optional
+import numpy as np
+
+# masy są liczbami zmiennoprzecinkowymi, suma pełnych kursów nie może dać dodatkowego kursu
+EPS = 1e-9
+
+
+def _relaxation(weights, truck_load, car_load):
+    """Łączna masa, masa przedmiotów wymagających ciężarówki i najmniejsza liczba kursów ciężarówką"""
+    weights = np.asarray(weights, dtype=np.float64)
+    heavy = weights[weights > car_load]
+    # dwa przedmioty cięższe od połowy ładowności ciężarówki nie mieszczą się w jednym kursie
+    alone = int(np.count_nonzero(heavy > truck_load / 2))
+    min_trucks = max(math.ceil(heavy.sum() / truck_load - EPS), alone)
+    return float(weights.sum()), float(heavy.sum()), min_trucks
+
+
+def continuous_bound(weights, truck_load, car_load, truck_cost, car_cost) -> float:
+    """Ciężkie przedmioty jadą ciężarówką, pozostała masa najtańszym za jednostkę ładowności pojazdem; O(n)"""
+    total, heavy, _ = _relaxation(weights, truck_load, car_load)
+    rate = min(truck_cost / truck_load, car_cost / car_load)
+    return truck_cost * heavy / truck_load + rate * (total - heavy)
+
+
+def integer_bound(weights, truck_load, car_load, truck_cost, car_cost) -> float:
+    """Najtańsza całkowita liczba kursów obu rodzajów mieszcząca łączną masę,
+    z co najmniej tyloma kursami ciężarówką, ile wymagają ciężkie przedmioty"""
+    total, _, min_trucks = _relaxation(weights, truck_load, car_load)
+    max_trucks = max(min_trucks, math.ceil(total / truck_load - EPS))
+    trucks = np.arange(min_trucks, max_trucks + 1)
+    cars = np.maximum(0, np.ceil((total - truck_load * trucks) / car_load - EPS))
+    return float(np.min(truck_cost * trucks + car_cost * cars))
+
+
+BOUNDS = {
+    'continuous': continuous_bound,
+    'integer': integer_bound,
+}
+
+
+def lower_bound(instance, method='integer') -> float:
+    """Dolne ograniczenie kosztu dla instance.Instance"""
+    if method not in BOUNDS:
+        raise ValueError(f'Unknown lower bound {method!r}, expected one of {tuple(BOUNDS)}')
+    return BOUNDS[method](instance.weights, *instance.args)
+
+
+def gap(cost, bound) -> float:
+    """Względna odległość kosztu od dolnego ograniczenia (0 - rozwiązanie optymalne)"""
+    return max(0.0, (cost - bound) / cost) if cost > 0 else 0.0
+
+
+def bound_stop_condition(bound: Optional[float], max_gap: float = 0.0, unchanged_gens: int = None):
+    """Warunek stopu dla GeneticAlgorithm i BeeAlgorithm: najlepsze rozwiązanie osiągnęło
+    ograniczenie z dokładnością do max_gap albo nie poprawiło się od unchanged_gens pokoleń
+
+    bound - None wyłącza porównanie z ograniczeniem
+    """
+    def _stop_condition(_, fitness, generations_unchanged):
+        if unchanged_gens is not None and generations_unchanged > unchanged_gens:
+            return True
+        return bound is not None and gap(-fitness, bound) <= max_gap + EPS
+    return _stop_condition
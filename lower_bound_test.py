@@ -0,0 +1,50 @@
+import random
+import unittest
+from lower_bound import bound_stop_condition, continuous_bound, gap, integer_bound
+
+
+def partitions(items):
+    if not items:
+        yield []
+        return
+    first, rest = items[0], items[1:]
+    for partition in partitions(rest):
+        for i in range(len(partition)):
+            yield partition[:i] + [[first] + partition[i]] + partition[i + 1:]
+        yield [[first]] + partition
+
+
+def optimum(weights, truck_load, car_load, truck_cost, car_cost):
+    best = None
+    for partition in partitions(weights):
+        loads = [sum(trip) for trip in partition]
+        if max(loads) > truck_load:
+            continue
+        cost = sum(truck_cost if load > car_load else car_cost for load in loads)
+        best = cost if best is None else min(best, cost)
+    return best
+
+
+class LowerBoundTest(unittest.TestCase):
+    def test_bounds_below_optimum(self):
+        rng = random.Random(0)
+        for _ in range(40):
+            args = (40, rng.choice([10, 15, 25]), rng.choice([20, 50, 100]), rng.choice([10, 15]))
+            weights = [round(rng.uniform(1, 40), 2) for _ in range(rng.randint(1, 7))]
+            best = optimum(weights, *args)
+            continuous, integer = continuous_bound(weights, *args), integer_bound(weights, *args)
+            self.assertLessEqual(continuous, integer + 1e-9)
+            self.assertLessEqual(integer, best)
+
+    def test_stop_condition(self):
+        self.assertAlmostEqual(gap(110, 99), 0.1)
+        stop = bound_stop_condition(100, 0.05, unchanged_gens=10)
+        self.assertTrue(stop(None, -100, 0))
+        self.assertTrue(stop(None, -105, 0))
+        self.assertFalse(stop(None, -110, 10))
+        self.assertTrue(stop(None, -110, 11))
+        self.assertFalse(bound_stop_condition(None)(None, -100, 1000))
+
+
+if __name__ == '__main__':
+    unittest.main()
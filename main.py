@@ -1,54 +1,51 @@
+import os
 import random
-from bees.BeeAlgorithm import BeeAlgorithm
-from bees.ProblemParameters import ProblemParameters
-from bees.Solution import Solution
-from genetic.GeneticAlgorithm import GeneticAlgorithm
-from genetic.genes import Chromosome
-from Item import Item
-from genetic.ga_selections import best_rank_selection
+from checkpoint import Checkpoint
+from instance import DEFAULT_CACHE_DIR, Instance, load_cached
+from lower_bound import BOUNDS, bound_stop_condition, gap, lower_bound
+from metrics import PROFILERS, JsonLinesWriter, profiled
 from rand_solution_generator import rand_solution
 import logging
 from argparse import ArgumentParser
 
+# Moduły algorytmów (wraz z tqdm i sortedcontainers) są importowane dopiero
+# w funkcjach, które ich używają, żeby uruchomienie jednego algorytmu nie płaciło za drugi.
 
-def cost(car_trips, truck_trips, car_cost, truck_cost):
-    return len(car_trips) * car_cost + len(truck_trips) * truck_cost
 
-
-def print_rand_solution(file_name='test_data/ex.json'):
-    """RANDOM SOLUTION PRINTING"""
-    items, truck_capacity, car_capacity, truck_cost, car_cost = Item.from_json(
-        file_name)
-    car_trips, truck_trips = rand_solution(
-        items, car_capacity, truck_capacity, random.random())
-
-    print('\nVia car')
-    print(f'n = {len(car_trips)}')
-    print(car_trips)
-    print('\n=============\nVia truck')
-    print(f'm = {len(truck_trips)}')
-    print(truck_trips)
-    operation_cost = cost(car_trips, truck_trips, car_cost, truck_cost)
-    print('\nCost')
-    print(operation_cost)
+def as_instance(problem) -> Instance:
+    """Instancja problemu z obiektu Instance albo ze ścieżki do pliku JSON lub binarnego"""
+    return problem if isinstance(problem, Instance) else Instance.load(problem)
 
 
 # GENETIC
 
-def gene_rand_solution(items, car_capacity, truck_capacity):
-    car_trips, truck_trips = rand_solution(
-        items, car_capacity, truck_capacity, random.random())
-    return car_trips + truck_trips
-
-
-def ga_population_generator(file_name='test_data/ex.json', pop_size=100):
-    items, truck_capacity, car_capacity, truck_cost, car_cost = Item.from_json(
-        file_name)
+def initial_solutions(items, car_capacity, truck_capacity, car_cost, truck_cost,
+                      heuristic=None, mix=0.1, car_item_prob=-1):
+    """Generator rozwiązań startowych (kursy samochodem, kursy ciężarówką): rand_solution,
+    a z heurystyką z heuristics.py jej rozwiązania w proporcji mix"""
+    def _random():
+        prob = random.random() if car_item_prob is None else car_item_prob
+        return rand_solution(items, car_capacity, truck_capacity, prob)
+
+    if heuristic is None:
+        return _random
+    from heuristics import solution_generator
+    return solution_generator(items, car_capacity, truck_capacity, car_cost, truck_cost,
+                              heuristic, mix, fallback=_random)
+
+
+def ga_population_generator(problem='test_data/ex.json', pop_size=100, heuristic=None, mix=0.1):
+    """heuristic - None (same rozwiązania losowe) albo klucz heuristics.HEURISTICS"""
+    from genetic.genes import Chromosome
+    items, truck_capacity, car_capacity, truck_cost, car_cost = as_instance(problem).as_tuple()
+    # losowy udział przedmiotów jadących samochodem
+    solutions = initial_solutions(items, car_capacity, truck_capacity, car_cost, truck_cost,
+                                  heuristic, mix, car_item_prob=None)
 
     def _gen():
         return [
             Chromosome(
-                gene_rand_solution(items, car_capacity, truck_capacity),
+                sum(solutions(), []),
                 truck_capacity,
                 car_capacity,
                 truck_cost,
@@ -59,34 +56,126 @@ def ga_population_generator(file_name='test_data/ex.json', pop_size=100):
     return _gen
 
 
-def ga_basic_stop_condition(n_gens):
-    def _stop_condition(_, __, i):
-        return i > n_gens
-    return _stop_condition
-
-
 # BEES
 
-def get_pp(file_name='test_data/ex.json'):
-    items, truck_capacity, car_capacity, truck_cost, car_cost = Item.from_json(file_name)
-    return ProblemParameters(truck_capacity, car_capacity, truck_cost, car_cost)
+def get_pp(problem='test_data/ex.json'):
+    from bees.ProblemParameters import ProblemParameters
+    return ProblemParameters(*as_instance(problem).args)
 
 
 def bee_fpf(fitness):
     return int(-fitness) // 10
 
 
-def get_bee_sf(file_name='test_data/ex.json'):
-    items, truck_capacity, car_capacity, truck_cost, car_cost = Item.from_json(file_name)
-    pp = ProblemParameters(truck_capacity, car_capacity, truck_cost, car_cost)
+def get_bee_sf(problem='test_data/ex.json', heuristic=None, mix=0.1):
+    """heuristic - None (same rozwiązania losowe) albo klucz heuristics.HEURISTICS"""
+    from bees.Solution import Solution
+    instance = as_instance(problem)
+    items, truck_capacity, car_capacity, truck_cost, car_cost = instance.as_tuple()
+    pp = get_pp(instance)
+    solutions = initial_solutions(items, car_capacity, truck_capacity, car_cost, truck_cost,
+                                  heuristic, mix)
 
     def _bee_sf():
-        ct, tt = rand_solution(items, car_capacity, truck_capacity)
+        ct, tt = solutions()
         return Solution(ct, tt, pp)
 
     return _bee_sf
 
 
+def open_checkpoint(args, instance: Instance, engine: str):
+    """Checkpoint algorytmu w katalogu --checkpoint-dir (None bez tej opcji)"""
+    if args.checkpoint_dir is None:
+        return None
+    return Checkpoint(os.path.join(args.checkpoint_dir, f'{engine}.ckpt'), args.checkpoint_every,
+                      instance)
+
+
+def resume(algorithm, checkpoint: Checkpoint, instance: Instance):
+    state = checkpoint.load()
+    if state is None:
+        print(f"No checkpoint in {checkpoint.path}, starting a new run")
+        return
+    algorithm.restore(state, instance.items)
+    print(f"Resuming from {checkpoint.path}")
+
+
+def print_solution(solution, bound=None):
+    print("Found solution:")
+    print(solution)
+    print(solution.cost)
+    if bound is not None:
+        print(f"Lower bound: {bound:g}, gap: {gap(solution.cost, bound):.2%}")
+
+
+def run_genetic(args, instance: Instance, callbacks=(), bound=None):
+    from genetic.GeneticAlgorithm import GeneticAlgorithm
+    from genetic.IslandModel import IslandModel
+    from genetic.fitness import population_fitness
+    from genetic.ga_selections import best_rank_selection
+
+    print("-" * 100)
+    print("Running genetic algorithm")
+    stop_condition = bound_stop_condition(bound, args.gap, args.unchanged_gens)
+    if args.islands > 1:
+        ga = IslandModel(args.islands, ga_population_generator(instance, args.pop_size, args.init, args.init_mix),
+                         best_rank_selection, stop_condition,
+                         fitness_evaluator=population_fitness,
+                         migration_interval=args.migration_interval,
+                         migrants=args.migrants, topology=args.topology,
+                         callbacks=callbacks)
+    else:
+        ga = GeneticAlgorithm(ga_population_generator(instance, args.pop_size, args.init, args.init_mix),
+                              best_rank_selection, stop_condition,
+                              fitness_evaluator=population_fitness, workers=args.workers,
+                              instance=instance, callbacks=callbacks)
+
+    if args.islands > 1:
+        solution = ga.run(args.gens)
+    else:
+        checkpoint = open_checkpoint(args, instance, 'genetic')
+        if args.resume:
+            resume(ga, checkpoint, instance)
+        solution = ga.run(args.gens, checkpoint)
+    print_solution(solution, bound)
+
+
+def run_bees(args, instance: Instance, callbacks=(), bound=None):
+    from bees.BeeAlgorithm import BeeAlgorithm
+
+    print("-"*100)
+    print("Running bees algorithm")
+    ba = BeeAlgorithm(args.gens, 50, 25, 50, 10, 5, bee_fpf,
+                      get_bee_sf(instance, args.init, args.init_mix), get_pp(instance),
+                      workers=args.workers, callbacks=callbacks,
+                      stop_condition=bound_stop_condition(bound, args.gap, args.unchanged_gens))
+    checkpoint = open_checkpoint(args, instance, 'bees')
+    if args.resume:
+        resume(ba, checkpoint, instance)
+    solution = ba.run(args.pop_size, checkpoint)
+    print_solution(solution, bound)
+
+
+def run_exact(args, instance: Instance, callbacks=(), bound=None):
+    from bees.Solution import Solution
+    from exact import solve
+
+    print("-" * 100)
+    print("Running branch and bound")
+    result = solve(instance, args.time_limit)
+    print(f"{'Optimal' if result.optimal else 'Time limit reached'} after {result.nodes} nodes, "
+          f"{result.seconds:.1f} s")
+    print_solution(Solution(result.car_trips, result.truck_trips, get_pp(instance)), result.bound)
+
+
+ENGINES = {
+    'genetic': (run_genetic,),
+    'bees': (run_bees,),
+    'both': (run_genetic, run_bees),
+    'exact': (run_exact,),
+}
+
+
 def main():
     parser = ArgumentParser(
         description='Demonstracja algorytmów populacyjnych'
@@ -94,7 +183,22 @@ def main():
     parser.add_argument(
         'infile', nargs='?', default='test_data/ex.json',
         help='Ścieżka do pliku JSON z instancją problemu o strukturze '
-             'identycznej, jak załączony simple.json (domyślnie ex.json)'
+             'identycznej, jak załączony simple.json, albo do pliku binarnego '
+             'utworzonego przez instance.py (domyślnie ex.json)'
+    )
+    parser.add_argument(
+        '-e', '--engine', choices=sorted(ENGINES), default='both',
+        help='Algorytm do uruchomienia: genetic, bees, both (oba) albo exact - dokładne '
+             'rozwiązanie metodą podziału i ograniczeń dla małych instancji (domyślnie oba)'
+    )
+    parser.add_argument(
+        '--cache-dir', default=DEFAULT_CACHE_DIR,
+        help='Katalog na sparsowane instancje JSON, kluczowane skrótem pliku '
+             f'(domyślnie {DEFAULT_CACHE_DIR})'
+    )
+    parser.add_argument(
+        '--no-cache', action='store_true',
+        help='Parsuje plik JSON bez zapisywania i odczytu katalogu --cache-dir'
     )
     parser.add_argument(
         '-n', dest='gens', type=int, default=1000,
@@ -105,36 +209,137 @@ def main():
         help='Ilość pokoleń z rzędu bez poprawy, po których powinniśmy '
              'się zatrzymać (domyślnie 200)'
     )
+    parser.add_argument(
+        '--bound', choices=(*BOUNDS, 'none'), default='none',
+        help='Dolne ograniczenie kosztu, po którego osiągnięciu algorytmy się zatrzymują: '
+             'continuous - szybkie, integer - dokładniejsze, none - bez ograniczenia '
+             '(domyślnie none)'
+    )
+    parser.add_argument(
+        '--gap', type=float, default=0.0,
+        help='Względna odległość od dolnego ograniczenia, przy której można się zatrzymać, '
+             'np. 0.01 (domyślnie 0 - tylko po osiągnięciu ograniczenia)'
+    )
+    parser.add_argument(
+        '--time-limit', type=float, default=60.0,
+        help='Limit czasu w sekundach dla -e exact; po nim wypisywane jest najlepsze znalezione '
+             'rozwiązanie i udowodnione dolne ograniczenie (domyślnie 60)'
+    )
     parser.add_argument(
         '-k', dest='pop_size', type=int, default=100,
         help='Rozmiar populacji w każdym pokoleniu'
     )
+    parser.add_argument(
+        '--init', choices=('ffd', 'bfd', 'random'), default='random',
+        help='Heurystyka tworząca część rozwiązań startowych obu algorytmów: ffd - first fit '
+             'decreasing, bfd - best fit decreasing, random - tylko rozwiązania losowe (domyślnie random)'
+    )
+    parser.add_argument(
+        '--init-mix', type=float, default=0.1,
+        help='Udział rozwiązań startowych z heurystyki, pozostałe są losowe (domyślnie 0.1)'
+    )
+    parser.add_argument(
+        '-w', dest='workers', type=int, default=None,
+        help='Liczba procesów tworzących potomstwo w algorytmie genetycznym '
+             'i przeszukujących pola kwiatów w algorytmie pszczelim '
+             '(domyślnie wszystko w jednym procesie)'
+    )
+    parser.add_argument(
+        '-i', dest='islands', type=int, default=1,
+        help='Liczba niezależnych populacji (wysp) algorytmu genetycznego, '
+             'każda w osobnym procesie (domyślnie 1)'
+    )
+    parser.add_argument(
+        '-m', dest='migration_interval', type=int, default=10,
+        help='Co ile pokoleń wyspy wymieniają najlepsze osobniki (domyślnie 10)'
+    )
+    parser.add_argument(
+        '--migrants', type=int, default=2,
+        help='Ilu najlepszych osobników wysyła każda wyspa (domyślnie 2)'
+    )
+    parser.add_argument(
+        '--topology', default='ring',
+        help='Topologia wymiany osobników między wyspami: ring lub full (domyślnie ring)'
+    )
+    parser.add_argument(
+        '--gene-cache', type=int, default=None,
+        help='Ile ostatnio używanych genów przechowywać do ponownego użycia, '
+             '0 wyłącza pamięć podręczną (domyślnie 100000)'
+    )
+    parser.add_argument(
+        '--validation', choices=('full', 'sampled', 'off'), default='full',
+        help='Sprawdzanie wyników krzyżowania: full - każdego, sampled - co N-tego, '
+             'off - żadnego (domyślnie full)'
+    )
+    parser.add_argument(
+        '--validation-every', type=int, default=100,
+        help='Co które krzyżowanie sprawdzać w trybie sampled (domyślnie 100)'
+    )
+    parser.add_argument(
+        '--metrics', metavar='PLIK',
+        help='Plik JSON Lines, do którego trafią pomiary każdego pokolenia (iteracji): '
+             'czasy etapów, liczba ocen na sekundę, najlepsza i średnia sprawność, '
+             'różnorodność populacji i trafienia gene_cache'
+    )
+    parser.add_argument(
+        '--profile', choices=PROFILERS,
+        help='Profilowanie algorytmów: cprofile - każde wywołanie, sampling - próbki stosu '
+             'co 5 ms, z mniejszym narzutem'
+    )
+    parser.add_argument(
+        '--profile-output', metavar='PLIK',
+        help='Plik na wynik profilowania (pstats dla cprofile, stosy zwinięte dla sampling); '
+             'bez niego podsumowanie trafia na stderr'
+    )
+    parser.add_argument(
+        '--checkpoint-dir', metavar='KATALOG',
+        help='Katalog, w którym co --checkpoint-every pokoleń zapisywany jest stan algorytmów '
+             '(genetic.ckpt, bees.ckpt); nie dotyczy modelu wysp'
+    )
+    parser.add_argument(
+        '--checkpoint-every', type=int, default=50,
+        help='Co ile pokoleń (iteracji) zapisywać stan (domyślnie 50)'
+    )
+    parser.add_argument(
+        '--resume', action='store_true',
+        help='Wznawia przebieg od stanu zapisanego w --checkpoint-dir'
+    )
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.ERROR)
 
-    # print_rand_solution(args.infile)
-
-    # GENETIC ALGORITHM STARTS
-    print("-" * 100)
-    print("Running genetic algorithm")
-    ga = GeneticAlgorithm(ga_population_generator(args.infile, args.pop_size),
-                          best_rank_selection, ga_basic_stop_condition(args.gens))
-
-    solution = ga.run(args.gens)
-    print("Found solution:")
-    print(solution)
-    print(solution.cost)
-
-    # BEES ALGORITHM STARTS
-    print("-"*100)
-    print("Running bees algorithm")
-    pp = get_pp(args.infile)
-    ba = BeeAlgorithm(args.gens, 50, 25, 50, 10, 5, bee_fpf, get_bee_sf(args.infile), pp)
-    solution = ba.run(args.pop_size)
-    print("Found solution:")
-    print(solution)
-    print(solution.cost)
+    if args.resume and args.checkpoint_dir is None:
+        parser.error('--resume requires --checkpoint-dir')
+    if args.checkpoint_every < 1:
+        parser.error('--checkpoint-every must be positive')
+
+    if args.engine in ('genetic', 'both'):
+        from genetic.IslandModel import TOPOLOGIES
+        from genetic.genes import cross_validation, gene_cache
+        if args.topology not in TOPOLOGIES:
+            parser.error(f'unknown topology {args.topology!r}, choose from {", ".join(TOPOLOGIES)}')
+        if args.gene_cache is not None:
+            gene_cache.resize(args.gene_cache)
+        cross_validation.configure(args.validation, args.validation_every)
+
+    # jedno wczytanie instancji dla obu algorytmów
+    instance = Instance.load(args.infile) if args.no_cache else load_cached(args.infile, args.cache_dir)
+
+    if args.init == 'random':
+        args.init = None
+    if not 0 <= args.init_mix <= 1:
+        parser.error('--init-mix must be between 0 and 1')
+
+    bound = None if args.bound == 'none' else lower_bound(instance, args.bound)
+
+    metrics = JsonLinesWriter(args.metrics) if args.metrics else None
+    try:
+        with profiled(args.profile, args.profile_output):
+            for run in ENGINES[args.engine]:
+                run(args, instance, [metrics] if metrics else (), bound)
+    finally:
+        if metrics:
+            metrics.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,177 @@
+"""Pomiary przebiegu algorytmów: czasy etapów każdego pokolenia (iteracji), liczba ocen na sekundę,
+najlepsza i średnia sprawność, różnorodność populacji i skuteczność gene_cache, zapisywane jako JSON Lines
+
+    python main.py --metrics przebieg.jsonl --profile cprofile --profile-output przebieg.prof
+
+GeneticAlgorithm, IslandModel i BeeAlgorithm przyjmują listę `callbacks`; każda z nich jest
+wywoływana po każdym pokoleniu (iteracji) ze słownikiem pomiarów. Bez callbacks czasy etapów
+nie są mierzone.
+"""
+import cProfile
+import json
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterable, Optional, Sequence
+
+PROFILERS = ('cprofile', 'sampling')
+
+
+class StageTimer:
+    """Sumaryczne czasy etapów od ostatniego pop
+
+    # Interfejs
+    ## Metody
+    * stage -> kontekst mierzący czas jednego wykonania etapu
+    * add -> dodanie czasu etapu zmierzonego inaczej
+    * pop -> czasy wszystkich etapów w sekundach, licznik jest zerowany
+    """
+
+    def __init__(self):
+        self.times: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float):
+        self.times[name] = self.times.get(name, 0.0) + seconds
+
+    def pop(self) -> Dict[str, float]:
+        times, self.times = self.times, {}
+        return times
+
+
+def stage(timer: Optional[StageTimer], name: str):
+    """timer.stage(name) albo pusty kontekst, jeśli czasy nie są mierzone"""
+    return nullcontext() if timer is None else timer.stage(name)
+
+
+def gene_diversity(population: Sequence) -> float:
+    """Udział różnych genów wśród genów wszystkich chromosomów (1 - żaden gen się nie powtarza)"""
+    total = sum(len(c.genes) for c in population)
+    if not total:
+        return 0.0
+    return len({gene for c in population for gene in c.genes}) / total
+
+
+def distinct_share(values: Iterable) -> float:
+    """Udział różnych wartości, np. sprawności zwiadowców, wśród wszystkich wartości"""
+    values = list(values)
+    return len(set(values)) / len(values) if values else 0.0
+
+
+def hit_rate(before, after) -> Optional[float]:
+    """Udział trafień gene_cache między dwoma odczytami cache_info (None bez żadnych odczytów)"""
+    hits = after.hits - before.hits
+    lookups = hits + after.misses - before.misses
+    return hits / lookups if lookups > 0 else None
+
+
+class JsonLinesWriter:
+    """Callback zapisujący każdy słownik pomiarów jako jeden wiersz JSON"""
+
+    def __init__(self, path: str):
+        self.fout = open(path, 'w')
+
+    def __call__(self, record: dict):
+        self.fout.write(json.dumps(record) + '\n')
+        self.fout.flush()
+
+    def close(self):
+        self.fout.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SamplingProfiler:
+    """Co `interval` sekund zapisuje stos wywołań wątku, który go uruchomił
+
+    Wynik jest w formacie stosów zwiniętych (plik;funkcja;... liczba próbek), czytanym
+    przez flamegraph.pl i speedscope. Próbki pobiera wątek Pythona, więc długie wywołania
+    w C, które nie zwalniają GIL, przesuwają próbkę na ich koniec.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_filename}:{code.co_name}')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        self._sampler.join()
+
+    def write(self, fout):
+        for stack, count in self.stacks.most_common():
+            fout.write(f'{stack} {count}\n')
+
+    def print_stats(self, limit=30, fout=sys.stderr):
+        """Funkcje z największą liczbą próbek, w których były na szczycie stosu"""
+        own = Counter()
+        for stack, count in self.stacks.items():
+            own[stack.rsplit(';', 1)[-1]] += count
+        total = sum(own.values()) or 1
+        for function, count in own.most_common(limit):
+            fout.write(f'{100 * count / total:6.2f}% {count:8d}  {function}\n')
+
+
+@contextmanager
+def profiled(kind: Optional[str], output: str = None):
+    """Profiluje wnętrze kontekstu; kind - None, 'cprofile' albo 'sampling'
+
+    Wynik trafia do pliku output (pstats dla cProfile, stosy zwinięte dla profilera
+    próbkującego), a bez niego jego podsumowanie jest wypisywane na stderr.
+    """
+    if kind is None:
+        yield
+        return
+    if kind not in PROFILERS:
+        raise ValueError(f'Unknown profiler {kind!r}, expected one of {PROFILERS}')
+    profiler = cProfile.Profile() if kind == 'cprofile' else SamplingProfiler()
+    if kind == 'cprofile':
+        profiler.enable()
+    else:
+        profiler.start()
+    try:
+        yield
+    finally:
+        if kind == 'cprofile':
+            profiler.disable()
+            if output:
+                profiler.dump_stats(output)
+            else:
+                pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(30)
+        else:
+            profiler.stop()
+            if output:
+                with open(output, 'w') as fout:
+                    profiler.write(fout)
+            else:
+                profiler.print_stats()
@@ -0,0 +1,49 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+from genetic.GeneticAlgorithm import GeneticAlgorithm
+from genetic.fitness import population_fitness
+from genetic.ga_selections import best_rank_selection
+from main import ga_population_generator
+from metrics import JsonLinesWriter, StageTimer, profiled
+
+
+class MetricsTest(unittest.TestCase):
+    def test_stage_timer(self):
+        timer = StageTimer()
+        for _ in range(2):
+            with timer.stage('crossover'):
+                pass
+        timer.add('mutation', 1.5)
+        times = timer.pop()
+        self.assertEqual(sorted(times), ['crossover', 'mutation'])
+        self.assertEqual(times['mutation'], 1.5)
+        self.assertEqual(timer.pop(), {})
+
+    def test_genetic_records(self):
+        random.seed(0)
+        generator = ga_population_generator(
+            os.path.join(os.path.dirname(__file__), 'test_data', 'ex.json'), 10)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'metrics.jsonl')
+            with JsonLinesWriter(path) as writer:
+                ga = GeneticAlgorithm(generator, best_rank_selection, lambda *_: False,
+                                      fitness_evaluator=population_fitness, callbacks=[writer])
+                with profiled('sampling', os.path.join(tmp, 'profile.folded')):
+                    ga.run(3)
+            with open(path) as fin:
+                records = [json.loads(line) for line in fin]
+        self.assertEqual([r['generation'] for r in records], [1, 2, 3])
+        for record in records:
+            self.assertIn('crossover', record['stages'])
+            self.assertEqual(record['evaluations'], 10)
+            self.assertLessEqual(record['best_fitness'], record['global_best_fitness'])
+            self.assertLessEqual(record['mean_fitness'], record['best_fitness'])
+            self.assertTrue(0 < record['diversity'] <= 1)
+        self.assertEqual(records[-1]['global_best_fitness'], ga.global_best_fitness)
+
+
+if __name__ == '__main__':
+    unittest.main()
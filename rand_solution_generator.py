@@ -25,6 +25,8 @@ def rand_solution(items, car_capacity, truck_capacity, car_item_prob=-1):
     if car_item_prob == -1:
         car_item_prob = car_capacity / truck_capacity
 
+    # shuffling a copy keeps the result independent of earlier calls on the same list
+    items = list(items)
     random.shuffle(items)
     split_i = int(len(items) * car_item_prob)
     car_items = items[:split_i]
@@ -1,5 +1,14 @@
+import itertools
+import multiprocessing
 from typing import Iterable
 
 
 def flatten(seq: Iterable[Iterable]) -> list:
-    return sum((list(sub_seq) for sub_seq in seq), start=[])
+    return list(itertools.chain.from_iterable(seq))
+
+
+def mp_context():
+    """fork pozwala przekazać dane do procesów bez serializacji, o ile system go obsługuje"""
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()